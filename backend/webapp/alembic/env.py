@@ -1,12 +1,16 @@
 # type: ignore
 
 from logging.config import fileConfig
+from pathlib import Path
 
 from alembic import context
+from dotenv import load_dotenv
 from sqlalchemy import engine_from_config, pool
 
-from backend.webapp.config import SQLALCHEMY_DATABASE_URI
-from backend.webapp.database.sql import db
+load_dotenv(Path(__file__).resolve().parents[2] / ".env")
+
+from backend.webapp.config import SQLALCHEMY_DATABASE_URI  # noqa: E402
+from backend.webapp.database.sql import db  # noqa: E402
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -21,7 +25,9 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 
+from backend.webapp.attachments.infrastructure.models import *  # noqa
 from backend.webapp.auth.infrastructure.models import *  # noqa
+from backend.webapp.chat.models import *  # noqa
 
 # target_metadata = mymodel.Base.metadata
 
@@ -0,0 +1,34 @@
+"""add message attachment_id index
+
+Revision ID: 3f6a1c8e5b92
+Revises: 7c2e9b4f0a15
+Create Date: 2026-10-19 20:14:05.208331
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6a1c8e5b92"
+down_revision: Union[str, Sequence[str], None] = "7c2e9b4f0a15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Downloads check that the caller took part in a message carrying the
+    # attachment.
+    op.create_index(
+        op.f("ix_message_attachment_id"),
+        "message",
+        ["attachment_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_message_attachment_id"), table_name="message")
@@ -0,0 +1,47 @@
+"""add confirmation created_at
+
+Revision ID: 7c2e9b4f0a15
+Revises: d5a8f2c61b07
+Create Date: 2026-10-19 18:02:41.530912
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e9b4f0a15"
+down_revision: Union[str, Sequence[str], None] = "d5a8f2c61b07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing tokens are stamped with the migration time, so they get a
+    # full TTL before the cleanup job considers them.
+    op.add_column(
+        "confirmation",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        op.f("ix_confirmation_created_at"),
+        "confirmation",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_confirmation_created_at"), table_name="confirmation"
+    )
+    op.drop_column("confirmation", "created_at")
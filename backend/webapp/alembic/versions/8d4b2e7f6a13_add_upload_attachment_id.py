@@ -0,0 +1,43 @@
+"""add attachment_upload attachment_id
+
+Revision ID: 8d4b2e7f6a13
+Revises: 3f6a1c8e5b92
+Create Date: 2026-10-19 20:52:37.640218
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d4b2e7f6a13"
+down_revision: Union[str, Sequence[str], None] = "3f6a1c8e5b92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Completed uploads now keep their row, pointing at the attachment,
+    # until the cleanup job expires them by created_at.
+    op.add_column(
+        "attachment_upload",
+        sa.Column("attachment_id", sa.String(length=32), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_attachment_upload_created_at"),
+        "attachment_upload",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_attachment_upload_created_at"),
+        table_name="attachment_upload",
+    )
+    op.drop_column("attachment_upload", "attachment_id")
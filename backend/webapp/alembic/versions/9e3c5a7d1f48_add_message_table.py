@@ -0,0 +1,72 @@
+"""add message table
+
+Revision ID: 9e3c5a7d1f48
+Revises: 4b1d7e9a2c30
+Create Date: 2026-10-19 14:03:27.904116
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "9e3c5a7d1f48"
+down_revision: Union[str, Sequence[str], None] = "4b1d7e9a2c30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "message",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.String(length=32), nullable=False),
+        sa.Column("sender", sa.String(), nullable=False),
+        sa.Column("recipient", sa.String(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("attachment_id", sa.String(length=32), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', content)", persisted=True),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("message_id"),
+    )
+    op.create_index(
+        "ix_message_sender_created_at",
+        "message",
+        ["sender", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_message_recipient_created_at",
+        "message",
+        ["recipient", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_message_search_vector",
+        "message",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_message_search_vector",
+        table_name="message",
+        postgresql_using="gin",
+    )
+    op.drop_index("ix_message_recipient_created_at", table_name="message")
+    op.drop_index("ix_message_sender_created_at", table_name="message")
+    op.drop_table("message")
@@ -1,30 +1,57 @@
+from collections.abc import Mapping
+from typing import Any
+
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
+from backend.webapp.attachments.infrastructure.api import attachments_bp
 from backend.webapp.auth.infrastructure.api import auth_bp
+from backend.webapp.auth.infrastructure.rate_limit import AuthRateLimits
 from backend.webapp.chat.api import chat_bp
-from backend.webapp.config import FLASK_CONFIG
+from backend.webapp.chat.presence import build_presence_lookup
+from backend.webapp.config import FLASK_CONFIG, TRUSTED_PROXY_HOPS
 from backend.webapp.database import db
 from backend.webapp.mails import mailing
+from backend.webapp.metrics import RequestInstrumentation
+
+
+def create_app(config: Mapping[str, Any] | None = None) -> Flask:
+    """Build a configured app; `config` overrides the environment's.
 
-app = Flask(__name__)
+    Importing this module does no setup, so gunicorn can preload it once
+    in the master and tests only pay for the apps they create.
+    """
+    app = Flask(__name__)
 
-app.config.update(FLASK_CONFIG)
+    app.config.update(FLASK_CONFIG)
+    if config:
+        app.config.update(config)
 
-db.init_app(app)
-mailing.init_app(app)
+    db.init_app(app)
+    mailing.init_app(app)
+    RequestInstrumentation().init_app(app)
+    # Redis clients for these are created per app, never at import time.
+    AuthRateLimits.from_config().init_app(app)
+    build_presence_lookup().init_app(app)
 
-app.register_blueprint(auth_bp)
-app.register_blueprint(chat_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(chat_bp)
+    app.register_blueprint(attachments_bp)
 
-CORS(app)
+    CORS(app)
 
+    if TRUSTED_PROXY_HOPS > 0:
+        # Per-IP rate limits key on remote_addr, which is otherwise the
+        # proxy's address for every client.
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
 
-@app.route("/")
-def index():
-    return "Welcome to the Web App!"
+    @app.route("/")
+    def index():
+        return "Welcome to the Web App!"
 
+    @app.route("/health")
+    def health():
+        return {"status": "ok"}, 200
 
-@app.route("/health")
-def health():
-    return {"status": "ok"}, 200
+    return app
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+
+from backend.webapp.attachments.domain.enums import ChunkStatus
+
+
+class UploadInputDTO(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    # A bare `type/subtype` media type, without parameters.
+    content_type: str = Field(
+        default="application/octet-stream",
+        max_length=127,
+        pattern=r"^[A-Za-z0-9][\w!#$&^.+-]*/[A-Za-z0-9][\w!#$&^.+-]*$",
+    )
+    size: int = Field(gt=0)
+
+
+class UploadSessionDTO(BaseModel):
+    id: str
+    owner: str
+    filename: str
+    content_type: str
+    size: int
+    offset: int = 0
+    # Set once the last chunk landed, so a retried request can be answered.
+    attachment_id: str | None = None
+
+
+class AttachmentDTO(BaseModel):
+    id: str
+    sha256: str
+    owner: str
+    filename: str
+    content_type: str
+    size: int
+
+
+class ChunkResultDTO(BaseModel):
+    status: ChunkStatus
+    offset: int = 0
+    attachment: AttachmentDTO | None = None
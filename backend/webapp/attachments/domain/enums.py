@@ -0,0 +1,10 @@
+from enum import StrEnum, auto
+
+
+class ChunkStatus(StrEnum):
+    accepted = auto()
+    completed = auto()
+    empty = auto()
+    not_found = auto()
+    offset_mismatch = auto()
+    too_large = auto()
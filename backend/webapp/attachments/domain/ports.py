@@ -0,0 +1,103 @@
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+
+from backend.webapp.attachments.domain.dtos import (
+    AttachmentDTO,
+    UploadSessionDTO,
+)
+
+
+class AttachmentRepoInterface(ABC):
+    @abstractmethod
+    def create_upload(self, upload: UploadSessionDTO) -> None:
+        pass
+
+    @abstractmethod
+    def get_upload(self, upload_id: str) -> UploadSessionDTO | None:
+        pass
+
+    @abstractmethod
+    def complete_upload(
+        self, upload_id: str, attachment: AttachmentDTO
+    ) -> None:
+        """Store the finished attachment and mark the upload completed.
+
+        The upload keeps pointing at the attachment until it expires, so
+        a client that lost the final response can still learn its id.
+        """
+        pass
+
+    @abstractmethod
+    def delete_expired_uploads(
+        self, created_before: datetime, batch_size: int
+    ) -> list[str]:
+        """Delete up to `batch_size` uploads started before
+        `created_before`, finished or not, and return their ids.
+        """
+        pass
+
+    @abstractmethod
+    def get_attachment(self, attachment_id: str) -> AttachmentDTO | None:
+        pass
+
+    @abstractmethod
+    def is_shared_with(self, attachment_id: str, email: str) -> bool:
+        """Whether `email` sent or received a message carrying it."""
+        pass
+
+
+class UploadStagingInterface(ABC):
+    """Partially uploaded files, appended to chunk by chunk."""
+
+    @abstractmethod
+    def size(self, upload_id: str) -> int:
+        pass
+
+    @abstractmethod
+    def append(
+        self, upload_id: str, offset: int, stream: BinaryIO, max_bytes: int
+    ) -> int | None:
+        """Append `stream` at `offset` and return the new size.
+
+        Returns None without writing when the staged size is not `offset`
+        or another chunk is being appended, so concurrent requests for the
+        same offset cannot both land. Reads at most `max_bytes + 1` bytes
+        so callers can detect a chunk running past the declared file size.
+        """
+        pass
+
+    @abstractmethod
+    def truncate(self, upload_id: str, size: int) -> None:
+        pass
+
+    @abstractmethod
+    def sha256(self, upload_id: str) -> str:
+        pass
+
+    @abstractmethod
+    def path(self, upload_id: str) -> Path:
+        pass
+
+    @abstractmethod
+    def discard(self, upload_id: str) -> None:
+        pass
+
+
+class BlobStorageInterface(ABC):
+    """Content-addressed storage for finished attachments."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def store(self, key: str, source: Path) -> None:
+        """Take ownership of the local file at `source`."""
+        pass
+
+    @abstractmethod
+    def read_range(self, key: str, start: int, length: int) -> Iterator[bytes]:
+        pass
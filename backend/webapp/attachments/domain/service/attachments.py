@@ -0,0 +1,173 @@
+import uuid
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from typing import BinaryIO
+
+from backend.webapp.attachments.domain.dtos import (
+    AttachmentDTO,
+    ChunkResultDTO,
+    UploadInputDTO,
+    UploadSessionDTO,
+)
+from backend.webapp.attachments.domain.enums import ChunkStatus
+from backend.webapp.attachments.domain.ports import (
+    AttachmentRepoInterface,
+    BlobStorageInterface,
+    UploadStagingInterface,
+)
+
+
+class AttachmentService:
+    """Resumable uploads into content-addressed blob storage.
+
+    A client opens an upload with the final size, then sends chunks at the
+    current offset. After an interrupted chunk it asks for the offset and
+    continues from there. Finished files are stored under their SHA-256,
+    so identical uploads share one blob. Uploads, finished or abandoned,
+    are forgotten by `expire_uploads` once they are `upload_ttl` old.
+    """
+
+    def __init__(
+        self,
+        repository: AttachmentRepoInterface,
+        staging: UploadStagingInterface,
+        storage: BlobStorageInterface,
+        max_size: int,
+        upload_ttl: timedelta = timedelta(days=1),
+    ) -> None:
+        self._logger = getLogger(__name__)
+        self._repo = repository
+        self._staging = staging
+        self._storage = storage
+        self._max_size = max_size
+        self._upload_ttl = upload_ttl
+
+    def start_upload(
+        self, owner: str, input_dto: UploadInputDTO
+    ) -> UploadSessionDTO | None:
+        if input_dto.size > self._max_size:
+            return None
+
+        upload = UploadSessionDTO(
+            id=uuid.uuid4().hex,
+            owner=owner,
+            filename=input_dto.filename,
+            content_type=input_dto.content_type,
+            size=input_dto.size,
+        )
+        self._repo.create_upload(upload)
+        return upload
+
+    def get_upload(
+        self, owner: str, upload_id: str
+    ) -> UploadSessionDTO | None:
+        upload = self._repo.get_upload(upload_id)
+        if upload is None or upload.owner != owner:
+            return None
+        if upload.attachment_id:
+            return upload.model_copy(update={"offset": upload.size})
+        return upload.model_copy(
+            update={"offset": self._staging.size(upload_id)}
+        )
+
+    def append_chunk(
+        self, owner: str, upload_id: str, offset: int, stream: BinaryIO
+    ) -> ChunkResultDTO:
+        upload = self.get_upload(owner, upload_id)
+        if upload is None:
+            return ChunkResultDTO(status=ChunkStatus.not_found)
+
+        if upload.attachment_id:
+            # A retry of the final chunk whose response was lost.
+            return ChunkResultDTO(
+                status=ChunkStatus.completed,
+                offset=upload.size,
+                attachment=self._repo.get_attachment(upload.attachment_id),
+            )
+
+        if offset != upload.offset:
+            return ChunkResultDTO(
+                status=ChunkStatus.offset_mismatch, offset=upload.offset
+            )
+
+        new_size = self._staging.append(
+            upload_id, offset, stream, upload.size - upload.offset
+        )
+        if new_size is None:
+            # Another request appended at this offset first.
+            return ChunkResultDTO(
+                status=ChunkStatus.offset_mismatch,
+                offset=self._staging.size(upload_id),
+            )
+        if new_size == offset:
+            # Only a chunk that lands the last byte may complete the upload.
+            return ChunkResultDTO(status=ChunkStatus.empty, offset=offset)
+        if new_size > upload.size:
+            self._staging.truncate(upload_id, upload.offset)
+            return ChunkResultDTO(
+                status=ChunkStatus.too_large, offset=upload.offset
+            )
+
+        if new_size < upload.size:
+            return ChunkResultDTO(status=ChunkStatus.accepted, offset=new_size)
+
+        return ChunkResultDTO(
+            status=ChunkStatus.completed,
+            offset=new_size,
+            attachment=self._complete(upload),
+        )
+
+    def _complete(self, upload: UploadSessionDTO) -> AttachmentDTO:
+        sha256 = self._staging.sha256(upload.id)
+        if self._storage.exists(sha256):
+            self._logger.info("deduplicated upload %s", upload.id)
+            self._staging.discard(upload.id)
+        else:
+            self._storage.store(sha256, self._staging.path(upload.id))
+
+        attachment = AttachmentDTO(
+            id=uuid.uuid4().hex,
+            sha256=sha256,
+            owner=upload.owner,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            size=upload.size,
+        )
+        self._repo.complete_upload(upload.id, attachment)
+        return attachment
+
+    def expire_uploads(self, batch_size: int = 1000) -> int:
+        """Delete uploads older than the TTL and their staged files."""
+        cutoff = datetime.now(timezone.utc) - self._upload_ttl
+        expired = 0
+        while True:
+            upload_ids = self._repo.delete_expired_uploads(cutoff, batch_size)
+            for upload_id in upload_ids:
+                self._staging.discard(upload_id)
+            expired += len(upload_ids)
+            if len(upload_ids) < batch_size:
+                break
+        self._logger.info("Expired %s uploads", expired)
+        return expired
+
+    def get_attachment(
+        self, email: str, attachment_id: str
+    ) -> AttachmentDTO | None:
+        """The attachment, if `email` owns it or a message shared it.
+
+        Anyone else gets None, as if it did not exist.
+        """
+        attachment = self._repo.get_attachment(attachment_id)
+        if attachment is None:
+            return None
+        if attachment.owner != email and not self._repo.is_shared_with(
+            attachment_id, email
+        ):
+            return None
+        return attachment
+
+    def read(
+        self, attachment: AttachmentDTO, start: int, length: int
+    ) -> Iterator[bytes]:
+        return self._storage.read_range(attachment.sha256, start, length)
@@ -0,0 +1,263 @@
+import json
+import time
+from datetime import timedelta
+from typing import Any
+from urllib.parse import quote
+
+import click
+from flask import Blueprint, Response, jsonify, request
+from pydantic import ValidationError
+from werkzeug.datastructures import ContentRange
+
+from backend.webapp.attachments.domain.dtos import (
+    AttachmentDTO,
+    UploadInputDTO,
+)
+from backend.webapp.attachments.domain.enums import ChunkStatus
+from backend.webapp.attachments.domain.service.attachments import (
+    AttachmentService,
+)
+from backend.webapp.attachments.infrastructure.repository import (
+    AttachmentDatabaseRepository,
+)
+from backend.webapp.attachments.infrastructure.storage import (
+    build_blob_storage,
+    build_upload_staging,
+)
+from backend.webapp.auth.infrastructure.tokens import get_current_claims
+from backend.webapp.config import (
+    ATTACHMENT_CHUNK_SIZE,
+    ATTACHMENT_CLEANUP_INTERVAL,
+    ATTACHMENT_MAX_SIZE,
+    ATTACHMENT_UPLOAD_TTL,
+)
+from backend.webapp.database import db
+
+attachments_bp = Blueprint("attachments", __name__, url_prefix="/attachments")
+
+# Types the sender declares are only trusted for rendering in the browser
+# when they cannot carry script; anything else is served as a download.
+INLINE_CONTENT_TYPES = frozenset(
+    {
+        "image/png",
+        "image/jpeg",
+        "image/gif",
+        "image/webp",
+        "audio/mpeg",
+        "audio/ogg",
+        "audio/wav",
+        "video/mp4",
+        "video/webm",
+        "text/plain",
+    }
+)
+
+
+def _get_current_email() -> str | None:
+    payload = get_current_claims()
+    if not payload:
+        return None
+    email = payload.get("email")
+    if not isinstance(email, str) or not email:
+        return None
+    return email
+
+
+def _attachment_service() -> AttachmentService:
+    return AttachmentService(
+        AttachmentDatabaseRepository(db.session),
+        build_upload_staging(),
+        build_blob_storage(),
+        max_size=ATTACHMENT_MAX_SIZE,
+        upload_ttl=timedelta(seconds=ATTACHMENT_UPLOAD_TTL),
+    )
+
+
+def _attachment_json(attachment: AttachmentDTO) -> dict[str, Any]:
+    """The reference chat messages carry in their `attachment` field."""
+    return {
+        "id": attachment.id,
+        "filename": attachment.filename,
+        "content_type": attachment.content_type,
+        "size": attachment.size,
+        "sha256": attachment.sha256,
+    }
+
+
+def _filename_param(filename: str) -> dict[str, str]:
+    try:
+        filename.encode("ascii")
+    except UnicodeEncodeError:
+        return {"filename*": f"UTF-8''{quote(filename)}"}
+    return {"filename": filename}
+
+
+@attachments_bp.route("/uploads", methods=["POST"])
+def start_upload():
+    email = _get_current_email()
+    if not email:
+        return jsonify({"error": "unauthorized"}), 401
+
+    try:
+        input_dto = UploadInputDTO(**(request.get_json(silent=True) or {}))
+    except ValidationError:
+        return jsonify({"error": "invalid data"}), 400
+
+    upload = _attachment_service().start_upload(email, input_dto)
+    if upload is None:
+        return jsonify({"error": "file too large"}), 413
+
+    response = jsonify(
+        {
+            "upload_id": upload.id,
+            "offset": 0,
+            "size": upload.size,
+            "chunk_size": ATTACHMENT_CHUNK_SIZE,
+        }
+    )
+    response.headers["Location"] = (
+        f"{attachments_bp.url_prefix}/uploads/{upload.id}"
+    )
+    return response, 201
+
+
+@attachments_bp.route("/uploads/<upload_id>", methods=["GET"])
+def upload_status(upload_id: str):
+    """Current offset, to resume an interrupted upload"""
+    email = _get_current_email()
+    if not email:
+        return jsonify({"error": "unauthorized"}), 401
+
+    service = _attachment_service()
+    upload = service.get_upload(email, upload_id)
+    if upload is None:
+        return jsonify({"error": "not found"}), 404
+
+    body: dict[str, Any] = {
+        "upload_id": upload.id,
+        "offset": upload.offset,
+        "size": upload.size,
+    }
+    if upload.attachment_id:
+        attachment = service.get_attachment(email, upload.attachment_id)
+        if attachment is not None:
+            body["attachment"] = _attachment_json(attachment)
+    response = jsonify(body)
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return response, 200
+
+
+@attachments_bp.route("/uploads/<upload_id>", methods=["PATCH"])
+def upload_chunk(upload_id: str):
+    """Append the raw request body at the `Upload-Offset` header"""
+    email = _get_current_email()
+    if not email:
+        return jsonify({"error": "unauthorized"}), 401
+
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "missing Upload-Offset"}), 400
+
+    result = _attachment_service().append_chunk(
+        email, upload_id, offset, request.stream
+    )
+
+    if result.status == ChunkStatus.not_found:
+        return jsonify({"error": "not found"}), 404
+
+    body: dict[str, Any] = {"offset": result.offset}
+    status = 200
+    if result.status == ChunkStatus.offset_mismatch:
+        body["error"] = "offset mismatch"
+        status = 409
+    elif result.status == ChunkStatus.empty:
+        body["error"] = "empty chunk"
+        status = 400
+    elif result.status == ChunkStatus.too_large:
+        body["error"] = "chunk exceeds declared size"
+        status = 413
+    elif result.status == ChunkStatus.completed:
+        body["attachment"] = _attachment_json(result.attachment)
+        status = 201
+
+    response = jsonify(body)
+    response.headers["Upload-Offset"] = str(result.offset)
+    return response, status
+
+
+@attachments_bp.route("/<attachment_id>/info", methods=["GET"])
+def attachment_info(attachment_id: str):
+    """The stored reference; chat messages only carry the id"""
+    email = _get_current_email()
+    if not email:
+        return jsonify({"error": "unauthorized"}), 401
+
+    attachment = _attachment_service().get_attachment(email, attachment_id)
+    if attachment is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(_attachment_json(attachment)), 200
+
+
+@attachments_bp.route("/<attachment_id>", methods=["GET"])
+def download(attachment_id: str):
+    """Stream an attachment, honouring single `Range` requests"""
+    email = _get_current_email()
+    if not email:
+        return jsonify({"error": "unauthorized"}), 401
+
+    service = _attachment_service()
+    attachment = service.get_attachment(email, attachment_id)
+    if attachment is None:
+        return jsonify({"error": "not found"}), 404
+
+    etag = attachment.sha256
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+
+    start, stop, status = 0, attachment.size, 200
+    if request.range is not None:
+        bounds = request.range.range_for_length(attachment.size)
+        if bounds is None:
+            response = Response(status=416)
+            response.content_range = ContentRange(
+                "bytes", None, None, attachment.size
+            )
+            return response
+        start, stop = bounds
+        status = 206
+
+    content_type = attachment.content_type.lower()
+    inline = content_type in INLINE_CONTENT_TYPES
+    response = Response(
+        service.read(attachment, start, stop - start),
+        status=status,
+        mimetype=content_type if inline else "application/octet-stream",
+    )
+    response.content_length = stop - start
+    if status == 206:
+        response.content_range = ContentRange(
+            "bytes", start, stop, attachment.size
+        )
+    response.accept_ranges = "bytes"
+    response.set_etag(etag)
+    response.headers.set(
+        "Content-Disposition",
+        "inline" if inline else "attachment",
+        **_filename_param(attachment.filename),
+    )
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
+
+
+@attachments_bp.cli.command("cleanup")
+@click.option("--once", is_flag=True, help="Run a single pass and exit.")
+def cleanup_uploads_command(once: bool) -> None:
+    """Delete expired uploads, finished or abandoned, and their parts."""
+    service = _attachment_service()
+    while True:
+        click.echo(json.dumps({"expired": service.expire_uploads()}))
+        if once:
+            break
+        time.sleep(ATTACHMENT_CLEANUP_INTERVAL)
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import delete, exists, or_, select, update
+
+from backend.webapp.attachments.domain.dtos import (
+    AttachmentDTO,
+    UploadSessionDTO,
+)
+from backend.webapp.attachments.domain.ports import AttachmentRepoInterface
+from backend.webapp.attachments.infrastructure.models import (
+    Attachment,
+    AttachmentUpload,
+)
+from backend.webapp.chat.models import Message
+
+
+class AttachmentDatabaseRepository(AttachmentRepoInterface):
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    def create_upload(self, upload: UploadSessionDTO) -> None:
+        self._session.add(
+            AttachmentUpload(
+                id=upload.id,
+                owner=upload.owner,
+                filename=upload.filename,
+                content_type=upload.content_type,
+                size=upload.size,
+            )
+        )
+        self._session.commit()
+
+    def get_upload(self, upload_id: str) -> UploadSessionDTO | None:
+        upload = self._session.execute(
+            select(AttachmentUpload).where(AttachmentUpload.id == upload_id)
+        ).scalar_one_or_none()
+        if upload is None:
+            return None
+        return UploadSessionDTO(
+            id=upload.id,
+            owner=upload.owner,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            size=upload.size,
+            attachment_id=upload.attachment_id,
+        )
+
+    def complete_upload(
+        self, upload_id: str, attachment: AttachmentDTO
+    ) -> None:
+        self._session.add(Attachment(**attachment.model_dump()))
+        self._session.execute(
+            update(AttachmentUpload)
+            .where(AttachmentUpload.id == upload_id)
+            .values(attachment_id=attachment.id)
+        )
+        self._session.commit()
+
+    def delete_expired_uploads(
+        self, created_before: datetime, batch_size: int
+    ) -> list[str]:
+        upload_ids = list(
+            self._session.execute(
+                select(AttachmentUpload.id)
+                .where(AttachmentUpload.created_at < created_before)
+                .order_by(AttachmentUpload.created_at)
+                .limit(batch_size)
+            ).scalars()
+        )
+        if upload_ids:
+            self._session.execute(
+                delete(AttachmentUpload).where(
+                    AttachmentUpload.id.in_(upload_ids)
+                )
+            )
+        self._session.commit()
+        return upload_ids
+
+    def get_attachment(self, attachment_id: str) -> AttachmentDTO | None:
+        attachment = self._session.execute(
+            select(Attachment).where(Attachment.id == attachment_id)
+        ).scalar_one_or_none()
+        if attachment is None:
+            return None
+        return AttachmentDTO(
+            id=attachment.id,
+            sha256=attachment.sha256,
+            owner=attachment.owner,
+            filename=attachment.filename,
+            content_type=attachment.content_type,
+            size=attachment.size,
+        )
+
+    def is_shared_with(self, attachment_id: str, email: str) -> bool:
+        return bool(
+            self._session.execute(
+                select(
+                    exists().where(
+                        Message.attachment_id == attachment_id,
+                        or_(
+                            Message.sender == email, Message.recipient == email
+                        ),
+                    )
+                )
+            ).scalar()
+        )
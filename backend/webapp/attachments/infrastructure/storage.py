@@ -0,0 +1,130 @@
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+from backend.webapp.attachments.domain.ports import (
+    BlobStorageInterface,
+    UploadStagingInterface,
+)
+from backend.webapp.config import (
+    ATTACHMENT_STORAGE,
+    ATTACHMENT_STORAGE_PATH,
+    ATTACHMENT_UPLOAD_PATH,
+)
+
+IO_CHUNK_SIZE = 64 * 1024
+
+_KEY_PATTERN = re.compile(r"[0-9a-f]{32,64}")
+
+
+def _checked(key: str) -> str:
+    # Keys become file names; never let one escape the root directory.
+    if not _KEY_PATTERN.fullmatch(key):
+        raise ValueError("invalid key")
+    return key
+
+
+class LocalUploadStaging(UploadStagingInterface):
+    def __init__(self, root: str | Path) -> None:
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, upload_id: str) -> Path:
+        return self._root / f"{_checked(upload_id)}.part"
+
+    def size(self, upload_id: str) -> int:
+        try:
+            return self.path(upload_id).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def append(
+        self, upload_id: str, offset: int, stream: BinaryIO, max_bytes: int
+    ) -> int | None:
+        remaining = max_bytes + 1
+        with self.path(upload_id).open("ab") as target:
+            # Held until the file is closed; a concurrent append gives up
+            # instead of waiting, since its offset is stale either way.
+            try:
+                fcntl.flock(target, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            if target.seek(0, os.SEEK_END) != offset:
+                return None
+            while remaining > 0:
+                chunk = stream.read(min(IO_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                target.write(chunk)
+                remaining -= len(chunk)
+            return target.tell()
+
+    def truncate(self, upload_id: str, size: int) -> None:
+        with self.path(upload_id).open("r+b") as target:
+            target.truncate(size)
+
+    def sha256(self, upload_id: str) -> str:
+        digest = hashlib.sha256()
+        with self.path(upload_id).open("rb") as source:
+            while chunk := source.read(IO_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def discard(self, upload_id: str) -> None:
+        self.path(upload_id).unlink(missing_ok=True)
+
+
+class LocalBlobStorage(BlobStorageInterface):
+    """Blobs as files under `root/<key[:2]>/<key>`."""
+
+    def __init__(self, root: str | Path) -> None:
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        key = _checked(key)
+        return self._root / key[:2] / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def store(self, key: str, source: Path) -> None:
+        target = self._path(key)
+        target.parent.mkdir(exist_ok=True)
+        # Move next to the target first so the final rename is atomic even
+        # when the staging area lives on another filesystem. The name is
+        # unique so identical uploads finishing together do not collide.
+        fd, partial = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.move(source, partial)
+            os.replace(partial, target)
+        except BaseException:
+            Path(partial).unlink(missing_ok=True)
+            raise
+
+    def read_range(self, key: str, start: int, length: int) -> Iterator[bytes]:
+        with self._path(key).open("rb") as source:
+            source.seek(start)
+            while length > 0:
+                chunk = source.read(min(IO_CHUNK_SIZE, length))
+                if not chunk:
+                    return
+                length -= len(chunk)
+                yield chunk
+
+
+def build_blob_storage() -> BlobStorageInterface:
+    if ATTACHMENT_STORAGE == "local":
+        return LocalBlobStorage(ATTACHMENT_STORAGE_PATH)
+    raise ValueError(f"unknown attachment storage: {ATTACHMENT_STORAGE}")
+
+
+def build_upload_staging() -> UploadStagingInterface:
+    return LocalUploadStaging(ATTACHMENT_UPLOAD_PATH)
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from datetime import datetime
+
+from pydantic import BaseModel, computed_field
 
 from backend.webapp.auth.domain.enums import (
     LoginStatus,
@@ -39,6 +41,46 @@ class UserConfirmationInput(BaseModel):
     token: str
 
 
+class ConfirmationTokenDTO(BaseModel):
+    token: str
+    created_at: datetime
+
+
 class UserConfirmationOutput(BaseModel):
     success: bool
     reason: str | None = None
+
+
+class BulkUserInputDTO(BaseModel):
+    email: str
+    password: str
+    role: Role = Role.user
+
+
+class BulkUserRowDTO(BaseModel):
+    email: str
+    password_hash: str
+    role: Role
+    token: str
+
+
+class ProvisioningReportDTO(BaseModel):
+    created: int = 0
+    skipped_existing: int = 0
+    invalid: int = 0
+    mail_failed: int = 0
+    elapsed_seconds: float = 0.0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def users_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return round(self.created / self.elapsed_seconds, 2)
+
+
+class CleanupReportDTO(BaseModel):
+    expired_tokens: int = 0
+    unconfirmed_users: int = 0
+    batches: int = 0
+    elapsed_seconds: float = 0.0
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
 
-from backend.webapp.auth.domain.dtos import RegisteredUserDTO
+from backend.webapp.auth.domain.dtos import (
+    BulkUserRowDTO,
+    ConfirmationTokenDTO,
+    RegisteredUserDTO,
+)
 
 
 class UsersRepoInterface(ABC):
@@ -21,7 +26,7 @@ class ConfirmationRepoInterface(ABC):
         pass
 
     @abstractmethod
-    def get_token_for_user(self, email: str) -> str | None:
+    def get_token_for_user(self, email: str) -> ConfirmationTokenDTO | None:
         pass
 
     @abstractmethod
@@ -33,7 +38,83 @@ class ConfirmationRepoInterface(ABC):
         pass
 
 
+class AsyncUsersRepoInterface(ABC):
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> RegisteredUserDTO | None:
+        pass
+
+    @abstractmethod
+    async def create_user(
+        self, email: str, password_hash: str, role: str, is_active: bool
+    ) -> RegisteredUserDTO:
+        pass
+
+
+class AsyncConfirmationRepoInterface(ABC):
+    @abstractmethod
+    async def store_token_for_user(self, email: str, token: str) -> None:
+        pass
+
+    @abstractmethod
+    async def get_token_for_user(
+        self, email: str
+    ) -> ConfirmationTokenDTO | None:
+        pass
+
+    @abstractmethod
+    async def activate_user(self, email: str) -> None:
+        pass
+
+    @abstractmethod
+    async def remove_confirmation_token(self, email: str) -> None:
+        pass
+
+
+class BulkUsersRepoInterface(ABC):
+    @abstractmethod
+    def find_existing_emails(self, emails: list[str]) -> set[str]:
+        pass
+
+    @abstractmethod
+    def bulk_create_users(self, rows: list[BulkUserRowDTO]) -> list[str]:
+        """Insert inactive users with their confirmation tokens.
+
+        Emails taken since `find_existing_emails` are skipped; returns the
+        emails actually created.
+        """
+        pass
+
+
+class ConfirmationCleanupRepoInterface(ABC):
+    @abstractmethod
+    def delete_expired_batch(
+        self, created_before: datetime, batch_size: int
+    ) -> tuple[int, int]:
+        """Delete one batch of expired tokens and their inactive users.
+
+        Takes up to `batch_size` of the oldest tokens created before
+        `created_before`, in one transaction. Returns the number of
+        (tokens, users) deleted.
+        """
+        pass
+
+
 class UserConfirmationDeliveryInterface(ABC):
     @abstractmethod
     def send_confirmation(self, email: str, token: str) -> None:
         pass
+
+    def send_confirmations(self, items: list[tuple[str, str]]) -> None:
+        for email, token in items:
+            self.send_confirmation(email, token)
+
+
+class RateLimiterInterface(ABC):
+    @abstractmethod
+    def consume(self, key: str) -> float:
+        """Take one token for `key`.
+
+        Returns 0 when the attempt is allowed, otherwise the number of
+        seconds until the next attempt would be allowed.
+        """
+        pass
@@ -0,0 +1,58 @@
+import time
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+
+from backend.webapp.auth.domain.dtos import CleanupReportDTO
+from backend.webapp.auth.domain.ports import ConfirmationCleanupRepoInterface
+
+
+class ConfirmationCleanupService:
+    """Delete expired confirmation tokens and users who never confirmed.
+
+    Works through the backlog in batches of `batch_size`, each its own
+    short transaction, so no lock is held for long and registrations keep
+    going meanwhile; `pause` seconds are slept between batches. The cutoff
+    is fixed when a pass starts, so a pass always ends.
+    """
+
+    def __init__(
+        self,
+        repository: ConfirmationCleanupRepoInterface,
+        token_ttl: timedelta,
+        batch_size: int = 1000,
+        pause: float = 0.0,
+    ) -> None:
+        self._repo = repository
+        self._token_ttl = token_ttl
+        self._batch_size = max(batch_size, 1)
+        self._pause = pause
+        self._logger = getLogger(__name__)
+
+    def run(self) -> CleanupReportDTO:
+        report = CleanupReportDTO()
+        started = time.perf_counter()
+        cutoff = datetime.now(timezone.utc) - self._token_ttl
+
+        while True:
+            tokens, users = self._repo.delete_expired_batch(
+                cutoff, self._batch_size
+            )
+            if not tokens:
+                break
+            report.batches += 1
+            report.expired_tokens += tokens
+            report.unconfirmed_users += users
+            if tokens < self._batch_size:
+                break
+            if self._pause:
+                time.sleep(self._pause)
+
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        self._logger.info(
+            "Deleted %s expired confirmation tokens and %s unconfirmed "
+            "users in %s batches",
+            report.expired_tokens,
+            report.unconfirmed_users,
+            report.batches,
+        )
+        return report
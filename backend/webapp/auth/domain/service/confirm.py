@@ -1,25 +1,55 @@
+import asyncio
 import uuid
+from datetime import datetime, timedelta, timezone
 from logging import getLogger
 
 from backend.webapp.auth.domain.dtos import (
+    ConfirmationTokenDTO,
     UserConfirmationInput,
     UserConfirmationOutput,
 )
 from backend.webapp.auth.domain.ports import (
+    AsyncConfirmationRepoInterface,
     ConfirmationRepoInterface,
     UserConfirmationDeliveryInterface,
 )
 
 
+def _check_token(
+    stored: ConfirmationTokenDTO | None,
+    token: str,
+    token_ttl: timedelta | None,
+) -> UserConfirmationOutput | None:
+    """The failure for a presented token, or None when it is valid."""
+    if stored is None:
+        return UserConfirmationOutput(
+            success=False, reason="confirmation not found"
+        )
+
+    if stored.token != token:
+        return UserConfirmationOutput(success=False, reason="invalid token")
+
+    if (
+        token_ttl is not None
+        and datetime.now(timezone.utc) - stored.created_at > token_ttl
+    ):
+        return UserConfirmationOutput(success=False, reason="token expired")
+
+    return None
+
+
 class UserConfirmationService:
     def __init__(
         self,
         delivery_service: UserConfirmationDeliveryInterface,
         repository: ConfirmationRepoInterface,
+        token_ttl: timedelta | None = None,
     ) -> None:
         self._logger = getLogger(__name__)
         self._delivery = delivery_service
         self._repo = repository
+        # None: tokens never expire.
+        self._token_ttl = token_ttl
 
     def send_confirmation(self, email: str) -> None:
         token = str(uuid.uuid4())
@@ -31,15 +61,9 @@ class UserConfirmationService:
     ) -> UserConfirmationOutput:
         stored_token = self._repo.get_token_for_user(email=input_dto.email)
 
-        if stored_token is None:
-            return UserConfirmationOutput(
-                success=False, reason="confirmation not found"
-            )
-
-        if stored_token != input_dto.token:
-            return UserConfirmationOutput(
-                success=False, reason="invalid token"
-            )
+        failure = _check_token(stored_token, input_dto.token, self._token_ttl)
+        if failure is not None:
+            return failure
 
         try:
             self._repo.activate_user(email=input_dto.email)
@@ -55,3 +79,43 @@ class UserConfirmationService:
         self._logger.warning("token removed")
 
         return UserConfirmationOutput(success=True)
+
+
+class AsyncUserConfirmationService:
+    def __init__(
+        self,
+        delivery_service: UserConfirmationDeliveryInterface,
+        repository: AsyncConfirmationRepoInterface,
+        token_ttl: timedelta | None = None,
+    ) -> None:
+        self._logger = getLogger(__name__)
+        self._delivery = delivery_service
+        self._repo = repository
+        self._token_ttl = token_ttl
+
+    async def send_confirmation(self, email: str) -> None:
+        token = str(uuid.uuid4())
+        await self._repo.store_token_for_user(email, token)
+        await asyncio.to_thread(self._delivery.send_confirmation, email, token)
+
+    async def confirm(
+        self, input_dto: UserConfirmationInput
+    ) -> UserConfirmationOutput:
+        stored_token = await self._repo.get_token_for_user(
+            email=input_dto.email
+        )
+
+        failure = _check_token(stored_token, input_dto.token, self._token_ttl)
+        if failure is not None:
+            return failure
+
+        try:
+            await self._repo.activate_user(email=input_dto.email)
+        except ValueError:
+            return UserConfirmationOutput(
+                success=False, reason="user not found"
+            )
+
+        await self._repo.remove_confirmation_token(email=input_dto.email)
+
+        return UserConfirmationOutput(success=True)
@@ -1,3 +1,5 @@
+import asyncio
+
 from argon2 import PasswordHasher
 from argon2 import exceptions as argon2_exceptions
 
@@ -7,7 +9,10 @@ from backend.webapp.auth.domain.dtos import (
     UserLoginInputDTO,
 )
 from backend.webapp.auth.domain.enums import LoginStatus
-from backend.webapp.auth.domain.ports import UsersRepoInterface
+from backend.webapp.auth.domain.ports import (
+    AsyncUsersRepoInterface,
+    UsersRepoInterface,
+)
 
 
 class LoginService:
@@ -30,3 +35,29 @@ class LoginService:
 
         auth_user = AuthenticatedUserDTO(email=user.email, role=user.role)
         return LoginResultDTO(status=LoginStatus.successful, user=auth_user)
+
+
+class AsyncLoginService:
+    """Async login; Argon2 verification runs in a worker thread."""
+
+    def __init__(self, users_repo: AsyncUsersRepoInterface) -> None:
+        self._users_repo = users_repo
+
+    async def login(self, login_data: UserLoginInputDTO) -> LoginResultDTO:
+        user = await self._users_repo.get_user_by_email(login_data.email)
+        if not user:
+            return LoginResultDTO(status=LoginStatus.unauthorized)
+
+        hasher = PasswordHasher()
+        try:
+            await asyncio.to_thread(
+                hasher.verify, user.password_hash, login_data.password
+            )
+        except argon2_exceptions.VerifyMismatchError:
+            return LoginResultDTO(status=LoginStatus.unauthorized)
+
+        if not user.is_active:
+            return LoginResultDTO(status=LoginStatus.email_unverified)
+
+        auth_user = AuthenticatedUserDTO(email=user.email, role=user.role)
+        return LoginResultDTO(status=LoginStatus.successful, user=auth_user)
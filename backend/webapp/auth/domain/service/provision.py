@@ -0,0 +1,139 @@
+import time
+import uuid
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from logging import getLogger
+from typing import Any
+
+from argon2 import PasswordHasher
+from pydantic import ValidationError
+
+from backend.webapp.auth.domain.dtos import (
+    BulkUserInputDTO,
+    BulkUserRowDTO,
+    ProvisioningReportDTO,
+)
+from backend.webapp.auth.domain.ports import (
+    BulkUsersRepoInterface,
+    UserConfirmationDeliveryInterface,
+)
+from backend.webapp.auth.domain.service.register import RegistrationService
+
+
+def _hash_password(password: str) -> str:
+    return PasswordHasher().hash(password)
+
+
+def _chunks(
+    records: Iterable[dict[str, Any]], size: int
+) -> Iterator[list[dict[str, Any]]]:
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class BulkProvisioningService:
+    """Create many inactive users at once.
+
+    Input is consumed chunk by chunk, so arbitrarily large files stream
+    through with bounded memory. Per chunk: one set-based lookup of
+    existing emails, Argon2 hashing spread over a process pool, one bulk
+    insert of users and tokens, and one batched mail send.
+    """
+
+    def __init__(
+        self,
+        users_repo: BulkUsersRepoInterface,
+        delivery_service: UserConfirmationDeliveryInterface,
+        chunk_size: int = 1000,
+        hash_workers: int | None = None,
+    ) -> None:
+        self._users_repo = users_repo
+        self._delivery = delivery_service
+        self._chunk_size = max(chunk_size, 1)
+        # 0 hashes in-process; None sizes the pool from the CPU count.
+        self._hash_workers = hash_workers
+        self._logger = getLogger(__name__)
+
+    def provision(
+        self, records: Iterable[dict[str, Any]]
+    ) -> ProvisioningReportDTO:
+        report = ProvisioningReportDTO()
+        started = time.perf_counter()
+
+        if self._hash_workers == 0:
+            for chunk in _chunks(records, self._chunk_size):
+                self._provision_chunk(chunk, report, executor=None)
+        else:
+            with ProcessPoolExecutor(self._hash_workers) as executor:
+                for chunk in _chunks(records, self._chunk_size):
+                    self._provision_chunk(chunk, report, executor)
+
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        self._logger.info(
+            "Provisioned %s users (%s existing, %s invalid) at %s users/s",
+            report.created,
+            report.skipped_existing,
+            report.invalid,
+            report.users_per_second,
+        )
+        return report
+
+    def _provision_chunk(
+        self,
+        chunk: list[dict[str, Any]],
+        report: ProvisioningReportDTO,
+        executor: Executor | None,
+    ) -> None:
+        users: dict[str, BulkUserInputDTO] = {}
+        for record in chunk:
+            try:
+                user = BulkUserInputDTO(**record)
+            except (TypeError, ValidationError):
+                report.invalid += 1
+                continue
+            user.email = user.email.strip()
+            if not RegistrationService.is_valid_email(user.email):
+                report.invalid += 1
+                continue
+            if user.email in users:
+                report.skipped_existing += 1
+                continue
+            users[user.email] = user
+
+        existing = self._users_repo.find_existing_emails(list(users))
+        report.skipped_existing += len(existing)
+        new_users = [u for email, u in users.items() if email not in existing]
+        if not new_users:
+            return
+
+        passwords = [user.password for user in new_users]
+        if executor is None:
+            hashes = list(map(_hash_password, passwords))
+        else:
+            hashes = list(executor.map(_hash_password, passwords))
+
+        rows = [
+            BulkUserRowDTO(
+                email=user.email,
+                password_hash=password_hash,
+                role=user.role,
+                token=str(uuid.uuid4()),
+            )
+            for user, password_hash in zip(new_users, hashes)
+        ]
+        created = set(self._users_repo.bulk_create_users(rows))
+        report.skipped_existing += len(rows) - len(created)
+        rows = [row for row in rows if row.email in created]
+        report.created += len(rows)
+        if not rows:
+            return
+
+        try:
+            self._delivery.send_confirmations(
+                [(row.email, row.token) for row in rows]
+            )
+        except Exception:
+            self._logger.exception("Failed to send confirmation batch")
+            report.mail_failed += len(rows)
@@ -1,3 +1,4 @@
+import asyncio
 import re
 from logging import getLogger
 
@@ -6,11 +7,14 @@ from argon2 import PasswordHasher
 from backend.webapp.auth.domain.dtos import RegistrationResultDto
 from backend.webapp.auth.domain.enums import RegistrationStatus
 from backend.webapp.auth.domain.ports import (
+    AsyncConfirmationRepoInterface,
+    AsyncUsersRepoInterface,
     ConfirmationRepoInterface,
     UserConfirmationDeliveryInterface,
     UsersRepoInterface,
 )
 from backend.webapp.auth.domain.service.confirm import (
+    AsyncUserConfirmationService,
     UserConfirmationService,
 )
 
@@ -60,3 +64,54 @@ class RegistrationService:
         self._confirmation_service.send_confirmation(email=email)
 
         return RegistrationResultDto(status=RegistrationStatus.success)
+
+
+class AsyncRegistrationService:
+    """Async registration.
+
+    The Argon2 hash runs in a worker thread so the event loop stays free,
+    and only once the email is known to be new: a registration for an
+    existing email costs one lookup, not a hash.
+    """
+
+    def __init__(
+        self,
+        users_repo: AsyncUsersRepoInterface,
+        delivery_service: UserConfirmationDeliveryInterface,
+        confirmation_repository: AsyncConfirmationRepoInterface,
+    ) -> None:
+        self._users_repo = users_repo
+        self._confirmation_service = AsyncUserConfirmationService(
+            delivery_service=delivery_service,
+            repository=confirmation_repository,
+        )
+        self._logger = getLogger(__name__)
+
+    async def register(
+        self, email: str, password: str
+    ) -> RegistrationResultDto:
+        if not RegistrationService.is_valid_email(email):
+            return RegistrationResultDto(
+                status=RegistrationStatus.failure, reason="invalid email"
+            )
+
+        if await self._users_repo.get_user_by_email(email):
+            return RegistrationResultDto(
+                status=RegistrationStatus.failure,
+                reason="user with this email already exists",
+            )
+
+        hasher = PasswordHasher()
+        password_hash = await asyncio.to_thread(hasher.hash, password)
+
+        await self._users_repo.create_user(
+            email=email,
+            password_hash=password_hash,
+            role="user",
+            is_active=False,
+        )
+
+        self._logger.info(f"User={email} created. Sending confirmation mail")
+        await self._confirmation_service.send_confirmation(email=email)
+
+        return RegistrationResultDto(status=RegistrationStatus.success)
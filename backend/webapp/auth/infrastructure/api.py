@@ -1,5 +1,11 @@
+import io
+import json
+import math
+import time
+from datetime import timedelta
 from typing import Any
 
+import click
 import jwt
 from flask import Blueprint, Response, jsonify, request
 from pydantic import ValidationError
@@ -8,32 +14,112 @@ from backend.webapp.auth.domain.dtos import (
     UserConfirmationInput,
     UserLoginInputDTO,
 )
-from backend.webapp.auth.domain.enums import LoginStatus, RegistrationStatus
-from backend.webapp.auth.domain.service.confirm import UserConfirmationService
-from backend.webapp.auth.domain.service.login import LoginService
-from backend.webapp.auth.domain.service.register import RegistrationService
+from backend.webapp.auth.domain.enums import (
+    LoginStatus,
+    RegistrationStatus,
+    Role,
+)
+from backend.webapp.auth.domain.service.cleanup import (
+    ConfirmationCleanupService,
+)
+from backend.webapp.auth.domain.service.confirm import (
+    AsyncUserConfirmationService,
+    UserConfirmationService,
+)
+from backend.webapp.auth.domain.service.login import (
+    AsyncLoginService,
+    LoginService,
+)
+from backend.webapp.auth.domain.service.provision import (
+    BulkProvisioningService,
+)
+from backend.webapp.auth.domain.service.register import (
+    AsyncRegistrationService,
+    RegistrationService,
+)
 from backend.webapp.auth.infrastructure.external import (
     UserConfirmationMailDelivery,
 )
+from backend.webapp.auth.infrastructure.provisioning import (
+    FORMATS,
+    detect_format,
+    iter_records,
+)
+from backend.webapp.auth.infrastructure.rate_limit import (
+    check_rate_limits,
+    rate_limits,
+)
 from backend.webapp.auth.infrastructure.repository import (
+    AsyncConfirmationDatabaseRepository,
+    AsyncUsersDatabaseRepository,
+    BulkUsersDatabaseRepository,
+    ConfirmationCleanupDatabaseRepository,
     ConfirmationDatabaseRepository,
     UsersDatabaseRepository,
 )
-from backend.webapp.config import JWT_SECRET
-from backend.webapp.database import db
+from backend.webapp.auth.infrastructure.tokens import get_current_claims
+from backend.webapp.config import (
+    ASYNC_DB_ENABLED,
+    CONFIRMATION_CLEANUP_BATCH_SIZE,
+    CONFIRMATION_CLEANUP_INTERVAL,
+    CONFIRMATION_CLEANUP_PAUSE,
+    CONFIRMATION_TOKEN_TTL,
+    JWT_SECRET,
+    PROVISION_CHUNK_SIZE,
+    PROVISION_HASH_WORKERS,
+)
+from backend.webapp.database import async_session, db, run_async
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
+_TOKEN_TTL = timedelta(seconds=CONFIRMATION_TOKEN_TTL)
+
+
+def _email_key(email: Any) -> str | None:
+    if not isinstance(email, str):
+        return None
+    return email.strip().lower()[:254] or None
+
+
+def _too_many_requests(retry_after: float):
+    response = jsonify({"error": "too many requests"})
+    response.headers["Retry-After"] = str(max(math.ceil(retry_after), 1))
+    return response, 429
+
+
+async def _login_async(login_dto: UserLoginInputDTO):
+    async with async_session() as session:
+        return await AsyncLoginService(
+            AsyncUsersDatabaseRepository(session)
+        ).login(login_dto)
+
 
 @auth_bp.route("/login", methods=["POST"])
 def login():
+    # Limits are checked before any database lookup or Argon2 work.
+    limits = rate_limits()
+    retry_after = check_rate_limits((limits.login_ip, request.remote_addr))
+    if retry_after:
+        return _too_many_requests(retry_after)
+
     data = request.get_json()
     try:
         login_dto = UserLoginInputDTO(**data)
     except ValidationError:
         return Response(status=400)
 
-    result = LoginService(UsersDatabaseRepository(db.session)).login(login_dto)
+    retry_after = check_rate_limits(
+        (limits.login_email, _email_key(login_dto.email))
+    )
+    if retry_after:
+        return _too_many_requests(retry_after)
+
+    if ASYNC_DB_ENABLED:
+        result = run_async(_login_async(login_dto))
+    else:
+        result = LoginService(UsersDatabaseRepository(db.session)).login(
+            login_dto
+        )
     if result.status != LoginStatus.successful:
         return jsonify({"error": "Unauthorized"}), 401
 
@@ -46,6 +132,15 @@ def login():
     return jsonify({"access_token": token})
 
 
+async def _register_async(email: str, password: str):
+    async with async_session() as session:
+        return await AsyncRegistrationService(
+            AsyncUsersDatabaseRepository(session),
+            UserConfirmationMailDelivery(),
+            AsyncConfirmationDatabaseRepository(session),
+        ).register(email, password)
+
+
 @auth_bp.route("/register", methods=["POST"])
 def register():
     data: dict[str, Any] = request.get_json()  # type: ignore
@@ -55,11 +150,22 @@ def register():
     except KeyError:
         return jsonify({"error": "invalid credentials"}), 400
 
-    result = RegistrationService(
-        UsersDatabaseRepository(db.session),
-        UserConfirmationMailDelivery(),
-        ConfirmationDatabaseRepository(db.session),
-    ).register(email, password)
+    limits = rate_limits()
+    retry_after = check_rate_limits(
+        (limits.register_ip, request.remote_addr),
+        (limits.register_email, _email_key(email)),
+    )
+    if retry_after:
+        return _too_many_requests(retry_after)
+
+    if ASYNC_DB_ENABLED:
+        result = run_async(_register_async(email, password))
+    else:
+        result = RegistrationService(
+            UsersDatabaseRepository(db.session),
+            UserConfirmationMailDelivery(),
+            ConfirmationDatabaseRepository(db.session),
+        ).register(email, password)
 
     if result.status == RegistrationStatus.failure:
         return jsonify({"error": result.reason}), 400
@@ -67,6 +173,15 @@ def register():
         return jsonify({"message": "success, confirmation link sent"}), 201
 
 
+async def _confirm_async(input_dto: UserConfirmationInput):
+    async with async_session() as session:
+        return await AsyncUserConfirmationService(
+            delivery_service=UserConfirmationMailDelivery(),
+            repository=AsyncConfirmationDatabaseRepository(session),
+            token_ttl=_TOKEN_TTL,
+        ).confirm(input_dto=input_dto)
+
+
 @auth_bp.route("/confirm", methods=["POST"])
 def confirm():
     """Confirm user creation using a token"""
@@ -77,12 +192,72 @@ def confirm():
     except KeyError:
         return jsonify({"error": "invalid data"}), 400
 
-    result = UserConfirmationService(
-        delivery_service=UserConfirmationMailDelivery(),
-        repository=ConfirmationDatabaseRepository(db.session),
-    ).confirm(input_dto=UserConfirmationInput(email=email, token=token))
+    input_dto = UserConfirmationInput(email=email, token=token)
+    if ASYNC_DB_ENABLED:
+        result = run_async(_confirm_async(input_dto))
+    else:
+        result = UserConfirmationService(
+            delivery_service=UserConfirmationMailDelivery(),
+            repository=ConfirmationDatabaseRepository(db.session),
+            token_ttl=_TOKEN_TTL,
+        ).confirm(input_dto=input_dto)
 
     if result.success:
         return jsonify({"message": "success"}), 200
     else:
         return jsonify({"message": "failure", "reason": result.reason}), 400
+
+
+def _provisioning_service() -> BulkProvisioningService:
+    return BulkProvisioningService(
+        BulkUsersDatabaseRepository(db.session),
+        UserConfirmationMailDelivery(),
+        chunk_size=PROVISION_CHUNK_SIZE,
+        hash_workers=PROVISION_HASH_WORKERS,
+    )
+
+
+@auth_bp.route("/admin/provision", methods=["POST"])
+def provision_users():
+    """Bulk-create users from a streamed CSV or NDJSON request body"""
+    claims = get_current_claims()
+    if not claims or claims.get("role") != Role.admin:
+        return jsonify({"error": "forbidden"}), 403
+
+    fmt = request.args.get("format") or detect_format(request.mimetype)
+    if fmt not in FORMATS:
+        return jsonify({"error": "unsupported format"}), 400
+
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8")
+    report = _provisioning_service().provision(iter_records(stream, fmt))
+    return jsonify(report.model_dump()), 200
+
+
+@auth_bp.cli.command("provision")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default=None)
+def provision_users_command(path: str, fmt: str | None) -> None:
+    """Bulk-create users from a CSV or NDJSON file."""
+    with open(path, encoding="utf-8", newline="") as stream:
+        report = _provisioning_service().provision(
+            iter_records(stream, fmt or detect_format(path))
+        )
+    click.echo(json.dumps(report.model_dump()))
+
+
+@auth_bp.cli.command("cleanup")
+@click.option("--once", is_flag=True, help="Run a single pass and exit.")
+def cleanup_confirmations_command(once: bool) -> None:
+    """Delete expired confirmation tokens and never-confirmed users."""
+    service = ConfirmationCleanupService(
+        ConfirmationCleanupDatabaseRepository(db.session),
+        token_ttl=_TOKEN_TTL,
+        batch_size=CONFIRMATION_CLEANUP_BATCH_SIZE,
+        pause=CONFIRMATION_CLEANUP_PAUSE,
+    )
+    while True:
+        # One JSON line per pass, so the counts can be scraped from logs.
+        click.echo(json.dumps(service.run().model_dump()))
+        if once:
+            break
+        time.sleep(CONFIRMATION_CLEANUP_INTERVAL)
@@ -36,18 +36,27 @@ def _build_confirmation_url(
     return f"{root}/confirm/{token}?email={encoded_email}"
 
 
-class UserConfirmationMailDelivery(UserConfirmationDeliveryInterface):
-    def send_confirmation(self, email: str, token: str) -> None:
-        confirmation_url = _build_confirmation_url(
-            FRONTEND_ROOT_DOMAIN, token=token, email=email
-        )
-
-        message = Message(
-            subject="Confirm your account",
-            recipients=[email],
-            body=f"""
+def _build_confirmation_message(email: str, token: str) -> Message:
+    confirmation_url = _build_confirmation_url(
+        FRONTEND_ROOT_DOMAIN, token=token, email=email
+    )
+
+    return Message(
+        subject="Confirm your account",
+        recipients=[email],
+        body=f"""
                 Use this link to confirm your account:
                 {confirmation_url}
                 """,
-        )
-        mailing.send(message)
+    )
+
+
+class UserConfirmationMailDelivery(UserConfirmationDeliveryInterface):
+    def send_confirmation(self, email: str, token: str) -> None:
+        mailing.send(_build_confirmation_message(email, token))
+
+    def send_confirmations(self, items: list[tuple[str, str]]) -> None:
+        # One SMTP session for the whole batch instead of one per mail.
+        with mailing.connect() as connection:
+            for email, token in items:
+                connection.send(_build_confirmation_message(email, token))
@@ -0,0 +1,39 @@
+import csv
+import json
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+FORMATS = ("csv", "ndjson")
+
+
+def iter_csv_records(stream: TextIO) -> Iterator[dict[str, Any]]:
+    """Yield rows of a CSV with an `email,password[,role]` header."""
+    for row in csv.DictReader(stream):
+        yield {key: value for key, value in row.items() if value}
+
+
+def iter_ndjson_records(stream: TextIO) -> Iterator[dict[str, Any]]:
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        # Malformed lines are passed on empty so they count as invalid.
+        yield record if isinstance(record, dict) else {}
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[dict[str, Any]]:
+    if fmt == "csv":
+        return iter_csv_records(stream)
+    if fmt == "ndjson":
+        return iter_ndjson_records(stream)
+    raise ValueError(f"unsupported format: {fmt}")
+
+
+def detect_format(filename_or_mimetype: str) -> str:
+    value = filename_or_mimetype.lower()
+    if "json" in value:
+        return "ndjson"
+    return "csv"
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from logging import getLogger
+
+import redis
+from flask import Flask, current_app
+
+from backend.webapp.auth.domain.ports import RateLimiterInterface
+from backend.webapp.config import (
+    LOGIN_LIMIT_PER_EMAIL,
+    LOGIN_LIMIT_PER_IP,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_PERIOD,
+    RATE_LIMIT_REDIS_URL,
+    REGISTER_LIMIT_PER_EMAIL,
+    REGISTER_LIMIT_PER_IP,
+)
+
+logger = getLogger(__name__)
+
+# GCRA token bucket: the whole bucket state is a single "theoretical
+# arrival time" (TAT). Returns 0 when allowed, else the wait in ms.
+_GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local wait = new_tat - now - period
+if wait > 0 then
+    return wait
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return 0
+"""
+
+
+class InMemoryRateLimiter(RateLimiterInterface):
+    """Per-process token bucket limiter.
+
+    Each key costs one float (its theoretical arrival time) in an
+    insertion ordered dict capped at `max_keys`. Only buckets that have
+    fully refilled are evicted, since forgetting them loses nothing; when
+    every tracked bucket is still draining, new keys are refused until the
+    oldest one refills rather than evicting a bucket an attacker could
+    otherwise reset by flooding new keys.
+    """
+
+    def __init__(
+        self, limit: int, period: float, max_keys: int = 100_000
+    ) -> None:
+        self._interval = period / max(limit, 1)
+        self._period = period
+        self._max_keys = max(max_keys, 1)
+        self._tats: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            # Compare before adding so a fresh bucket (tat == now) is never
+            # refused because of float rounding.
+            wait = tat - now - (self._period - self._interval)
+            if wait > 0:
+                return wait
+
+            if key not in self._tats:
+                self._evict(now)
+                if len(self._tats) >= self._max_keys:
+                    return next(iter(self._tats.values())) - now
+
+            self._tats[key] = tat + self._interval
+            self._tats.move_to_end(key)
+            return 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def _evict(self, now: float) -> None:
+        # Drop buckets that have fully refilled, least recently used
+        # first, stopping at the first one still draining.
+        while self._tats:
+            oldest_key, oldest_tat = next(iter(self._tats.items()))
+            if oldest_tat > now:
+                break
+            del self._tats[oldest_key]
+
+
+class RedisRateLimiter(RateLimiterInterface):
+    """Token bucket limiter shared by all workers through Redis.
+
+    Falls back to a local in-memory limiter when Redis is unreachable so
+    that an outage does not disable protection entirely.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        namespace: str,
+        limit: int,
+        period: float,
+        fallback: InMemoryRateLimiter,
+    ) -> None:
+        self._client = client
+        self._namespace = namespace
+        self._interval_ms = int(period * 1000 / max(limit, 1))
+        self._period_ms = int(period * 1000)
+        self._script = client.register_script(_GCRA_SCRIPT)
+        self._fallback = fallback
+
+    def consume(self, key: str) -> float:
+        try:
+            wait_ms = self._script(
+                keys=[f"ratelimit:{self._namespace}:{key}"],
+                args=[self._interval_ms, self._period_ms],
+            )
+        except redis.RedisError:
+            logger.warning("Rate limit backend unavailable, using local")
+            return self._fallback.consume(key)
+        return int(wait_ms) / 1000
+
+
+def build_rate_limiter(
+    namespace: str,
+    limit: int,
+    period: float = RATE_LIMIT_PERIOD,
+    client: redis.Redis | None = None,
+) -> RateLimiterInterface:
+    local = InMemoryRateLimiter(limit, period, max_keys=RATE_LIMIT_MAX_KEYS)
+    if client is None:
+        return local
+    return RedisRateLimiter(client, namespace, limit, period, local)
+
+
+@dataclass(frozen=True)
+class AuthRateLimits:
+    """The login and registration limiters of one app."""
+
+    login_ip: RateLimiterInterface
+    login_email: RateLimiterInterface
+    register_ip: RateLimiterInterface
+    register_email: RateLimiterInterface
+
+    @classmethod
+    def from_config(cls) -> "AuthRateLimits":
+        client = None
+        if RATE_LIMIT_REDIS_URL:
+            client = redis.Redis.from_url(
+                RATE_LIMIT_REDIS_URL,
+                socket_timeout=0.2,
+                socket_connect_timeout=0.2,
+            )
+        return cls(
+            login_ip=build_rate_limiter(
+                "login:ip", LOGIN_LIMIT_PER_IP, client=client
+            ),
+            login_email=build_rate_limiter(
+                "login:email", LOGIN_LIMIT_PER_EMAIL, client=client
+            ),
+            register_ip=build_rate_limiter(
+                "register:ip", REGISTER_LIMIT_PER_IP, client=client
+            ),
+            register_email=build_rate_limiter(
+                "register:email", REGISTER_LIMIT_PER_EMAIL, client=client
+            ),
+        )
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["auth_rate_limits"] = self
+
+
+def rate_limits() -> AuthRateLimits:
+    """The current app's limiters, built on first use if not set up."""
+    limits = current_app.extensions.get("auth_rate_limits")
+    if limits is None:
+        limits = current_app.extensions.setdefault(
+            "auth_rate_limits", AuthRateLimits.from_config()
+        )
+    return limits
+
+
+def check_rate_limits(
+    *checks: tuple[RateLimiterInterface, str | None],
+) -> float:
+    """Consume from each limiter in order, stopping at the first refusal.
+
+    Returns 0 when every check passed, otherwise the retry-after seconds.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return 0.0
+
+    for limiter, key in checks:
+        if not key:
+            continue
+        wait = limiter.consume(key)
+        if wait > 0:
+            return wait
+    return 0.0
@@ -1,15 +1,39 @@
+import csv
+import io
+from datetime import datetime, timezone
+
 from flask_sqlalchemy.session import Session
-from sqlalchemy import delete, select
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.webapp.auth.domain.dtos import RegisteredUserDTO
+from backend.webapp.auth.domain.dtos import (
+    BulkUserRowDTO,
+    ConfirmationTokenDTO,
+    RegisteredUserDTO,
+)
 from backend.webapp.auth.domain.enums import Role
 from backend.webapp.auth.domain.ports import (
+    AsyncConfirmationRepoInterface,
+    AsyncUsersRepoInterface,
+    BulkUsersRepoInterface,
+    ConfirmationCleanupRepoInterface,
     ConfirmationRepoInterface,
     UsersRepoInterface,
 )
 from backend.webapp.auth.infrastructure.models import Confirmation, User
 
 
+def _token_dto(row) -> ConfirmationTokenDTO | None:
+    if row is None:
+        return None
+    token, created_at = row
+    # SQLite hands back naive datetimes; they are stored in UTC.
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return ConfirmationTokenDTO(token=token, created_at=created_at)
+
+
 class UsersDatabaseRepository(UsersRepoInterface):
     def __init__(self, session: Session):
         self._session = session
@@ -57,10 +81,14 @@ class ConfirmationDatabaseRepository(ConfirmationRepoInterface):
         self._session.add(Confirmation(email=email, token=token))
         self._session.commit()
 
-    def get_token_for_user(self, email: str) -> str | None:
-        return self._session.execute(
-            select(Confirmation.token).where(Confirmation.email == email)
-        ).scalar_one_or_none()
+    def get_token_for_user(self, email: str) -> ConfirmationTokenDTO | None:
+        return _token_dto(
+            self._session.execute(
+                select(Confirmation.token, Confirmation.created_at).where(
+                    Confirmation.email == email
+                )
+            ).one_or_none()
+        )
 
     def activate_user(self, email: str) -> None:
         user = self._get_user(email)
@@ -76,3 +104,215 @@ class ConfirmationDatabaseRepository(ConfirmationRepoInterface):
             delete(Confirmation).where(Confirmation.email == email)
         )
         self._session.commit()
+
+
+def _copy_rows(cursor, table: str, columns: str, rows: list[tuple]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+class BulkUsersDatabaseRepository(BulkUsersRepoInterface):
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    def find_existing_emails(self, emails: list[str]) -> set[str]:
+        if not emails:
+            return set()
+        return set(
+            self._session.execute(
+                select(User.email).where(User.email.in_(emails))
+            ).scalars()
+        )
+
+    def bulk_create_users(self, rows: list[BulkUserRowDTO]) -> list[str]:
+        if not rows:
+            return []
+
+        connection = self._session.connection()
+        if connection.dialect.name == "postgresql":
+            created = self._copy_users(connection.connection.cursor(), rows)
+            self._session.commit()
+            return created
+
+        try:
+            self._insert_users(rows)
+            self._session.commit()
+            return [r.email for r in rows]
+        except IntegrityError:
+            # Someone registered one of the emails since they were looked
+            # up; redo the chunk row by row, skipping the taken ones.
+            self._session.rollback()
+
+        created = []
+        for row in rows:
+            try:
+                self._insert_users([row])
+                self._session.commit()
+                created.append(row.email)
+            except IntegrityError:
+                self._session.rollback()
+        return created
+
+    @staticmethod
+    def _copy_users(cursor, rows: list[BulkUserRowDTO]) -> list[str]:
+        # COPY skips per-row statement overhead entirely; loading into a
+        # temp table first lets emails registered meanwhile be skipped
+        # instead of aborting the whole chunk on a unique violation.
+        cursor.execute(
+            "CREATE TEMP TABLE bulk_user_load"
+            " (email text, hash text, role text, token text)"
+            " ON COMMIT DROP"
+        )
+        _copy_rows(
+            cursor,
+            "bulk_user_load",
+            "email, hash, role, token",
+            [(r.email, r.password_hash, r.role, r.token) for r in rows],
+        )
+        cursor.execute(
+            """
+            WITH created AS (
+                INSERT INTO "user" (email, hash, role, is_active)
+                SELECT email, hash, role, false FROM bulk_user_load
+                ON CONFLICT (email) DO NOTHING
+                RETURNING email
+            )
+            INSERT INTO confirmation (email, token)
+            SELECT email, token FROM bulk_user_load JOIN created USING (email)
+            ON CONFLICT (email)
+                DO UPDATE SET token = EXCLUDED.token, created_at = now()
+            RETURNING email
+            """
+        )
+        return [email for (email,) in cursor.fetchall()]
+
+    def _insert_users(self, rows: list[BulkUserRowDTO]) -> None:
+        self._session.execute(
+            insert(User),
+            [
+                {
+                    "email": r.email,
+                    "hash": r.password_hash,
+                    "role": r.role,
+                    "is_active": False,
+                }
+                for r in rows
+            ],
+        )
+        self._session.execute(
+            insert(Confirmation),
+            [{"email": r.email, "token": r.token} for r in rows],
+        )
+
+
+class ConfirmationCleanupDatabaseRepository(ConfirmationCleanupRepoInterface):
+    def __init__(self, session: Session) -> None:
+        self._session = session
+
+    def delete_expired_batch(
+        self, created_before: datetime, batch_size: int
+    ) -> tuple[int, int]:
+        # Oldest first along ix_confirmation_created_at; SKIP LOCKED (a
+        # no-op on SQLite) leaves rows an in-flight confirm holds alone.
+        batch = self._session.execute(
+            select(Confirmation.id, Confirmation.email)
+            .where(Confirmation.created_at < created_before)
+            .order_by(Confirmation.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not batch:
+            self._session.rollback()
+            return 0, 0
+
+        # A user confirmed meanwhile is active by now and is kept.
+        users = self._session.execute(
+            delete(User).where(
+                User.email.in_([email for _, email in batch]),
+                User.is_active.is_(False),
+            )
+        ).rowcount
+        tokens = self._session.execute(
+            delete(Confirmation).where(
+                Confirmation.id.in_([token_id for token_id, _ in batch])
+            )
+        ).rowcount
+        self._session.commit()
+        return tokens, users
+
+
+class AsyncUsersDatabaseRepository(AsyncUsersRepoInterface):
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def get_user_by_email(self, email: str) -> RegisteredUserDTO | None:
+        user = (
+            await self._session.execute(
+                select(User).where(User.email == email)
+            )
+        ).scalar_one_or_none()
+        if user:
+            return RegisteredUserDTO(
+                email=user.email,
+                role=user.role,
+                password_hash=user.hash,
+                is_active=user.is_active,
+            )
+        else:
+            return None
+
+    async def create_user(
+        self, email: str, password_hash: str, role: str, is_active: bool
+    ) -> RegisteredUserDTO:
+        new_user = User(
+            email=email, hash=password_hash, role=role, is_active=is_active
+        )
+        self._session.add(new_user)
+        await self._session.commit()
+        return RegisteredUserDTO(
+            email=new_user.email,
+            role=Role(new_user.role),
+            password_hash=new_user.hash,
+            is_active=new_user.is_active,
+        )
+
+
+class AsyncConfirmationDatabaseRepository(AsyncConfirmationRepoInterface):
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def store_token_for_user(self, email: str, token: str) -> None:
+        self._session.add(Confirmation(email=email, token=token))
+        await self._session.commit()
+
+    async def get_token_for_user(
+        self, email: str
+    ) -> ConfirmationTokenDTO | None:
+        return _token_dto(
+            (
+                await self._session.execute(
+                    select(Confirmation.token, Confirmation.created_at).where(
+                        Confirmation.email == email
+                    )
+                )
+            ).one_or_none()
+        )
+
+    async def activate_user(self, email: str) -> None:
+        result = await self._session.execute(
+            update(User).where(User.email == email).values(is_active=True)
+        )
+        if result.rowcount == 0:
+            await self._session.rollback()
+            raise ValueError("user not found")
+        await self._session.commit()
+
+    async def remove_confirmation_token(self, email: str) -> None:
+        await self._session.execute(
+            delete(Confirmation).where(Confirmation.email == email)
+        )
+        await self._session.commit()
@@ -0,0 +1,28 @@
+from typing import Any
+
+import jwt
+from flask import request
+
+from backend.webapp.config import JWT_SECRET
+
+
+def get_bearer_token() -> str | None:
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ", 1)[1].strip()
+
+
+def decode_token(token: str) -> dict[str, Any] | None:
+    try:
+        assert JWT_SECRET
+        return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+
+
+def get_current_claims() -> dict[str, Any] | None:
+    token = get_bearer_token()
+    if not token:
+        return None
+    return decode_token(token)
@@ -0,0 +1,447 @@
+"""Benchmark the auth hot paths: register, confirm and login.
+
+    python -m backend.webapp.authbench --iterations 50 --output auth.json
+    python -m backend.webapp.authbench --baseline auth.json
+
+Each operation runs once through its service on `db.session` and once
+through its Flask endpoint via the test client. Every call is split into
+Argon2 time, database time (cursor events on every engine) and the rest,
+and the report also counts queries per call, so a changed repository
+query shape shows up even when the database is fast.
+
+The database is `--database-url`, else `BENCH_DATABASE_URL`, else the
+configured Postgres when it accepts a connection, else in-memory SQLite.
+Benchmark users are deleted afterwards.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from argon2 import PasswordHasher
+from flask import Flask
+from sqlalchemy import create_engine, delete, event, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.webapp.app import create_app
+from backend.webapp.auth.domain.dtos import (
+    UserConfirmationInput,
+    UserLoginInputDTO,
+)
+from backend.webapp.auth.domain.enums import LoginStatus, RegistrationStatus
+from backend.webapp.auth.domain.ports import UserConfirmationDeliveryInterface
+from backend.webapp.auth.domain.service.confirm import UserConfirmationService
+from backend.webapp.auth.domain.service.login import LoginService
+from backend.webapp.auth.domain.service.register import RegistrationService
+from backend.webapp.auth.infrastructure.models import Confirmation, User
+from backend.webapp.auth.infrastructure.repository import (
+    ConfirmationDatabaseRepository,
+    UsersDatabaseRepository,
+)
+from backend.webapp.config import ASYNC_DB_ENABLED, SQLALCHEMY_DATABASE_URI
+from backend.webapp.database import db
+
+OPERATIONS = ("register", "confirm", "login")
+PASSWORD = "bench-password-1"
+
+
+@dataclass
+class _Costs:
+    hash_seconds: float = 0.0
+    db_seconds: float = 0.0
+    queries: int = 0
+
+
+@dataclass
+class _Samples:
+    seconds: list[float] = field(default_factory=list)
+    hash_seconds: list[float] = field(default_factory=list)
+    db_seconds: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+
+    def add(self, seconds: float, costs: _Costs) -> None:
+        self.seconds.append(seconds)
+        self.hash_seconds.append(costs.hash_seconds)
+        self.db_seconds.append(costs.db_seconds)
+        self.queries.append(costs.queries)
+
+
+class _CapturingDelivery(UserConfirmationDeliveryInterface):
+    def __init__(self) -> None:
+        self.tokens: dict[str, str] = {}
+
+    def send_confirmation(self, email: str, token: str) -> None:
+        self.tokens[email] = token
+
+
+@contextmanager
+def _measured(costs: _Costs) -> Iterator[None]:
+    """Charge Argon2 calls and cursor executions to `costs` meanwhile.
+
+    The benchmark is single-threaded, so one shared accumulator is enough;
+    async services hash in a worker thread but are still awaited serially.
+    """
+    original_hash = PasswordHasher.hash
+    original_verify = PasswordHasher.verify
+
+    def timed(method: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                costs.hash_seconds += time.perf_counter() - started
+
+        return wrapper
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("bench_started", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        costs.db_seconds += (
+            time.perf_counter() - conn.info["bench_started"].pop()
+        )
+        costs.queries += 1
+
+    PasswordHasher.hash = timed(original_hash)  # type: ignore[method-assign]
+    PasswordHasher.verify = timed(original_verify)  # type: ignore[method-assign]
+    event.listen(Engine, "before_cursor_execute", before)
+    event.listen(Engine, "after_cursor_execute", after)
+    try:
+        yield
+    finally:
+        event.remove(Engine, "before_cursor_execute", before)
+        event.remove(Engine, "after_cursor_execute", after)
+        PasswordHasher.hash = original_hash  # type: ignore[method-assign]
+        PasswordHasher.verify = original_verify  # type: ignore[method-assign]
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(int(q * len(ordered)), len(ordered) - 1)
+    return ordered[index]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _summary(samples: _Samples) -> dict[str, Any]:
+    latency = samples.seconds
+    other = [
+        total - hashing - database
+        for total, hashing, database in zip(
+            latency, samples.hash_seconds, samples.db_seconds
+        )
+    ]
+    return {
+        "requests": len(latency),
+        "rps": round(len(latency) / sum(latency), 2),
+        "latency_ms": {
+            "p50": _ms(_percentile(latency, 0.5)),
+            "p95": _ms(_percentile(latency, 0.95)),
+            "p99": _ms(_percentile(latency, 0.99)),
+            "mean": _ms(statistics.fmean(latency)),
+            "max": _ms(max(latency)),
+        },
+        "hash_ms": {
+            "p50": _ms(_percentile(samples.hash_seconds, 0.5)),
+            "mean": _ms(statistics.fmean(samples.hash_seconds)),
+        },
+        "db_ms": {
+            "p50": _ms(_percentile(samples.db_seconds, 0.5)),
+            "mean": _ms(statistics.fmean(samples.db_seconds)),
+        },
+        "other_ms": {"mean": _ms(statistics.fmean(other))},
+        "queries_per_request": round(statistics.fmean(samples.queries), 2),
+    }
+
+
+def _timed_call(call: Callable[[], Any], samples: _Samples | None) -> Any:
+    costs = _Costs()
+    with _measured(costs):
+        started = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - started
+    if samples is not None:
+        samples.add(elapsed, costs)
+    return result
+
+
+def _stored_tokens(emails: list[str]) -> dict[str, str]:
+    rows = db.session.execute(
+        select(Confirmation.email, Confirmation.token).where(
+            Confirmation.email.in_(emails)
+        )
+    )
+    return {email: token for email, token in rows}
+
+
+def _bench_services(
+    emails: list[str], record: bool
+) -> dict[str, _Samples] | None:
+    delivery = _CapturingDelivery()
+    users = UsersDatabaseRepository(db.session)
+    confirmations = ConfirmationDatabaseRepository(db.session)
+    register = RegistrationService(users, delivery, confirmations)
+    confirm = UserConfirmationService(delivery, confirmations)
+    login = LoginService(users)
+    samples = {operation: _Samples() for operation in OPERATIONS}
+
+    def recorded(operation: str) -> _Samples | None:
+        return samples[operation] if record else None
+
+    for email in emails:
+        result = _timed_call(
+            lambda: register.register(email, PASSWORD), recorded("register")
+        )
+        assert result.status == RegistrationStatus.success, result.reason
+    for email in emails:
+        dto = UserConfirmationInput(email=email, token=delivery.tokens[email])
+        result = _timed_call(lambda: confirm.confirm(dto), recorded("confirm"))
+        assert result.success, result.reason
+    for email in emails:
+        dto = UserLoginInputDTO(email=email, password=PASSWORD)
+        result = _timed_call(lambda: login.login(dto), recorded("login"))
+        assert result.status == LoginStatus.successful
+    return samples if record else None
+
+
+def _client_address(index: int) -> str:
+    # One address per request keeps the per-IP limiters out of the way
+    # while still paying for the limiter checks themselves.
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+def _bench_endpoints(
+    app: Flask, emails: list[str], offset: int, record: bool
+) -> dict[str, _Samples] | None:
+    client = app.test_client()
+    samples = {operation: _Samples() for operation in OPERATIONS}
+
+    def post(path: str, index: int, body: dict[str, str]) -> Any:
+        return client.post(
+            path,
+            json=body,
+            environ_base={"REMOTE_ADDR": _client_address(offset + index)},
+        )
+
+    def recorded(operation: str) -> _Samples | None:
+        return samples[operation] if record else None
+
+    for index, email in enumerate(emails):
+        response = _timed_call(
+            lambda: post(
+                "/auth/register",
+                index,
+                {"email": email, "password": PASSWORD},
+            ),
+            recorded("register"),
+        )
+        assert response.status_code == 201, response.get_json()
+    tokens = _stored_tokens(emails)
+    for index, email in enumerate(emails):
+        response = _timed_call(
+            lambda: post(
+                "/auth/confirm",
+                index,
+                {"email": email, "token": tokens[email]},
+            ),
+            recorded("confirm"),
+        )
+        assert response.status_code == 200, response.get_json()
+    for index, email in enumerate(emails):
+        response = _timed_call(
+            lambda: post(
+                "/auth/login", index, {"email": email, "password": PASSWORD}
+            ),
+            recorded("login"),
+        )
+        assert response.status_code == 200, response.get_json()
+    return samples if record else None
+
+
+def _postgres_available(url: str) -> bool:
+    try:
+        engine = create_engine(url, connect_args={"connect_timeout": 1})
+    except (SQLAlchemyError, ValueError):
+        # Unset POSTGRES_* settings leave an unparsable URL.
+        return False
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+    except SQLAlchemyError:
+        return False
+    finally:
+        engine.dispose()
+
+
+def resolve_database_url(url: str | None = None) -> str:
+    url = url or os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return url
+    if _postgres_available(SQLALCHEMY_DATABASE_URI):
+        return SQLALCHEMY_DATABASE_URI
+    return "sqlite://"
+
+
+def _hasher_parameters() -> dict[str, int]:
+    hasher = PasswordHasher()
+    return {
+        "time_cost": hasher.time_cost,
+        "memory_cost": hasher.memory_cost,
+        "parallelism": hasher.parallelism,
+        "hash_len": hasher.hash_len,
+        "salt_len": hasher.salt_len,
+    }
+
+
+def run(
+    database_url: str, iterations: int = 50, warmup: int = 3
+) -> dict[str, Any]:
+    if ASYNC_DB_ENABLED and database_url.startswith("sqlite"):
+        raise ValueError(
+            "ASYNC_DB_ENABLED endpoints need Postgres; an in-memory SQLite "
+            "database is not shared across async connections"
+        )
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": database_url,
+            "MAIL_SUPPRESS_SEND": True,
+            "TESTING": True,
+        }
+    )
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+
+    def emails(layer: str, count: int, start: int = 0) -> list[str]:
+        return [
+            f"{prefix}-{layer}-{index}@bench.example"
+            for index in range(start, start + count)
+        ]
+
+    with app.app_context():
+        db.create_all()
+        try:
+            _bench_services(emails("warm-service", warmup), record=False)
+            services = _bench_services(emails("service", iterations), True)
+            _bench_endpoints(
+                app, emails("warm-api", warmup), offset=0, record=False
+            )
+            endpoints = _bench_endpoints(
+                app, emails("api", iterations), offset=warmup, record=True
+            )
+        finally:
+            db.session.rollback()
+            db.session.execute(
+                delete(Confirmation).where(
+                    Confirmation.email.startswith(prefix)
+                )
+            )
+            db.session.execute(
+                delete(User).where(User.email.startswith(prefix))
+            )
+            db.session.commit()
+            db.session.remove()
+        dialect = db.engine.dialect.name
+        db.engine.dispose()
+
+    assert services and endpoints
+    return {
+        "database": dialect,
+        "async_db": ASYNC_DB_ENABLED,
+        "iterations": iterations,
+        "argon2": _hasher_parameters(),
+        "services": {
+            operation: _summary(samples)
+            for operation, samples in services.items()
+        },
+        "endpoints": {
+            operation: _summary(samples)
+            for operation, samples in endpoints.items()
+        },
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Regressions of `current` against `baseline`, one line each.
+
+    Median latency may grow by `tolerance` (a fraction); query counts and
+    Argon2 parameters must not change at all.
+    """
+    regressions = []
+    if baseline.get("argon2") != current["argon2"]:
+        regressions.append(
+            f"argon2 parameters changed: {baseline.get('argon2')} -> "
+            f"{current['argon2']}"
+        )
+    for layer in ("services", "endpoints"):
+        for operation, result in current[layer].items():
+            before = baseline.get(layer, {}).get(operation)
+            if before is None:
+                continue
+            name = f"{layer}.{operation}"
+            if result["queries_per_request"] > before["queries_per_request"]:
+                regressions.append(
+                    f"{name}: {before['queries_per_request']} -> "
+                    f"{result['queries_per_request']} queries per request"
+                )
+            limit = before["latency_ms"]["p50"] * (1 + tolerance)
+            if result["latency_ms"]["p50"] > limit:
+                regressions.append(
+                    f"{name}: p50 {before['latency_ms']['p50']} -> "
+                    f"{result['latency_ms']['p50']} ms"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--database-url")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument(
+        "--baseline", help="previous report; exit 1 on regressions"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed median latency growth over the baseline",
+    )
+    args = parser.parse_args()
+
+    report = run(
+        resolve_database_url(args.database_url), args.iterations, args.warmup
+    )
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(encoded + "\n")
+    print(encoded)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(
+                json.load(baseline_file), report, args.tolerance
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
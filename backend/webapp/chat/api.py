@@ -1,36 +1,41 @@
-from typing import Any
+import json
 
-import jwt
+import click
+import redis
 from flask import Blueprint, jsonify, request
+from pydantic import BaseModel, Field, ValidationError
 from sqlalchemy import select
 
 from backend.webapp.auth.infrastructure.models import User
-from backend.webapp.config import JWT_SECRET
-from backend.webapp.database import db
+from backend.webapp.auth.infrastructure.tokens import get_current_claims
+from backend.webapp.chat.conversations import (
+    ConversationsQueryDTO,
+    conversation_results,
+    conversations_query,
+    decode_conversations_cursor,
+)
+from backend.webapp.chat.history import HistoryArchiver
+from backend.webapp.chat.pagination import decode_cursor, encode_cursor
+from backend.webapp.chat.presence import MAX_PRESENCE_BATCH, presence_lookup
+from backend.webapp.chat.search import (
+    SearchQueryDTO,
+    build_search_query,
+    decode_search_cursor,
+    search_results,
+)
+from backend.webapp.config import (
+    ASYNC_DB_ENABLED,
+    CHAT_ARCHIVE_BATCH_SIZE,
+    CHAT_HISTORY_REDIS_URL,
+    CHAT_HISTORY_STREAM,
+)
+from backend.webapp.database import async_session, db, run_async
 
 chat_bp = Blueprint("chat", __name__, url_prefix="/chat")
 
 
-def _get_bearer_token() -> str | None:
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        return None
-    return auth_header.split(" ", 1)[1].strip()
-
-
-def _decode_token(token: str) -> dict[str, Any] | None:
-    try:
-        assert JWT_SECRET
-        return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-    except jwt.InvalidTokenError:
-        return None
-
-
 def _get_current_email() -> str | None:
-    token = _get_bearer_token()
-    if not token:
-        return None
-    payload = _decode_token(token)
+    payload = get_current_claims()
     if not payload:
         return None
     email = payload.get("email")
@@ -39,21 +44,205 @@ def _get_current_email() -> str | None:
     return email
 
 
+class UsersQueryDTO(BaseModel):
+    # Without a limit the whole directory is one page.
+    limit: int | None = Field(default=None, ge=1, le=500)
+    cursor: str | None = None
+
+
+def _decode_users_cursor(cursor: str) -> str:
+    (after,) = decode_cursor(cursor, 1)
+    if not isinstance(after, str):
+        raise ValueError("invalid cursor")
+    return after
+
+
+def _active_users_query(email: str, params: UsersQueryDTO):
+    stmt = select(User.email).where(
+        User.is_active.is_(True),
+        User.email != email,
+    )
+    if params.limit is None:
+        return stmt
+    if params.cursor:
+        stmt = stmt.where(User.email > _decode_users_cursor(params.cursor))
+    return stmt.order_by(User.email).limit(params.limit + 1)
+
+
+def _list_active_users(email: str, params: UsersQueryDTO) -> list[str]:
+    return list(
+        db.session.execute(_active_users_query(email, params)).scalars().all()
+    )
+
+
+async def _list_active_users_async(
+    email: str, params: UsersQueryDTO
+) -> list[str]:
+    async with async_session() as session:
+        result = await session.execute(_active_users_query(email, params))
+        return list(result.scalars().all())
+
+
 @chat_bp.route("/users", methods=["GET"])
 def list_users():
     email = _get_current_email()
     if not email:
         return jsonify({"error": "unauthorized"}), 401
 
-    users = (
-        db.session.execute(
-            select(User.email).where(
-                User.is_active.is_(True),
-                User.email != email,
-            )
+    try:
+        params = UsersQueryDTO.model_validate(request.args.to_dict())
+        if params.cursor:
+            _decode_users_cursor(params.cursor)
+    except (ValidationError, ValueError):
+        return jsonify({"error": "invalid query"}), 400
+
+    if ASYNC_DB_ENABLED:
+        users = run_async(_list_active_users_async(email, params))
+    else:
+        users = _list_active_users(email, params)
+
+    next_cursor = None
+    if params.limit is not None and len(users) > params.limit:
+        users = users[: params.limit]
+        next_cursor = encode_cursor(users[-1])
+
+    # One pipelined SMISMEMBER per presence shard for the whole page,
+    # minus recently cached users.
+    online = presence_lookup().online(users)
+    return jsonify(
+        {
+            "users": [
+                {"email": user_email, "online": online[user_email]}
+                for user_email in users
+            ],
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+@chat_bp.route("/presence", methods=["GET"])
+def get_presence():
+    """Online state of the users in `emails` (comma separated)"""
+    if not _get_current_email():
+        return jsonify({"error": "unauthorized"}), 401
+
+    emails = [
+        email
+        for value in request.args.getlist("emails")
+        for email in value.split(",")
+        if email
+    ]
+    if not emails or len(emails) > MAX_PRESENCE_BATCH:
+        return jsonify({"error": "invalid query"}), 400
+
+    online = presence_lookup().online(list(dict.fromkeys(emails)))
+    return jsonify({"presence": online})
+
+
+@chat_bp.route("/online", methods=["GET"])
+def get_online_counts():
+    """How many users are online, and unique users today if tracked"""
+    if not _get_current_email():
+        return jsonify({"error": "unauthorized"}), 401
+
+    return jsonify(presence_lookup().counts())
+
+
+def _search_messages(email: str, params: SearchQueryDTO):
+    dialect = db.session.get_bind().dialect.name
+    rows = db.session.execute(build_search_query(dialect, email, params)).all()
+    return search_results(list(rows), dialect, params)
+
+
+async def _search_messages_async(email: str, params: SearchQueryDTO):
+    async with async_session() as session:
+        dialect = session.bind.dialect.name
+        result = await session.execute(
+            build_search_query(dialect, email, params)
+        )
+        return search_results(list(result.all()), dialect, params)
+
+
+@chat_bp.route("/search", methods=["GET"])
+def search_messages():
+    """Ranked full-text search over the caller's direct messages"""
+    email = _get_current_email()
+    if not email:
+        return jsonify({"error": "unauthorized"}), 401
+
+    try:
+        params = SearchQueryDTO.model_validate(request.args.to_dict())
+        if params.cursor:
+            decode_search_cursor(params.cursor)
+    except (ValidationError, ValueError):
+        return jsonify({"error": "invalid query"}), 400
+
+    if ASYNC_DB_ENABLED:
+        results, next_cursor = run_async(_search_messages_async(email, params))
+    else:
+        results, next_cursor = _search_messages(email, params)
+
+    return jsonify({"results": results, "next_cursor": next_cursor})
+
+
+def _list_conversations(email: str, params: ConversationsQueryDTO):
+    rows = db.session.execute(conversations_query(email, params)).scalars()
+    return conversation_results(list(rows), params)
+
+
+async def _list_conversations_async(email: str, params: ConversationsQueryDTO):
+    async with async_session() as session:
+        result = await session.execute(conversations_query(email, params))
+        return conversation_results(list(result.scalars()), params)
+
+
+@chat_bp.route("/conversations", methods=["GET"])
+def list_conversations():
+    """The caller's conversations, newest first, with unread counts"""
+    email = _get_current_email()
+    if not email:
+        return jsonify({"error": "unauthorized"}), 401
+
+    try:
+        params = ConversationsQueryDTO.model_validate(request.args.to_dict())
+        if params.cursor:
+            decode_conversations_cursor(params.cursor)
+    except (ValidationError, ValueError):
+        return jsonify({"error": "invalid query"}), 400
+
+    if ASYNC_DB_ENABLED:
+        conversations, next_cursor = run_async(
+            _list_conversations_async(email, params)
         )
-        .scalars()
-        .all()
+    else:
+        conversations, next_cursor = _list_conversations(email, params)
+
+    return jsonify(
+        {"conversations": conversations, "next_cursor": next_cursor}
     )
 
-    return jsonify({"users": [{"email": user_email} for user_email in users]})
+
+@chat_bp.cli.command("archive")
+@click.option("--once", is_flag=True, help="Stop when the stream is drained.")
+def archive_history_command(once: bool) -> None:
+    """Copy direct messages from the ws server's history stream."""
+    if not CHAT_HISTORY_REDIS_URL:
+        raise click.ClickException("REDIS_URL is not configured")
+
+    client = redis.Redis.from_url(
+        CHAT_HISTORY_REDIS_URL, decode_responses=True
+    )
+    archiver = HistoryArchiver(
+        client,
+        db.session,
+        CHAT_HISTORY_STREAM,
+        batch_size=CHAT_ARCHIVE_BATCH_SIZE,
+    )
+    archiver.ensure_group()
+    archived = 0
+    while True:
+        read, inserted = archiver.run_once(block_ms=None if once else 5000)
+        archived += inserted
+        if once and not read:
+            break
+    click.echo(json.dumps({"archived": archived}))
@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+from sqlalchemy import Select, and_, bindparam, case, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from backend.webapp.chat.models import Conversation
+from backend.webapp.chat.pagination import decode_cursor, encode_cursor
+
+PREVIEW_LENGTH = 200
+
+
+class ConversationsQueryDTO(BaseModel):
+    limit: int = Field(default=20, ge=1, le=100)
+    cursor: str | None = None
+
+
+@dataclass(slots=True)
+class ConversationUpdate:
+    """Net change to one summary row from a batch of history events."""
+
+    last: dict[str, Any] | None = None
+    unread: int = 0
+    # Unread messages before this batch are cleared.
+    reset: bool = False
+
+
+def collect_updates(
+    events: list[tuple[str, dict[str, Any]]],
+) -> dict[tuple[str, str], ConversationUpdate]:
+    """Fold ordered `message` rows and `read` markers per (owner, peer).
+
+    Sending a message counts as reading the conversation.
+    """
+    updates: dict[tuple[str, str], ConversationUpdate] = {}
+    for event, row in events:
+        if event == "read":
+            update_ = updates.setdefault(
+                (row["reader"], row["peer"]), ConversationUpdate()
+            )
+            update_.unread = 0
+            update_.reset = True
+            continue
+
+        last = {
+            "last_message_id": row["message_id"],
+            "last_sender": row["sender"],
+            "last_preview": row["content"][:PREVIEW_LENGTH],
+            "last_at": row["created_at"],
+        }
+        sent = updates.setdefault(
+            (row["sender"], row["recipient"]), ConversationUpdate()
+        )
+        sent.last = last
+        sent.unread = 0
+        sent.reset = True
+        received = updates.setdefault(
+            (row["recipient"], row["sender"]), ConversationUpdate()
+        )
+        received.last = last
+        received.unread += 1
+    return updates
+
+
+def _upsert(session: Session, rows: list[dict[str, Any]], reset: bool):
+    insert = (
+        pg_insert
+        if session.get_bind().dialect.name == "postgresql"
+        else sqlite_insert
+    )
+    stmt = insert(Conversation)
+    # Archivers may commit batches out of order; keep the newest message.
+    newer = stmt.excluded.last_at >= Conversation.last_at
+    last_columns = {
+        column: case((newer, stmt.excluded[column]), else_=existing)
+        for column, existing in (
+            ("last_message_id", Conversation.last_message_id),
+            ("last_sender", Conversation.last_sender),
+            ("last_preview", Conversation.last_preview),
+            ("last_at", Conversation.last_at),
+        )
+    }
+    unread = stmt.excluded.unread_count
+    if not reset:
+        unread = Conversation.unread_count + unread
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["owner", "peer"],
+            set_={**last_columns, "unread_count": unread},
+        ),
+        rows,
+    )
+
+
+def apply_updates(
+    session: Session, updates: dict[tuple[str, str], ConversationUpdate]
+) -> None:
+    """Write a batch of summary changes in at most three statements."""
+    upserts: dict[bool, list[dict[str, Any]]] = {True: [], False: []}
+    reads = []
+    for (owner, peer), update_ in updates.items():
+        if update_.last is None:
+            reads.append({"reader": owner, "reader_peer": peer})
+            continue
+        upserts[update_.reset].append(
+            {
+                "owner": owner,
+                "peer": peer,
+                **update_.last,
+                "unread_count": update_.unread,
+            }
+        )
+
+    for reset, rows in upserts.items():
+        if rows:
+            _upsert(session, rows, reset)
+
+    if reads:
+        table = Conversation.__table__
+        session.execute(
+            update(table)
+            .where(
+                table.c.owner == bindparam("reader"),
+                table.c.peer == bindparam("reader_peer"),
+            )
+            .values(unread_count=0),
+            reads,
+        )
+
+
+def decode_conversations_cursor(cursor: str) -> tuple[datetime, str]:
+    last_at, peer = decode_cursor(cursor, 2)
+    if not isinstance(last_at, str) or not isinstance(peer, str):
+        raise ValueError("invalid cursor")
+    return datetime.fromisoformat(last_at), peer
+
+
+def conversations_query(email: str, params: ConversationsQueryDTO) -> Select:
+    """Newest conversations first; reads `limit + 1` index-ordered rows."""
+    stmt = select(Conversation).where(Conversation.owner == email)
+    if params.cursor:
+        last_at, peer = decode_conversations_cursor(params.cursor)
+        stmt = stmt.where(
+            or_(
+                Conversation.last_at < last_at,
+                and_(
+                    Conversation.last_at == last_at, Conversation.peer < peer
+                ),
+            )
+        )
+    return stmt.order_by(
+        Conversation.last_at.desc(), Conversation.peer.desc()
+    ).limit(params.limit + 1)
+
+
+def conversation_results(
+    rows: list[Conversation], params: ConversationsQueryDTO
+) -> tuple[list[dict[str, Any]], str | None]:
+    page = rows[: params.limit]
+    results = [
+        {
+            "peer": conversation.peer,
+            "last_message": {
+                "id": conversation.last_message_id,
+                "from": conversation.last_sender,
+                "preview": conversation.last_preview,
+                "timestamp": conversation.last_at.isoformat(),
+            },
+            "unread": conversation.unread_count,
+        }
+        for conversation in page
+    ]
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.last_at.isoformat(), last.peer)
+    return results, next_cursor
@@ -0,0 +1,157 @@
+import json
+import socket
+from datetime import datetime
+from logging import getLogger
+from typing import Any
+
+import redis
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from backend.webapp.chat.conversations import apply_updates, collect_updates
+from backend.webapp.chat.models import Message
+from backend.webapp.chat.search import START_SEL, STOP_SEL
+
+logger = getLogger(__name__)
+
+ARCHIVER_GROUP = "archiver"
+
+StreamEntry = tuple[str, dict[str, str]]
+
+_MARKERS = str.maketrans("", "", START_SEL + STOP_SEL)
+
+
+def _message_row(payload: dict[str, Any]) -> dict[str, Any]:
+    attachment = payload.get("attachment") or {}
+    return {
+        "message_id": payload["id"],
+        "sender": payload["from"],
+        "recipient": payload["to"],
+        "content": payload.get("content", "").translate(_MARKERS),
+        "attachment_id": attachment.get("id"),
+        "created_at": datetime.fromisoformat(payload["timestamp"]),
+    }
+
+
+def _read_marker(payload: dict[str, Any]) -> dict[str, Any]:
+    return {"reader": payload["reader"], "peer": payload["peer"]}
+
+
+_PARSERS = {"message": _message_row, "read": _read_marker}
+
+
+def archive_entries(session: Session, entries: list[StreamEntry]) -> int:
+    """Archive the messages in `entries` and fold them, together with the
+    read markers, into the conversation summaries.
+
+    Returns how many messages were new. Entries are delivered at least
+    once, so already archived message ids are skipped and do not count
+    as unread again.
+    """
+    events = []
+    for entry_id, fields in entries:
+        # Pending entries trimmed from the stream come back without fields.
+        parser = _PARSERS.get(fields.get("event")) if fields else None
+        if parser is None:
+            continue
+        try:
+            events.append(
+                (fields["event"], parser(json.loads(fields["payload"])))
+            )
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Skipping malformed history entry %s", entry_id)
+    if not events:
+        return 0
+
+    rows = [row for event, row in events if event == "message"]
+    inserted: set[str] = set()
+    if rows:
+        insert = (
+            pg_insert
+            if session.get_bind().dialect.name == "postgresql"
+            else sqlite_insert
+        )
+        result = session.execute(
+            insert(Message)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["message_id"])
+            .returning(Message.message_id)
+        )
+        inserted = set(result.scalars())
+
+    apply_updates(
+        session,
+        collect_updates(
+            [
+                (event, row)
+                for event, row in events
+                if event == "read" or row["message_id"] in inserted
+            ]
+        ),
+    )
+    session.commit()
+    return len(inserted)
+
+
+class HistoryArchiver:
+    """Consumes the ws server's history stream into the message store.
+
+    Uses a consumer group, so several archivers share the stream and an
+    entry is acknowledged only after its batch is committed. Entries left
+    pending by a crashed run are archived again on start.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        session: Session,
+        stream: str,
+        batch_size: int = 500,
+        consumer: str | None = None,
+    ) -> None:
+        self._client = client
+        self._session = session
+        self._stream = stream
+        self._batch_size = max(batch_size, 1)
+        self._consumer = consumer or socket.gethostname()
+        self._next_id = "0"
+
+    def ensure_group(self) -> None:
+        try:
+            self._client.xgroup_create(
+                self._stream, ARCHIVER_GROUP, id="0", mkstream=True
+            )
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def _read(self, last_id: str, block_ms: int | None) -> list[StreamEntry]:
+        response = self._client.xreadgroup(
+            ARCHIVER_GROUP,
+            self._consumer,
+            {self._stream: last_id},
+            count=self._batch_size,
+            block=block_ms,
+        )
+        return response[0][1] if response else []
+
+    def run_once(self, block_ms: int | None = None) -> tuple[int, int]:
+        """Archive one batch; returns (entries read, messages inserted)."""
+        entries: list[StreamEntry] = []
+        if self._next_id != ">":
+            # Our own pending backlog first; it never blocks.
+            entries = self._read(self._next_id, None)
+            self._next_id = entries[-1][0] if entries else ">"
+        if not entries:
+            entries = self._read(">", block_ms)
+        if not entries:
+            return 0, 0
+
+        inserted = archive_entries(self._session, entries)
+        self._client.xack(
+            self._stream,
+            ARCHIVER_GROUP,
+            *(entry_id for entry_id, _ in entries),
+        )
+        return len(entries), inserted
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Computed,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+    column,
+    literal_column,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.functions import FunctionElement
+
+from backend.webapp.database import db
+
+# Language-agnostic: no stemming or stop words, chats mix languages.
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+
+class search_document(FunctionElement):
+    """Generation expression of `message.search_vector`.
+
+    A tsvector on Postgres; elsewhere (SQLite in tests) the lowercased
+    text, which the search falls back to matching with LIKE.
+    """
+
+    inherit_cache = True
+    type = Text()
+
+
+@compiles(search_document)
+def _compile_search_document(element, compiler, **kw):
+    return f"lower({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(search_document, "postgresql")
+def _compile_search_document_pg(element, compiler, **kw):
+    return f"to_tsvector('simple', {compiler.process(element.clauses, **kw)})"
+
+
+class Message(db.Model):
+    __table_args__ = (
+        Index("ix_message_sender_created_at", "sender", "created_at"),
+        Index("ix_message_recipient_created_at", "recipient", "created_at"),
+        Index(
+            "ix_message_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    # Id assigned by the ws server; archiving the same message is a no-op.
+    message_id: Mapped[str] = mapped_column(
+        String(32), unique=True, nullable=False
+    )
+    sender: Mapped[str] = mapped_column(String, nullable=False)
+    recipient: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    attachment_id: Mapped[str | None] = mapped_column(String(32), index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    # Maintained by the database on every insert.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR().with_variant(Text, "sqlite"),
+        Computed(search_document(column("content")), persisted=True),
+        deferred=True,
+    )
+
+
+class Conversation(db.Model):
+    """Per-user summary of one direct conversation.
+
+    Maintained incrementally by the history archiver, so listing
+    conversations never aggregates over `message` rows.
+    """
+
+    __table_args__ = (
+        Index("ix_conversation_owner_last_at", "owner", "last_at"),
+    )
+
+    owner: Mapped[str] = mapped_column(String, primary_key=True)
+    peer: Mapped[str] = mapped_column(String, primary_key=True)
+    last_message_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    last_sender: Mapped[str] = mapped_column(String, nullable=False)
+    last_preview: Mapped[str] = mapped_column(String(200), nullable=False)
+    last_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    unread_count: Mapped[int] = mapped_column(
+        Integer, default=0, nullable=False
+    )
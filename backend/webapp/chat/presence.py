@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging import getLogger
+
+import redis
+from flask import Flask, current_app
+
+from backend.webapp.config import (
+    PRESENCE_CACHE_MAX_KEYS,
+    PRESENCE_CACHE_TTL,
+    PRESENCE_DAILY_ACTIVE,
+    PRESENCE_ONLINE_SET,
+    PRESENCE_REDIS_URL,
+    PRESENCE_SHARDS,
+)
+from backend.ws_server.presence import PresenceShards, daily_active_key
+
+logger = getLogger(__name__)
+
+# Most emails a single /chat/presence lookup may ask about.
+MAX_PRESENCE_BATCH = 500
+
+
+class PresenceLookup:
+    """Online state of many users in at most one Redis round trip.
+
+    Answers are cached per email for `ttl` seconds (bounded LRU), so a
+    page load only asks Redis about users it has not seen recently, with
+    one pipelined SMISMEMBER per presence shard. Without Redis, or when
+    it is unreachable, the state is unknown and reported as None.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis | None,
+        shards: PresenceShards | None = None,
+        ttl: float = PRESENCE_CACHE_TTL,
+        max_keys: int = PRESENCE_CACHE_MAX_KEYS,
+        daily_active: bool = PRESENCE_DAILY_ACTIVE,
+    ) -> None:
+        self._client = client
+        self._shards = shards or PresenceShards(
+            PRESENCE_SHARDS, PRESENCE_ONLINE_SET
+        )
+        self._daily_active = daily_active
+        self._ttl = ttl
+        self._max_keys = max(max_keys, 1)
+        self._cache: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def online(self, emails: list[str]) -> dict[str, bool | None]:
+        if self._client is None:
+            return dict.fromkeys(emails)
+
+        now = time.monotonic()
+        result: dict[str, bool | None] = {}
+        missing = []
+        with self._lock:
+            for email in emails:
+                cached = self._cache.get(email)
+                if cached is not None and cached[1] > now:
+                    result[email] = cached[0]
+                else:
+                    missing.append(email)
+        if not missing:
+            return result
+
+        groups = self._shards.group(missing)
+        try:
+            with self._client.pipeline(transaction=False) as pipe:
+                for index, members in groups.items():
+                    pipe.smismember(self._shards.keys[index], members)
+                replies = pipe.execute()
+        except redis.RedisError:
+            logger.warning("Presence backend unavailable")
+            result.update(dict.fromkeys(missing))
+            return result
+
+        expires = now + self._ttl
+        with self._lock:
+            for members, flags in zip(groups.values(), replies):
+                for email, flag in zip(members, flags):
+                    online = bool(flag)
+                    result[email] = online
+                    self._cache[email] = (online, expires)
+                    self._cache.move_to_end(email)
+            while len(self._cache) > self._max_keys:
+                self._cache.popitem(last=False)
+        return result
+
+    def counts(self) -> dict[str, int | None]:
+        """Users online now and, if tracked, unique users today.
+
+        Sums the per-shard counters the ws server keeps next to each
+        shard, plus a PFCOUNT of today's HyperLogLog, so no set is ever
+        read or counted.
+        """
+        counts: dict[str, int | None] = {"online": None, "daily_active": None}
+        if self._client is None:
+            return counts
+        try:
+            with self._client.pipeline(transaction=False) as pipe:
+                for key in self._shards.total_keys:
+                    pipe.get(key)
+                if self._daily_active:
+                    pipe.pfcount(
+                        daily_active_key(datetime.now(timezone.utc).date())
+                    )
+                replies = pipe.execute()
+        except redis.RedisError:
+            logger.warning("Presence backend unavailable")
+            return counts
+
+        totals = replies[: self._shards.count]
+        counts["online"] = sum(max(int(total or 0), 0) for total in totals)
+        if self._daily_active:
+            counts["daily_active"] = replies[-1]
+        return counts
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["presence_lookup"] = self
+
+
+def build_presence_lookup() -> PresenceLookup:
+    if not PRESENCE_REDIS_URL:
+        return PresenceLookup(None)
+    client = redis.Redis.from_url(
+        PRESENCE_REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2
+    )
+    return PresenceLookup(client)
+
+
+def presence_lookup() -> PresenceLookup:
+    """The current app's lookup, built on first use if not set up."""
+    lookup = current_app.extensions.get("presence_lookup")
+    if lookup is None:
+        lookup = current_app.extensions.setdefault(
+            "presence_lookup", build_presence_lookup()
+        )
+    return lookup
@@ -0,0 +1,159 @@
+import re
+from datetime import datetime, timezone
+from html import escape
+from typing import Any
+
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import REAL, Select, and_, cast, func, literal, or_, select
+
+from backend.webapp.chat.models import SEARCH_CONFIG, Message
+from backend.webapp.chat.pagination import decode_cursor, encode_cursor
+
+# Highlight markers inside ts_headline output; stripped from content when
+# archiving so they can be swapped for <mark> after HTML-escaping.
+START_SEL = "\x02"
+STOP_SEL = "\x03"
+_HEADLINE_OPTIONS = (
+    f'StartSel="{START_SEL}", StopSel="{STOP_SEL}", '
+    "MaxWords=24, MinWords=8, MaxFragments=2"
+)
+_SNIPPET_CONTEXT = 60
+
+
+class SearchQueryDTO(BaseModel):
+    q: str = Field(min_length=1, max_length=256)
+    peer: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    limit: int = Field(default=20, ge=1, le=100)
+    cursor: str | None = None
+
+    @field_validator("since", "until")
+    @classmethod
+    def _assume_utc(cls, value: datetime | None) -> datetime | None:
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    rank, message_pk = decode_cursor(cursor, 2)
+    if not isinstance(message_pk, int) or not isinstance(rank, int | float):
+        raise ValueError("invalid cursor")
+    return float(rank), message_pk
+
+
+def build_search_query(
+    dialect: str, email: str, params: SearchQueryDTO
+) -> Select:
+    """Rank `email`'s messages matching `params.q`, best first.
+
+    On Postgres the match uses the GIN-indexed `search_vector` and only the
+    page of `limit + 1` rows gets ranked snippets; other dialects fall back
+    to a substring match ordered by recency.
+    """
+    conditions = [or_(Message.sender == email, Message.recipient == email)]
+    if params.peer:
+        conditions.append(
+            or_(
+                and_(
+                    Message.sender == email, Message.recipient == params.peer
+                ),
+                and_(
+                    Message.sender == params.peer, Message.recipient == email
+                ),
+            )
+        )
+    if params.since:
+        conditions.append(Message.created_at >= params.since)
+    if params.until:
+        conditions.append(Message.created_at < params.until)
+
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, params.q)
+        conditions.append(Message.search_vector.op("@@")(tsquery))
+        rank = func.ts_rank_cd(Message.search_vector, tsquery)
+        snippet = func.ts_headline(
+            SEARCH_CONFIG, Message.content, tsquery, _HEADLINE_OPTIONS
+        )
+    else:
+        conditions.append(
+            Message.search_vector.contains(params.q.lower(), autoescape=True)
+        )
+        rank = cast(literal(0.0), REAL)
+        snippet = Message.content
+
+    if params.cursor:
+        # ts_rank returns real; compare in real so the cursor row's own
+        # rank is equal to itself.
+        last_rank, last_pk = decode_search_cursor(params.cursor)
+        conditions.append(
+            or_(
+                rank < cast(last_rank, REAL),
+                and_(rank == cast(last_rank, REAL), Message.id < last_pk),
+            )
+        )
+
+    page = (
+        select(Message.id, rank.label("rank"))
+        .where(*conditions)
+        .order_by(rank.desc(), Message.id.desc())
+        .limit(params.limit + 1)
+        .subquery()
+    )
+    return (
+        select(Message, page.c.rank, snippet.label("snippet"))
+        .join(page, Message.id == page.c.id)
+        .order_by(page.c.rank.desc(), Message.id.desc())
+    )
+
+
+def _highlight(snippet: str) -> str:
+    return (
+        escape(snippet)
+        .replace(START_SEL, "<mark>")
+        .replace(STOP_SEL, "</mark>")
+    )
+
+
+def _fallback_snippet(content: str, query: str) -> str:
+    match = re.search(re.escape(query), content, re.IGNORECASE)
+    if match is None:
+        return escape(content[: _SNIPPET_CONTEXT * 2])
+    start = max(match.start() - _SNIPPET_CONTEXT, 0)
+    end = match.end() + _SNIPPET_CONTEXT
+    return (
+        escape(content[start : match.start()])
+        + "<mark>"
+        + escape(match.group())
+        + "</mark>"
+        + escape(content[match.end() : end])
+    )
+
+
+def search_results(
+    rows: list[Any], dialect: str, params: SearchQueryDTO
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Serialize a page of rows; the extra row only signals a next page."""
+    page = rows[: params.limit]
+    results = []
+    for message, rank, snippet in page:
+        results.append(
+            {
+                "id": message.message_id,
+                "from": message.sender,
+                "to": message.recipient,
+                "timestamp": message.created_at.isoformat(),
+                "attachment_id": message.attachment_id,
+                "rank": rank,
+                "snippet": _highlight(snippet)
+                if dialect == "postgresql"
+                else _fallback_snippet(snippet, params.q),
+            }
+        )
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        last_message, last_rank, _ = page[-1]
+        next_cursor = encode_cursor(last_rank, last_message.id)
+    return results, next_cursor
@@ -0,0 +1,148 @@
+"""Measure webapp cold start: process launch to first served request.
+
+    python -m backend.webapp.coldstart --runs 3 --workers 2
+
+"in_process" times a fresh interpreter importing the app module, calling
+`create_app()` and serving `/health` through the test client. "gunicorn"
+times launching gunicorn with `gunicorn_conf` until `/health` answers over
+HTTP, with and without preloading the app in the master.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[2]
+
+_IN_PROCESS = """
+import json, time
+started = time.perf_counter()
+from backend.webapp.app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+assert app.test_client().get("/health").status_code == 200
+served = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - started,
+    "create_app_s": created - imported,
+    "first_request_s": served - created,
+}))
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(url: str, proc: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            # Once the master has bound the socket, this blocks until a
+            # worker is ready to serve it.
+            remaining = max(deadline - time.monotonic(), 0.1)
+            with urllib.request.urlopen(url, timeout=remaining) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.005)
+    raise TimeoutError(f"{url} not healthy after {timeout}s")
+
+
+def measure_in_process() -> dict[str, float]:
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _IN_PROCESS],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["total_s"] = time.perf_counter() - started
+    return result
+
+
+def measure_gunicorn(
+    workers: int, preload: bool, timeout: float = 60
+) -> float:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_PRELOAD": "1" if preload else "0",
+    }
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "python:backend.webapp.gunicorn_conf",
+            "backend.webapp.app:create_app()",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_healthy(f"http://127.0.0.1:{port}/health", proc, timeout)
+        return time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait(timeout)
+
+
+def _summary(samples: list[float]) -> dict[str, Any]:
+    return {
+        "median_s": round(statistics.median(samples), 4),
+        "min_s": round(min(samples), 4),
+        "runs": [round(sample, 4) for sample in samples],
+    }
+
+
+def profile(runs: int = 3, workers: int = 2) -> dict[str, Any]:
+    in_process = [measure_in_process() for _ in range(runs)]
+    return {
+        "in_process": {
+            key: _summary([run[key] for run in in_process])
+            for key in in_process[0]
+        },
+        "gunicorn": {
+            "workers": workers,
+            "preload": _summary(
+                [measure_gunicorn(workers, True) for _ in range(runs)]
+            ),
+            "no_preload": _summary(
+                [measure_gunicorn(workers, False) for _ in range(runs)]
+            ),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    print(json.dumps(profile(args.runs, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
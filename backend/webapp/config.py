@@ -1,8 +1,7 @@
 import os
 
-from dotenv import load_dotenv
-
-load_dotenv()
+# Read at import from the process environment. Entry points that want a
+# dotenv file load it first (gunicorn_conf, alembic, `flask --env-file`).
 
 JWT_SECRET = os.getenv("JWT_SECRET", "123somerandomjwtsecret123")
 
@@ -13,6 +12,19 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 
 SQLALCHEMY_DATABASE_URI = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+ASYNC_SQLALCHEMY_DATABASE_URI = os.getenv(
+    "ASYNC_SQLALCHEMY_DATABASE_URI",
+    SQLALCHEMY_DATABASE_URI.replace("postgresql://", "postgresql+asyncpg://"),
+)
+# Serve /auth/* and /chat/* through the async repositories.
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "0").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+# Per worker process; the async engine lives on one long-lived loop.
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "5"))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "10"))
 
 MAIL_CONFIG = {
     "MAIL_USERNAME": os.getenv("MAIL_USERNAME"),
@@ -30,3 +42,96 @@ FLASK_CONFIG = {
 }
 
 FRONTEND_ROOT_DOMAIN = os.getenv("FRONTEND_ROOT_DOMAIN", "")
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Auth rate limits: allowed attempts per RATE_LIMIT_PERIOD seconds.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL") or REDIS_URL
+RATE_LIMIT_PERIOD = float(os.getenv("RATE_LIMIT_PERIOD", "60"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Number of reverse proxies in front of the app whose X-Forwarded-For
+# entries are trusted for the client address; 0 uses the peer address.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+LOGIN_LIMIT_PER_IP = int(os.getenv("LOGIN_LIMIT_PER_IP", "30"))
+LOGIN_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_LIMIT_PER_EMAIL", "10"))
+REGISTER_LIMIT_PER_IP = int(os.getenv("REGISTER_LIMIT_PER_IP", "10"))
+REGISTER_LIMIT_PER_EMAIL = int(os.getenv("REGISTER_LIMIT_PER_EMAIL", "3"))
+
+# Confirmation tokens expire after CONFIRMATION_TOKEN_TTL seconds;
+# `flask auth cleanup` deletes them, and users who never confirmed, in
+# batches every CONFIRMATION_CLEANUP_INTERVAL seconds.
+CONFIRMATION_TOKEN_TTL = int(
+    os.getenv("CONFIRMATION_TOKEN_TTL", str(48 * 3600))
+)
+CONFIRMATION_CLEANUP_BATCH_SIZE = int(
+    os.getenv("CONFIRMATION_CLEANUP_BATCH_SIZE", "1000")
+)
+CONFIRMATION_CLEANUP_PAUSE = float(
+    os.getenv("CONFIRMATION_CLEANUP_PAUSE", "0.05")
+)
+CONFIRMATION_CLEANUP_INTERVAL = float(
+    os.getenv("CONFIRMATION_CLEANUP_INTERVAL", "300")
+)
+
+PROVISION_CHUNK_SIZE = int(os.getenv("PROVISION_CHUNK_SIZE", "1000"))
+# Unset sizes the hashing process pool from the CPU count.
+PROVISION_HASH_WORKERS = (
+    int(os.environ["PROVISION_HASH_WORKERS"])
+    if os.getenv("PROVISION_HASH_WORKERS")
+    else None
+)
+
+# Attachments: partial uploads are staged on local disk, finished files go
+# to blob storage ("local" keeps them under ATTACHMENT_STORAGE_PATH).
+ATTACHMENT_STORAGE = os.getenv("ATTACHMENT_STORAGE", "local")
+ATTACHMENT_STORAGE_PATH = os.getenv(
+    "ATTACHMENT_STORAGE_PATH", "var/attachments"
+)
+ATTACHMENT_UPLOAD_PATH = os.getenv("ATTACHMENT_UPLOAD_PATH", "var/uploads")
+ATTACHMENT_MAX_SIZE = int(os.getenv("ATTACHMENT_MAX_SIZE", str(50 * 1024**2)))
+# Suggested chunk size returned to clients when an upload starts.
+ATTACHMENT_CHUNK_SIZE = int(
+    os.getenv("ATTACHMENT_CHUNK_SIZE", str(5 * 1024**2))
+)
+# Uploads expire ATTACHMENT_UPLOAD_TTL seconds after they start; `flask
+# attachments cleanup` deletes them and their partial files every
+# ATTACHMENT_CLEANUP_INTERVAL seconds.
+ATTACHMENT_UPLOAD_TTL = int(os.getenv("ATTACHMENT_UPLOAD_TTL", str(24 * 3600)))
+ATTACHMENT_CLEANUP_INTERVAL = float(
+    os.getenv("ATTACHMENT_CLEANUP_INTERVAL", "3600")
+)
+
+# Chat history: the ws server appends direct messages to this Redis stream
+# and `flask chat archive` copies them into the message table.
+CHAT_HISTORY_REDIS_URL = os.getenv("CHAT_HISTORY_REDIS_URL") or REDIS_URL
+CHAT_HISTORY_STREAM = os.getenv("CHAT_HISTORY_STREAM", "chat:history")
+CHAT_ARCHIVE_BATCH_SIZE = int(os.getenv("CHAT_ARCHIVE_BATCH_SIZE", "500"))
+
+# Online state written by the ws server; merged into /chat/users.
+PRESENCE_REDIS_URL = os.getenv("PRESENCE_REDIS_URL") or REDIS_URL
+PRESENCE_ONLINE_SET = os.getenv("PRESENCE_ONLINE_SET", "chat:online_users")
+# Must match the ws server, which reads the same variables.
+PRESENCE_SHARDS = int(os.getenv("PRESENCE_SHARDS", "16"))
+PRESENCE_DAILY_ACTIVE = os.getenv("PRESENCE_DAILY_ACTIVE", "0").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+PRESENCE_CACHE_TTL = float(os.getenv("PRESENCE_CACHE_TTL", "2"))
+PRESENCE_CACHE_MAX_KEYS = int(os.getenv("PRESENCE_CACHE_MAX_KEYS", "100000"))
+
+# Request instrumentation: Prometheus text at /metrics (per worker process),
+# guarded by a bearer token; it is only served when METRICS_TOKEN is set.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
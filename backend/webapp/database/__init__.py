@@ -1 +1,3 @@
+from .async_sql import async_session as async_session
+from .async_sql import run_async as run_async
 from .sql import db as db
@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from backend.webapp.config import (
+    ASYNC_DB_MAX_OVERFLOW,
+    ASYNC_DB_POOL_SIZE,
+    ASYNC_SQLALCHEMY_DATABASE_URI,
+)
+
+T = TypeVar("T")
+
+_engine: AsyncEngine | None = None
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid: int | None = None
+_loop_lock = threading.Lock()
+
+
+def _database_loop() -> asyncio.AbstractEventLoop:
+    """The worker process's long-lived event loop for async queries.
+
+    Pooled asyncpg connections are bound to the loop that opened them, so
+    every async query of a worker runs on this one loop, in a daemon
+    thread started on first use (after any fork).
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(
+                target=_loop.run_forever, name="async-db", daemon=True
+            ).start()
+        return _loop
+
+
+async def _in_context(
+    context: contextvars.Context, coro: Coroutine[Any, Any, T]
+) -> T:
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run `coro` on the database loop and wait for its result.
+
+    The caller's context variables, Flask's app and request contexts
+    among them, are carried over, so queries are still charged to the
+    request that issued them.
+    """
+    context = contextvars.copy_context()
+    return asyncio.run_coroutine_threadsafe(
+        _in_context(context, coro), _database_loop()
+    ).result()
+
+
+def configure_async_db(url: str = ASYNC_SQLALCHEMY_DATABASE_URI) -> None:
+    """(Re)create the pooled async engine used by the async repositories."""
+    global _engine, _session_factory
+    if _engine is not None:
+        run_async(_engine.dispose())
+    pool_args: dict[str, Any] = {}
+    if make_url(url).get_backend_name() != "sqlite":
+        pool_args = {
+            "pool_size": ASYNC_DB_POOL_SIZE,
+            "max_overflow": ASYNC_DB_MAX_OVERFLOW,
+            "pool_pre_ping": True,
+        }
+    _engine = create_async_engine(url, **pool_args)
+    _session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+
+
+def async_session() -> AsyncSession:
+    """A session on the pooled engine; use it inside `run_async`."""
+    if _session_factory is None:
+        configure_async_db()
+    assert _session_factory
+    return _session_factory()
@@ -0,0 +1,99 @@
+"""Gunicorn settings: `gunicorn -c python:backend.webapp.gunicorn_conf
+'backend.webapp.app:create_app()'`.
+
+The app is preloaded in the master and forked into workers, so imported
+code and module state are shared copy-on-write instead of rebuilt per
+worker.
+"""
+
+import gc
+import logging
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Before the app (and so backend.webapp.config) is imported.
+load_dotenv(Path(__file__).resolve().parents[1] / ".env")
+
+logger = logging.getLogger("gunicorn.error")
+
+DEFAULT_THREADS = 4
+
+
+def usable_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def size_workers(cpus: int) -> tuple[int, str, int]:
+    """(workers, worker class, threads per worker) for `cpus` CPUs.
+
+    Requests mostly wait on Postgres, Redis or SMTP and Argon2 releases
+    the GIL, so threaded workers keep a core busy; one spare process
+    covers a worker that is restarting or collecting garbage.
+    """
+    return max(cpus, 1) + 1, "gthread", DEFAULT_THREADS
+
+
+_workers, _worker_class, _threads = size_workers(usable_cpus())
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY") or _workers)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", _worker_class)
+threads = int(os.getenv("GUNICORN_THREADS") or _threads)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+
+
+def check_rate_limit_backend(workers: int) -> bool:
+    """Warn when per-process rate limits are multiplied by `workers`."""
+    from backend.webapp.config import RATE_LIMIT_ENABLED, RATE_LIMIT_REDIS_URL
+
+    if workers <= 1 or not RATE_LIMIT_ENABLED or RATE_LIMIT_REDIS_URL:
+        return True
+    logger.warning(
+        "Auth rate limits are kept in memory by each of %s workers, so "
+        "clients get up to %sx the configured limits; set "
+        "RATE_LIMIT_REDIS_URL (or REDIS_URL) to share them",
+        workers,
+        workers,
+    )
+    return False
+
+
+def when_ready(server):
+    check_rate_limit_backend(server.cfg.workers)
+    # Move everything loaded so far out of the collector's generations, so
+    # collections in the workers do not write to (and unshare) its pages.
+    if server.cfg.preload_app:
+        gc.freeze()
+
+
+def pre_fork(server, worker):
+    worker.fork_started = time.monotonic()
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # Connection pools must not be shared with the master.
+    from backend.webapp.database import db
+
+    with worker.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    logger.info(
+        "Worker %s ready %.1f ms after fork",
+        worker.pid,
+        (time.monotonic() - worker.fork_started) * 1000,
+    )
@@ -0,0 +1,237 @@
+import hmac
+import threading
+import time
+from collections import Counter, defaultdict
+from logging import getLogger
+from typing import Any
+
+from flask import (
+    Flask,
+    Response,
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+    request,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.webapp.auth.infrastructure.tokens import get_bearer_token
+from backend.webapp.config import (
+    METRICS_ENABLED,
+    METRICS_TOKEN,
+    SLOW_QUERY_MS,
+    SLOW_REQUEST_MS,
+)
+from backend.ws_server.metrics import LatencyHistogram
+
+logger = getLogger(__name__)
+
+_MAX_LOGGED_STATEMENT = 1000
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Keep the shape of bound parameters, never their values."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, list):
+        # executemany: one parameter set per row.
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, tuple):
+        return tuple(type(value).__name__ for value in parameters)
+    return type(parameters).__name__
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class RequestInstrumentation:
+    """Per-endpoint latency histograms and database cost of each request.
+
+    Queries are timed by engine-wide cursor events and charged to the
+    request that issued them and to its app's instance, so each app gets
+    its own. Requests slower than `SLOW_REQUEST_MS` and queries slower
+    than `SLOW_QUERY_MS` are logged. Recording is a few counter updates
+    under one lock, cheap enough to leave on.
+    """
+
+    def __init__(
+        self,
+        slow_request_ms: float = SLOW_REQUEST_MS,
+        slow_query_ms: float = SLOW_QUERY_MS,
+        metrics_token: str | None = METRICS_TOKEN,
+    ) -> None:
+        self.slow_request_ms = slow_request_ms
+        self.slow_query_ms = slow_query_ms
+        self._metrics_token = metrics_token
+        self._lock = threading.Lock()
+        self._latency: dict[tuple[str, str], LatencyHistogram] = {}
+        self._responses: Counter[tuple[str, str, str]] = Counter()
+        self._db_queries: Counter[str] = Counter()
+        self._db_seconds: defaultdict[str, float] = defaultdict(float)
+        self._slow_queries = 0
+
+    def init_app(self, app: Flask) -> None:
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule(
+            "/metrics", "metrics", self._metrics_view, methods=["GET"]
+        )
+        app.extensions["request_instrumentation"] = self
+        if not event.contains(
+            Engine, "before_cursor_execute", _before_cursor_execute
+        ):
+            event.listen(
+                Engine, "before_cursor_execute", _before_cursor_execute
+            )
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(Engine, "handle_error", _handle_error)
+
+    @staticmethod
+    def _start_request() -> None:
+        g.request_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_seconds = 0.0
+
+    def _finish_request(self, response: Response) -> Response:
+        started = g.get("request_started")
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or "unmatched"
+        queries = g.get("db_queries", 0)
+        db_seconds = g.get("db_seconds", 0.0)
+
+        with self._lock:
+            histogram = self._latency.get((endpoint, request.method))
+            if histogram is None:
+                histogram = self._latency[(endpoint, request.method)] = (
+                    LatencyHistogram()
+                )
+            histogram.observe(elapsed)
+            self._responses[
+                (endpoint, request.method, f"{response.status_code // 100}xx")
+            ] += 1
+            self._db_queries[endpoint] += queries
+            self._db_seconds[endpoint] += db_seconds
+
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_seconds * 1000:.1f};desc="{queries} queries", '
+            f"app;dur={elapsed * 1000:.1f}"
+        )
+        if elapsed * 1000 >= self.slow_request_ms:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %s queries in %.1f ms",
+                request.method,
+                endpoint,
+                elapsed * 1000,
+                queries,
+                db_seconds * 1000,
+            )
+        return response
+
+    def record_query(
+        self, statement: str, parameters: Any, elapsed: float
+    ) -> None:
+        if elapsed * 1000 < self.slow_query_ms:
+            return
+        with self._lock:
+            self._slow_queries += 1
+        logger.warning(
+            "Slow query (%.1f ms): %s params=%s",
+            elapsed * 1000,
+            statement[:_MAX_LOGGED_STATEMENT],
+            redact_parameters(parameters),
+        )
+
+    def _metrics_view(self) -> Response:
+        # Without a token the endpoint stays off rather than open.
+        if not METRICS_ENABLED or not self._metrics_token:
+            return Response(status=404)
+        if not hmac.compare_digest(
+            get_bearer_token() or "", self._metrics_token
+        ):
+            return Response(status=401)
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    def render(self) -> str:
+        """Prometheus text exposition of everything recorded so far."""
+        lines = [
+            "# TYPE webapp_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (endpoint, method), histogram in sorted(self._latency.items()):
+                labels = f'endpoint="{_label(endpoint)}",method="{method}"'
+                for bound_ms, count in histogram.cumulative():
+                    le = (
+                        "+Inf" if bound_ms == float("inf") else bound_ms / 1000
+                    )
+                    lines.append(
+                        "webapp_request_duration_seconds_bucket"
+                        f'{{{labels},le="{le}"}} {count}'
+                    )
+                lines.append(
+                    f"webapp_request_duration_seconds_sum{{{labels}}} "
+                    f"{histogram.sum_ms / 1000}"
+                )
+                lines.append(
+                    f"webapp_request_duration_seconds_count{{{labels}}} "
+                    f"{histogram.count}"
+                )
+
+            lines.append("# TYPE webapp_responses_total counter")
+            for (endpoint, method, status), count in sorted(
+                self._responses.items()
+            ):
+                lines.append(
+                    f'webapp_responses_total{{endpoint="{_label(endpoint)}",'
+                    f'method="{method}",status="{status}"}} {count}'
+                )
+
+            lines.append("# TYPE webapp_db_queries_total counter")
+            for endpoint, count in sorted(self._db_queries.items()):
+                lines.append(
+                    f'webapp_db_queries_total{{endpoint="{_label(endpoint)}"}}'
+                    f" {count}"
+                )
+
+            lines.append("# TYPE webapp_db_query_seconds_total counter")
+            for endpoint, seconds in sorted(self._db_seconds.items()):
+                lines.append(
+                    "webapp_db_query_seconds_total"
+                    f'{{endpoint="{_label(endpoint)}"}} {seconds}'
+                )
+
+            lines.append("# TYPE webapp_slow_queries_total counter")
+            lines.append(f"webapp_slow_queries_total {self._slow_queries}")
+        return "\n".join(lines) + "\n"
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    if not has_app_context():
+        return
+    if has_request_context() and "request_started" in g:
+        g.db_queries += 1
+        g.db_seconds += elapsed
+    owner = current_app.extensions.get("request_instrumentation")
+    if owner is not None:
+        owner.record_query(statement, parameters, elapsed)
+
+
+def _handle_error(context) -> None:
+    # A failed statement never reaches after_cursor_execute.
+    connection = context.connection
+    started = connection.info.get("query_started") if connection else None
+    if started:
+        started.pop()
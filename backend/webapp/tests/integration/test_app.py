@@ -0,0 +1,38 @@
+from backend.webapp import config
+from backend.webapp.app import create_app
+from backend.webapp.gunicorn_conf import check_rate_limit_backend, size_workers
+
+
+def test_create_app_builds_independent_apps():
+    first = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    second = create_app(
+        {"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True}
+    )
+
+    assert first is not second
+    assert not first.testing and second.testing
+    response = second.test_client().get("/health")
+    assert response.status_code == 200
+    assert "app;dur=" in response.headers["Server-Timing"]
+    assert {"auth", "chat", "attachments"} <= set(second.blueprints)
+    for extension in (
+        "request_instrumentation",
+        "auth_rate_limits",
+        "presence_lookup",
+    ):
+        assert first.extensions[extension] is not second.extensions[extension]
+
+
+def test_workers_are_sized_from_cpu_count():
+    assert size_workers(1) == (2, "gthread", 4)
+    assert size_workers(8) == (9, "gthread", 4)
+
+
+def test_local_rate_limits_warn_with_several_workers(monkeypatch):
+    monkeypatch.setattr(config, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(config, "RATE_LIMIT_REDIS_URL", None)
+    assert check_rate_limit_backend(1)
+    assert not check_rate_limit_backend(9)
+
+    monkeypatch.setattr(config, "RATE_LIMIT_REDIS_URL", "redis://redis")
+    assert check_rate_limit_backend(9)
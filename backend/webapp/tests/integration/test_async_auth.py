@@ -0,0 +1,136 @@
+import pytest
+from argon2 import PasswordHasher
+from flask import Flask
+from sqlalchemy import create_engine, select
+
+from backend.webapp.auth.domain.dtos import (
+    UserConfirmationInput,
+    UserLoginInputDTO,
+)
+from backend.webapp.auth.domain.enums import LoginStatus, RegistrationStatus
+from backend.webapp.auth.domain.service.confirm import (
+    AsyncUserConfirmationService,
+)
+from backend.webapp.auth.domain.service.login import AsyncLoginService
+from backend.webapp.auth.domain.service.register import (
+    AsyncRegistrationService,
+)
+from backend.webapp.auth.infrastructure import api
+from backend.webapp.auth.infrastructure.external import (
+    UserConfirmationMailDelivery,
+)
+from backend.webapp.auth.infrastructure.models import Confirmation
+from backend.webapp.auth.infrastructure.repository import (
+    AsyncConfirmationDatabaseRepository,
+    AsyncUsersDatabaseRepository,
+)
+from backend.webapp.database import async_session, async_sql, run_async
+from backend.webapp.database.sql import db
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    engine.dispose()
+    async_sql.configure_async_db(f"sqlite+aiosqlite:///{path}")
+    yield
+    run_async(async_sql._engine.dispose())
+    async_sql._engine = async_sql._session_factory = None
+
+
+async def _register_confirm_login(delivery_service, email, password):
+    async with async_session() as session:
+        users_repo = AsyncUsersDatabaseRepository(session)
+        confirm_repo = AsyncConfirmationDatabaseRepository(session)
+        registration = await AsyncRegistrationService(
+            users_repo, delivery_service, confirm_repo
+        ).register(email, password)
+
+        login_service = AsyncLoginService(users_repo)
+        before = await login_service.login(
+            UserLoginInputDTO(email=email, password=password)
+        )
+
+        token = (
+            await session.execute(
+                select(Confirmation.token).where(Confirmation.email == email)
+            )
+        ).scalar_one()
+        confirmation = await AsyncUserConfirmationService(
+            delivery_service, confirm_repo
+        ).confirm(UserConfirmationInput(email=email, token=token))
+
+        after = await login_service.login(
+            UserLoginInputDTO(email=email, password=password)
+        )
+    return registration, before, confirmation, after
+
+
+def test_async_register_confirm_and_login(async_db, delivery_service):
+    registration, before, confirmation, after = run_async(
+        _register_confirm_login(
+            delivery_service, "async@example.com", "secret-pass"
+        )
+    )
+
+    assert registration.status == RegistrationStatus.success
+    assert before.status == LoginStatus.email_unverified
+    assert confirmation.success is True
+    assert after.status == LoginStatus.successful
+
+
+def test_async_register_existing_email_skips_hashing(
+    async_db, delivery_service, monkeypatch
+):
+    async def _register_twice():
+        async with async_session() as session:
+            service = AsyncRegistrationService(
+                AsyncUsersDatabaseRepository(session),
+                delivery_service,
+                AsyncConfirmationDatabaseRepository(session),
+            )
+            await service.register("twice@example.com", "secret-pass")
+            monkeypatch.setattr(PasswordHasher, "hash", hash_spy)
+            return await service.register("twice@example.com", "other")
+
+    def hash_spy(self, password):
+        raise AssertionError("existing email was hashed")
+
+    result = run_async(_register_twice())
+    assert result.status == RegistrationStatus.failure
+
+
+def test_async_activate_unknown_user_raises(async_db):
+    async def _activate():
+        async with async_session() as session:
+            await AsyncConfirmationDatabaseRepository(session).activate_user(
+                "ghost@example.com"
+            )
+
+    with pytest.raises(ValueError):
+        run_async(_activate())
+
+
+def test_async_views_use_async_repositories(async_db, monkeypatch):
+    monkeypatch.setattr(api, "ASYNC_DB_ENABLED", True)
+    monkeypatch.setattr(
+        UserConfirmationMailDelivery,
+        "send_confirmation",
+        lambda self, email, token: None,
+    )
+    app = Flask(__name__)
+    app.register_blueprint(api.auth_bp)
+    client = app.test_client()
+
+    email = "async.view@example.com"
+    response = client.post(
+        "/auth/register", json={"email": email, "password": "secret-pass"}
+    )
+    assert response.status_code == 201
+
+    response = client.post(
+        "/auth/login", json={"email": email, "password": "secret-pass"}
+    )
+    assert response.status_code == 401
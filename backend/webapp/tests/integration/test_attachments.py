@@ -0,0 +1,276 @@
+import fcntl
+import hashlib
+import json
+from datetime import timedelta
+
+import jwt
+import pytest
+from flask import Flask
+
+from backend.webapp.attachments.domain.service.attachments import (
+    AttachmentService,
+)
+from backend.webapp.attachments.infrastructure import api
+from backend.webapp.attachments.infrastructure.api import attachments_bp
+from backend.webapp.attachments.infrastructure.repository import (
+    AttachmentDatabaseRepository,
+)
+from backend.webapp.attachments.infrastructure.storage import (
+    LocalBlobStorage,
+    LocalUploadStaging,
+)
+from backend.webapp.chat.history import archive_entries
+from backend.webapp.config import JWT_SECRET
+from backend.webapp.database import db
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def blobs(tmp_path, monkeypatch):
+    storage = LocalBlobStorage(tmp_path / "blobs")
+    monkeypatch.setattr(api, "build_blob_storage", lambda: storage)
+    monkeypatch.setattr(
+        api,
+        "build_upload_staging",
+        lambda: LocalUploadStaging(tmp_path / "uploads"),
+    )
+    return tmp_path / "blobs"
+
+
+@pytest.fixture
+def client(sql_session, blobs):
+    app = Flask(__name__)
+    app.config.update(
+        {"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True}
+    )
+    db.init_app(app)
+    db.session = sql_session
+    app.register_blueprint(attachments_bp)
+    return app.test_client()
+
+
+def _auth(email: str = "uploader@example.com") -> dict[str, str]:
+    token = jwt.encode({"email": email, "role": "user"}, JWT_SECRET)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _start(
+    client, size: int = len(CONTENT), content_type: str = "image/png"
+) -> str:
+    response = client.post(
+        "/attachments/uploads",
+        json={
+            "filename": "pic.png",
+            "content_type": content_type,
+            "size": size,
+        },
+        headers=_auth(),
+    )
+    assert response.status_code == 201
+    return response.json["upload_id"]
+
+
+def _upload(
+    client, data: bytes = CONTENT, content_type: str = "image/png"
+) -> dict:
+    upload_id = _start(client, len(data), content_type)
+    response = client.patch(
+        f"/attachments/uploads/{upload_id}",
+        data=data,
+        headers={**_auth(), "Upload-Offset": "0"},
+    )
+    assert response.status_code == 201
+    return response.json["attachment"]
+
+
+def test_upload_resumes_from_reported_offset(client):
+    upload_id = _start(client)
+    url = f"/attachments/uploads/{upload_id}"
+
+    first = client.patch(
+        url, data=CONTENT[:4000], headers={**_auth(), "Upload-Offset": "0"}
+    )
+    assert first.status_code == 200
+    assert first.json["offset"] == 4000
+
+    stale = client.patch(
+        url, data=CONTENT[:10], headers={**_auth(), "Upload-Offset": "0"}
+    )
+    assert stale.status_code == 409
+
+    offset = client.get(url, headers=_auth()).json["offset"]
+    assert (
+        client.get(url, headers=_auth("other@example.com")).status_code == 404
+    )
+
+    done = client.patch(
+        url,
+        data=CONTENT[offset:],
+        headers={**_auth(), "Upload-Offset": str(offset)},
+    )
+    assert done.status_code == 201
+    attachment = done.json["attachment"]
+    assert attachment["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    assert attachment["size"] == len(CONTENT)
+
+    # A retry of the final chunk, or a status check, still reports it.
+    retry = client.patch(
+        url,
+        data=CONTENT[offset:],
+        headers={**_auth(), "Upload-Offset": str(offset)},
+    )
+    assert retry.status_code == 201
+    assert retry.json["attachment"] == attachment
+    status = client.get(url, headers=_auth()).json
+    assert status["offset"] == len(CONTENT)
+    assert status["attachment"] == attachment
+
+
+def test_concurrent_chunk_at_same_offset_is_rejected(client, tmp_path):
+    upload_id = _start(client)
+    url = f"/attachments/uploads/{upload_id}"
+    staged = LocalUploadStaging(tmp_path / "uploads").path(upload_id)
+
+    # Another request is mid-append at offset 0.
+    with staged.open("ab") as other:
+        fcntl.flock(other, fcntl.LOCK_EX)
+        racing = client.patch(
+            url, data=CONTENT[:10], headers={**_auth(), "Upload-Offset": "0"}
+        )
+    assert racing.status_code == 409
+    assert staged.stat().st_size == 0
+
+
+def test_empty_chunk_is_rejected(client):
+    upload_id = _start(client, size=10)
+    response = client.patch(
+        f"/attachments/uploads/{upload_id}",
+        data=b"",
+        headers={**_auth(), "Upload-Offset": "0"},
+    )
+    assert response.status_code == 400
+    assert response.json["offset"] == 0
+
+
+def test_chunk_past_declared_size_is_rejected(client):
+    upload_id = _start(client, size=10)
+    response = client.patch(
+        f"/attachments/uploads/{upload_id}",
+        data=b"x" * 11,
+        headers={**_auth(), "Upload-Offset": "0"},
+    )
+    assert response.status_code == 413
+    assert response.json["offset"] == 0
+
+
+def test_identical_uploads_share_one_blob(client, blobs):
+    first = _upload(client)
+    second = _upload(client)
+
+    assert first["id"] != second["id"]
+    assert first["sha256"] == second["sha256"]
+    assert len([p for p in blobs.rglob("*") if p.is_file()]) == 1
+
+
+def test_download_supports_ranges(client):
+    attachment = _upload(client)
+    url = f"/attachments/{attachment['id']}"
+
+    full = client.get(url, headers=_auth())
+    assert full.status_code == 200
+    assert full.data == CONTENT
+    assert full.headers["Accept-Ranges"] == "bytes"
+    assert full.headers["Content-Type"] == "image/png"
+    assert full.headers["Content-Disposition"].startswith("inline")
+    assert full.headers["X-Content-Type-Options"] == "nosniff"
+
+    partial = client.get(url, headers={**_auth(), "Range": "bytes=100-299"})
+    assert partial.status_code == 206
+    assert partial.data == CONTENT[100:300]
+    assert partial.headers["Content-Range"] == f"bytes 100-299/{len(CONTENT)}"
+
+    unsatisfiable = client.get(
+        url, headers={**_auth(), "Range": f"bytes={len(CONTENT)}-"}
+    )
+    assert unsatisfiable.status_code == 416
+
+    info = client.get(f"{url}/info", headers=_auth())
+    assert info.json == attachment
+
+    cached = client.get(
+        url, headers={**_auth(), "If-None-Match": full.headers["ETag"]}
+    )
+    assert cached.status_code == 304
+
+
+def test_scriptable_types_are_served_as_downloads(client):
+    attachment = _upload(client, b"<svg onload=alert(1)>", "image/svg+xml")
+
+    response = client.get(f"/attachments/{attachment['id']}", headers=_auth())
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    assert response.headers["Content-Disposition"].startswith("attachment")
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+    invalid = client.post(
+        "/attachments/uploads",
+        json={"filename": "x", "content_type": "text/html\n", "size": 1},
+        headers=_auth(),
+    )
+    assert invalid.status_code == 400
+
+
+def test_only_owner_and_message_parties_see_an_attachment(client, sql_session):
+    attachment = _upload(client)
+    url = f"/attachments/{attachment['id']}"
+    recipient = _auth("recipient@example.com")
+    assert client.get(url, headers=recipient).status_code == 404
+
+    payload = {
+        "id": "a" * 32,
+        "from": "uploader@example.com",
+        "to": "recipient@example.com",
+        "content": "",
+        "attachment": {"id": attachment["id"]},
+        "timestamp": "2026-03-01T12:00:00+00:00",
+    }
+    archive_entries(
+        sql_session,
+        [("1-0", {"event": "message", "payload": json.dumps(payload)})],
+    )
+
+    assert client.get(url, headers=recipient).status_code == 200
+    assert client.get(f"{url}/info", headers=recipient).status_code == 200
+    stranger = _auth("stranger@example.com")
+    assert client.get(url, headers=stranger).status_code == 404
+    assert client.get(f"{url}/info", headers=stranger).status_code == 404
+
+
+def test_expired_uploads_are_deleted_with_their_parts(
+    client, sql_session, tmp_path
+):
+    upload_id = _start(client)
+    url = f"/attachments/uploads/{upload_id}"
+    client.patch(
+        url, data=CONTENT[:10], headers={**_auth(), "Upload-Offset": "0"}
+    )
+    staging = LocalUploadStaging(tmp_path / "uploads")
+    assert staging.size(upload_id) == 10
+
+    service = AttachmentService(
+        AttachmentDatabaseRepository(sql_session),
+        staging,
+        LocalBlobStorage(tmp_path / "blobs"),
+        max_size=len(CONTENT),
+        upload_ttl=timedelta(0),
+    )
+    assert service.expire_uploads() >= 1
+
+    assert client.get(url, headers=_auth()).status_code == 404
+    assert not staging.path(upload_id).exists()
+
+
+def test_storage_keys_must_be_bare_hex(tmp_path):
+    staging = LocalUploadStaging(tmp_path / "uploads")
+    with pytest.raises(ValueError):
+        staging.path("a" * 32 + "\n")
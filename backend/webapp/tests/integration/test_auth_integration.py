@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from argon2 import PasswordHasher
 from sqlalchemy import select
@@ -11,9 +13,19 @@ from backend.webapp.auth.domain.enums import (
     RegistrationStatus,
     Role,
 )
+from backend.webapp.auth.domain.service.cleanup import (
+    ConfirmationCleanupService,
+)
+from backend.webapp.auth.domain.service.confirm import UserConfirmationService
 from backend.webapp.auth.domain.service.login import LoginService
+from backend.webapp.auth.domain.service.provision import (
+    BulkProvisioningService,
+)
 from backend.webapp.auth.infrastructure.models import Confirmation, User
 from backend.webapp.auth.infrastructure.repository import (
+    BulkUsersDatabaseRepository,
+    ConfirmationCleanupDatabaseRepository,
+    ConfirmationDatabaseRepository,
     UsersDatabaseRepository,
 )
 
@@ -115,3 +127,148 @@ def test_stored_user_token_is_used_to_confirm_user(
         ).success
         is True
     )
+
+
+def test_expired_token_is_rejected(sql_session, delivery_service):
+    mail = "late@mail.eu"
+    sql_session.add(
+        User(email=mail, hash="212121212", role=Role.user, is_active=False)
+    )
+    sql_session.add(
+        Confirmation(
+            email=mail,
+            token="123",
+            created_at=datetime.now(timezone.utc) - timedelta(hours=2),
+        )
+    )
+    sql_session.commit()
+    service = UserConfirmationService(
+        delivery_service,
+        ConfirmationDatabaseRepository(sql_session),
+        token_ttl=timedelta(hours=1),
+    )
+
+    result = service.confirm(UserConfirmationInput(email=mail, token="123"))
+
+    assert result.success is False
+    assert result.reason == "token expired"
+
+
+def test_cleanup_deletes_expired_tokens_and_unconfirmed_users_in_batches(
+    sql_session,
+):
+    old = datetime.now(timezone.utc) - timedelta(days=3)
+    emails = [f"stale{i}@cleanup.eu" for i in range(5)]
+    for email in emails:
+        sql_session.add(
+            User(email=email, hash="h", role=Role.user, is_active=False)
+        )
+        sql_session.add(Confirmation(email=email, token="t", created_at=old))
+    # Confirmed in the meantime, but its token was never removed.
+    sql_session.add(
+        User(
+            email="active@cleanup.eu", hash="h", role=Role.user, is_active=True
+        )
+    )
+    sql_session.add(
+        Confirmation(email="active@cleanup.eu", token="t", created_at=old)
+    )
+    sql_session.add(
+        User(
+            email="fresh@cleanup.eu", hash="h", role=Role.user, is_active=False
+        )
+    )
+    sql_session.add(Confirmation(email="fresh@cleanup.eu", token="t"))
+    sql_session.commit()
+
+    report = ConfirmationCleanupService(
+        ConfirmationCleanupDatabaseRepository(sql_session),
+        token_ttl=timedelta(days=1),
+        batch_size=2,
+    ).run()
+
+    assert (report.expired_tokens, report.unconfirmed_users) == (6, 5)
+    assert report.batches == 3
+    remaining = set(
+        sql_session.execute(
+            select(User.email).where(User.email.like("%@cleanup.eu"))
+        ).scalars()
+    )
+    assert remaining == {"active@cleanup.eu", "fresh@cleanup.eu"}
+    assert sql_session.execute(
+        select(Confirmation.email).where(
+            Confirmation.email.like("%@cleanup.eu")
+        )
+    ).scalars().all() == ["fresh@cleanup.eu"]
+
+
+def test_bulk_provisioning_skips_existing_and_invalid(
+    sql_session, delivery_service, register_service
+):
+    register_service.register(email="bulk0@example.com", password="pass")
+    sent: list[tuple[str, str]] = []
+    delivery_service.send_confirmations = sent.extend
+
+    records = [
+        {"email": "bulk0@example.com", "password": "pass"},
+        {"email": "bulk1@example.com", "password": "pass"},
+        {"email": "bulk2@example.com", "password": "pass", "role": "admin"},
+        {"email": "bulk2@example.com", "password": "pass"},
+        {"email": "not-an-email", "password": "pass"},
+        {"email": "bulk3@example.com"},
+    ]
+    report = BulkProvisioningService(
+        BulkUsersDatabaseRepository(sql_session),
+        delivery_service,
+        chunk_size=2,
+        hash_workers=0,
+    ).provision(records)
+
+    assert report.created == 2
+    assert report.skipped_existing == 2
+    assert report.invalid == 2
+    assert {email for email, _ in sent} == {
+        "bulk1@example.com",
+        "bulk2@example.com",
+    }
+
+    admin = sql_session.execute(
+        select(User).where(User.email == "bulk2@example.com")
+    ).scalar_one()
+    assert admin.role == Role.admin
+    assert admin.is_active is False
+    token = sql_session.execute(
+        select(Confirmation.token).where(
+            Confirmation.email == "bulk2@example.com"
+        )
+    ).scalar_one()
+    assert (admin.email, token) in sent
+
+
+def test_bulk_provisioning_skips_users_registered_meanwhile(
+    sql_session, delivery_service, register_service
+):
+    class StaleLookupRepository(BulkUsersDatabaseRepository):
+        # As if the user registered after the chunk was checked.
+        def find_existing_emails(self, emails: list[str]) -> set[str]:
+            register_service.register(email="race0@example.com", password="x")
+            return set()
+
+    sent: list[tuple[str, str]] = []
+    delivery_service.send_confirmations = sent.extend
+
+    report = BulkProvisioningService(
+        StaleLookupRepository(sql_session),
+        delivery_service,
+        chunk_size=10,
+        hash_workers=0,
+    ).provision(
+        [
+            {"email": "race0@example.com", "password": "pass"},
+            {"email": "race1@example.com", "password": "pass"},
+        ]
+    )
+
+    assert report.created == 1
+    assert report.skipped_existing == 1
+    assert [email for email, _ in sent] == ["race1@example.com"]
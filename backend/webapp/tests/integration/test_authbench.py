@@ -0,0 +1,24 @@
+import copy
+
+from backend.webapp.authbench import compare, run
+
+
+def test_benchmark_reports_hashing_and_database_time():
+    report = run("sqlite://", iterations=2, warmup=0)
+
+    assert report["database"] == "sqlite"
+    for layer in ("services", "endpoints"):
+        results = report[layer]
+        assert set(results) == {"register", "confirm", "login"}
+        assert results["login"]["hash_ms"]["mean"] > 0
+        assert results["confirm"]["hash_ms"]["mean"] == 0
+        assert all(
+            result["requests"] == 2 and result["queries_per_request"] > 0
+            for result in results.values()
+        )
+
+    assert compare(report, report, tolerance=0) == []
+    regressed = copy.deepcopy(report)
+    regressed["services"]["login"]["queries_per_request"] += 1
+    regressed["argon2"]["time_cost"] += 1
+    assert len(compare(report, regressed, tolerance=0.25)) == 2
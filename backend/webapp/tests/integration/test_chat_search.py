@@ -0,0 +1,103 @@
+import json
+
+import jwt
+import pytest
+from flask import Flask
+
+from backend.webapp.chat.api import chat_bp
+from backend.webapp.chat.history import archive_entries
+from backend.webapp.config import JWT_SECRET
+from backend.webapp.database import db
+
+ALICE = "alice.search@example.com"
+BOB = "bob.search@example.com"
+CAROL = "carol.search@example.com"
+
+
+def _entry(n: int, sender: str, recipient: str, content: str):
+    payload = {
+        "type": "message",
+        "id": f"search{n:026d}",
+        "from": sender,
+        "to": recipient,
+        "content": content,
+        "timestamp": f"2026-03-{n:02d}T12:00:00+00:00",
+    }
+    return (f"{n}-0", {"event": "message", "payload": json.dumps(payload)})
+
+
+@pytest.fixture(scope="module")
+def history(sql_session):
+    entries = [
+        _entry(1, ALICE, BOB, "Lunch at noon?"),
+        _entry(2, BOB, ALICE, "Sure, the <b>usual</b> place for lunch"),
+        _entry(3, CAROL, ALICE, "Lunch tomorrow instead"),
+        _entry(4, BOB, CAROL, "lunch without alice"),
+        _entry(5, ALICE, BOB, "Dinner later"),
+    ]
+    assert archive_entries(sql_session, entries) == 5
+    # Redelivered entries are skipped.
+    assert archive_entries(sql_session, entries[:2]) == 0
+
+
+@pytest.fixture
+def client(sql_session, history):
+    app = Flask(__name__)
+    app.config.update(
+        {"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True}
+    )
+    db.init_app(app)
+    db.session = sql_session
+    app.register_blueprint(chat_bp)
+    return app.test_client()
+
+
+def _search(client, email: str = ALICE, **params):
+    token = jwt.encode({"email": email, "role": "user"}, JWT_SECRET)
+    return client.get(
+        "/chat/search",
+        query_string=params,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def test_search_only_covers_own_messages(client):
+    response = _search(client, q="lunch")
+
+    assert response.status_code == 200
+    ids = [result["id"][-1] for result in response.json["results"]]
+    assert ids == ["3", "2", "1"]
+    assert response.json["next_cursor"] is None
+
+
+def test_search_filters_by_peer_and_date(client):
+    by_peer = _search(client, q="lunch", peer=BOB).json["results"]
+    assert [result["from"] for result in by_peer] == [BOB, ALICE]
+
+    dated = _search(
+        client, q="lunch", since="2026-03-02", until="2026-03-03"
+    ).json["results"]
+    assert [result["id"][-1] for result in dated] == ["2"]
+
+
+def test_search_paginates_with_cursor(client):
+    first = _search(client, q="lunch", limit=2).json
+    second = _search(
+        client, q="lunch", limit=2, cursor=first["next_cursor"]
+    ).json
+
+    assert [r["id"][-1] for r in first["results"]] == ["3", "2"]
+    assert [r["id"][-1] for r in second["results"]] == ["1"]
+    assert second["next_cursor"] is None
+
+
+def test_search_snippet_is_escaped_and_highlighted(client):
+    result = _search(client, q="usual").json["results"][0]
+
+    assert "&lt;b&gt;<mark>usual</mark>&lt;/b&gt;" in result["snippet"]
+
+
+def test_search_rejects_invalid_queries(client):
+    assert _search(client, q="").status_code == 400
+    assert _search(client, q="lunch", cursor="nope").status_code == 400
+    assert _search(client, q="lunch", limit=1000).status_code == 400
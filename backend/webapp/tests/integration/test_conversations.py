@@ -0,0 +1,114 @@
+import json
+
+import jwt
+import pytest
+from flask import Flask
+
+from backend.webapp.chat.api import chat_bp
+from backend.webapp.chat.history import archive_entries
+from backend.webapp.config import JWT_SECRET
+from backend.webapp.database import db
+
+DANA = "dana.conv@example.com"
+ERIN = "erin.conv@example.com"
+FRED = "fred.conv@example.com"
+
+
+def _message(n: int, sender: str, recipient: str, content: str = "hi"):
+    payload = {
+        "type": "message",
+        "id": f"conv{n:028d}",
+        "from": sender,
+        "to": recipient,
+        "content": content,
+        "timestamp": f"2026-04-01T12:00:{n:02d}+00:00",
+    }
+    return (f"{n}-0", {"event": "message", "payload": json.dumps(payload)})
+
+
+def _read(n: int, reader: str, peer: str):
+    payload = {"reader": reader, "peer": peer, "timestamp": "..."}
+    return (f"{n}-0", {"event": "read", "payload": json.dumps(payload)})
+
+
+@pytest.fixture
+def client(sql_session):
+    app = Flask(__name__)
+    app.config.update(
+        {"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True}
+    )
+    db.init_app(app)
+    db.session = sql_session
+    app.register_blueprint(chat_bp)
+    return app.test_client()
+
+
+def _conversations(client, email: str, **params):
+    token = jwt.encode({"email": email, "role": "user"}, JWT_SECRET)
+    response = client.get(
+        "/chat/conversations",
+        query_string=params,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    return response.json
+
+
+def test_conversations_track_last_message_and_unread(client, sql_session):
+    archive_entries(
+        sql_session,
+        [
+            _message(1, ERIN, DANA, "first"),
+            _message(2, ERIN, DANA, "second"),
+            _message(3, FRED, DANA, "from fred"),
+        ],
+    )
+    # Redelivered batch: no new unread messages.
+    archive_entries(sql_session, [_message(2, ERIN, DANA, "second")])
+
+    conversations = _conversations(client, DANA)["conversations"]
+    assert [(c["peer"], c["unread"]) for c in conversations] == [
+        (FRED, 1),
+        (ERIN, 2),
+    ]
+    assert conversations[1]["last_message"]["preview"] == "second"
+    assert _conversations(client, ERIN)["conversations"][0]["unread"] == 0
+
+    archive_entries(
+        sql_session,
+        [_read(4, DANA, ERIN), _message(5, ERIN, DANA, "third")],
+    )
+    archive_entries(sql_session, [_read(6, DANA, FRED)])
+
+    conversations = _conversations(client, DANA)["conversations"]
+    assert [(c["peer"], c["unread"]) for c in conversations] == [
+        (ERIN, 1),
+        (FRED, 0),
+    ]
+
+    # Replying marks the conversation as read.
+    archive_entries(sql_session, [_message(7, DANA, ERIN, "reply")])
+    latest = _conversations(client, DANA)["conversations"][0]
+    assert latest["unread"] == 0
+    assert latest["last_message"]["from"] == DANA
+
+
+def test_conversations_paginate_with_cursor(client, sql_session):
+    owner = "gina.conv@example.com"
+    archive_entries(
+        sql_session,
+        [
+            _message(10 + n, f"peer{n}.conv@example.com", owner)
+            for n in range(5)
+        ],
+    )
+
+    first = _conversations(client, owner, limit=3)
+    second = _conversations(
+        client, owner, limit=3, cursor=first["next_cursor"]
+    )
+
+    peers = [c["peer"] for c in first["conversations"]]
+    peers += [c["peer"] for c in second["conversations"]]
+    assert peers == [f"peer{n}.conv@example.com" for n in reversed(range(5))]
+    assert second["next_cursor"] is None
@@ -11,8 +11,12 @@ from backend.webapp.auth.infrastructure.external import (
     UserConfirmationMailDelivery,
 )
 from backend.webapp.auth.infrastructure.models import Confirmation, User
+from backend.webapp.auth.infrastructure.repository import (
+    UsersDatabaseRepository,
+)
 from backend.webapp.chat.api import chat_bp
-from backend.webapp.config import JWT_SECRET
+from backend.webapp.chat.presence import PresenceLookup
+from backend.webapp.config import JWT_SECRET, LOGIN_LIMIT_PER_EMAIL
 from backend.webapp.database import db
 
 
@@ -45,6 +49,23 @@ def test_invalid_login_data_results_in_401(client):
     assert response.status_code == 401
 
 
+def test_login_is_rate_limited_per_email(client, monkeypatch):
+    lookup = Mock(return_value=None)
+    monkeypatch.setattr(UsersDatabaseRepository, "get_user_by_email", lookup)
+
+    statuses = [
+        client.post(
+            "/auth/login",
+            json={"email": "victim@example.com", "password": "guess"},
+        ).status_code
+        for _ in range(15)
+    ]
+
+    assert statuses[0] == 401
+    assert statuses[-1] == 429
+    assert lookup.call_count == LOGIN_LIMIT_PER_EMAIL
+
+
 def test_registered_user_has_confirmation_token_stored(client, sql_session):
     UserConfirmationMailDelivery.send_confirmation = Mock()
 
@@ -191,3 +212,97 @@ def test_list_users_excludes_requester_and_inactive_users(client, sql_session):
     assert {user["email"] for user in payload["users"]} == {
         "active@example.com"
     }
+
+
+def test_list_users_pages_with_presence(app, client, sql_session, monkeypatch):
+    sql_session.execute(delete(User))
+    sql_session.add_all(
+        User(
+            email=f"user{n}@example.com",
+            hash="hash",
+            role=Role.user,
+            is_active=True,
+        )
+        for n in range(5)
+    )
+    sql_session.commit()
+    lookup = Mock(
+        side_effect=lambda emails: {
+            e: e.endswith("1@example.com") for e in emails
+        }
+    )
+    presence = PresenceLookup(None)
+    monkeypatch.setattr(presence, "online", lookup)
+    presence.init_app(app)
+
+    first = client.get(
+        "/chat/users?limit=2", headers=_auth_header("user0@example.com")
+    ).get_json()
+    second = client.get(
+        f"/chat/users?limit=2&cursor={first['next_cursor']}",
+        headers=_auth_header("user0@example.com"),
+    ).get_json()
+
+    assert first["users"] == [
+        {"email": "user1@example.com", "online": True},
+        {"email": "user2@example.com", "online": False},
+    ]
+    assert [user["email"] for user in second["users"]] == [
+        "user3@example.com",
+        "user4@example.com",
+    ]
+    assert second["next_cursor"] is None
+    # One presence lookup per page.
+    assert lookup.call_count == 2
+
+    presence = client.get(
+        "/chat/presence?emails=user1@example.com,user4@example.com",
+        headers=_auth_header("user0@example.com"),
+    ).get_json()
+    assert presence == {
+        "presence": {"user1@example.com": True, "user4@example.com": False}
+    }
+
+
+def test_provision_requires_admin(client):
+    response = client.post(
+        "/auth/admin/provision",
+        data="email,password\n",
+        content_type="text/csv",
+        headers=_auth_header("someone@example.com"),
+    )
+    assert response.status_code == 403
+
+
+def test_provision_streams_ndjson(client, monkeypatch):
+    monkeypatch.setattr(
+        "backend.webapp.auth.infrastructure.api.PROVISION_HASH_WORKERS", 0
+    )
+    monkeypatch.setattr(
+        UserConfirmationMailDelivery, "send_confirmations", Mock()
+    )
+    assert JWT_SECRET
+    token = jwt.encode(
+        {"email": "root@example.com", "role": Role.admin},
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+    body = "\n".join(
+        [
+            '{"email": "ndjson1@example.com", "password": "pw"}',
+            "not json",
+            '{"email": "ndjson2@example.com", "password": "pw"}',
+        ]
+    )
+    response = client.post(
+        "/auth/admin/provision",
+        data=body,
+        content_type="application/x-ndjson",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["created"] == 2
+    assert report["invalid"] == 1
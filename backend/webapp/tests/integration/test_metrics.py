@@ -0,0 +1,102 @@
+import jwt
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.webapp.chat.api import chat_bp
+from backend.webapp.config import JWT_SECRET
+from backend.webapp.database import db, run_async
+from backend.webapp.metrics import RequestInstrumentation, redact_parameters
+
+
+@pytest.fixture
+def instrumented(sql_session):
+    app = Flask(__name__)
+    app.config.update(
+        {"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True}
+    )
+    db.init_app(app)
+    db.session = sql_session
+    app.register_blueprint(chat_bp)
+    instrumentation = RequestInstrumentation(
+        slow_query_ms=0, metrics_token="scrape"
+    )
+    instrumentation.init_app(app)
+    return app.test_client(), instrumentation
+
+
+def test_requests_report_latency_and_query_cost(instrumented, caplog):
+    client, instrumentation = instrumented
+    token = jwt.encode({"email": "m@example.com", "role": "user"}, JWT_SECRET)
+
+    response = client.get(
+        "/chat/users?limit=5", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
+    # Every query counts as slow here; its parameters must not be logged.
+    slow = [
+        record.getMessage()
+        for record in caplog.records
+        if record.name == "backend.webapp.metrics"
+    ]
+    assert slow and slow[0].startswith("Slow query")
+    assert "m@example.com" not in slow[0]
+
+    assert client.get("/metrics").status_code == 401
+    metrics = client.get(
+        "/metrics", headers={"Authorization": "Bearer scrape"}
+    ).get_data(as_text=True)
+    assert (
+        'webapp_request_duration_seconds_count{endpoint="chat.list_users",'
+        'method="GET"} 1'
+    ) in metrics
+    assert (
+        'webapp_request_duration_seconds_bucket{endpoint="chat.list_users",'
+        'method="GET",le="+Inf"} 1'
+    ) in metrics
+    assert 'webapp_db_queries_total{endpoint="chat.list_users"} 1' in metrics
+    assert (
+        'webapp_responses_total{endpoint="chat.list_users",method="GET",'
+        'status="2xx"} 1'
+    ) in metrics
+
+
+def test_redact_parameters_keeps_only_shapes():
+    assert redact_parameters({"email": "a@b.c", "n": 1}) == {
+        "email": "str",
+        "n": "int",
+    }
+    assert redact_parameters(("secret",)) == ("str",)
+    assert redact_parameters([{"a": 1}, {"a": 2}]) == "<2 rows>"
+
+
+def test_metrics_are_off_without_a_token():
+    app = Flask(__name__)
+    RequestInstrumentation(metrics_token=None).init_app(app)
+
+    assert app.test_client().get("/metrics").status_code == 404
+
+
+def test_queries_run_on_the_async_loop_are_charged_to_the_request(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/m.db")
+    app = Flask(__name__)
+    RequestInstrumentation().init_app(app)
+
+    async def query():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            await connection.execute(text("SELECT 2"))
+
+    @app.route("/async")
+    def async_view():
+        run_async(query())
+        return "ok"
+
+    try:
+        response = app.test_client().get("/async")
+    finally:
+        run_async(engine.dispose())
+    assert 'desc="2 queries"' in response.headers["Server-Timing"]
@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+from backend.webapp.auth.infrastructure.rate_limit import (
+    InMemoryRateLimiter,
+    check_rate_limits,
+)
+
+
+def test_limiter_allows_burst_then_rejects():
+    limiter = InMemoryRateLimiter(limit=3, period=60)
+
+    assert [limiter.consume("1.2.3.4") for _ in range(3)] == [0, 0, 0]
+    retry_after = limiter.consume("1.2.3.4")
+    assert 0 < retry_after <= 20
+
+    # Other keys have their own bucket.
+    assert limiter.consume("5.6.7.8") == 0
+
+
+def test_limiter_refills_over_time():
+    limiter = InMemoryRateLimiter(limit=2, period=10)
+    with patch("time.monotonic", return_value=100.0):
+        limiter.consume("key")
+        limiter.consume("key")
+        assert limiter.consume("key") > 0
+
+    with patch("time.monotonic", return_value=105.0):
+        assert limiter.consume("key") == 0
+        assert limiter.consume("key") > 0
+
+
+def test_limiter_memory_is_bounded():
+    limiter = InMemoryRateLimiter(limit=5, period=60, max_keys=100)
+    for i in range(1000):
+        limiter.consume(f"user{i}@example.com")
+    assert len(limiter) <= 100
+
+
+def test_check_rate_limits_stops_at_first_refusal():
+    ip_limiter = InMemoryRateLimiter(limit=1, period=60)
+    email_limiter = InMemoryRateLimiter(limit=1, period=60)
+
+    checks = ((ip_limiter, "10.0.0.1"), (email_limiter, "a@example.com"))
+    assert check_rate_limits(*checks) == 0
+    assert check_rate_limits(*checks) > 0
+    assert len(email_limiter) == 1
+
+
+def test_limiter_overflow_does_not_reset_draining_buckets():
+    limiter = InMemoryRateLimiter(limit=2, period=60, max_keys=2)
+    with patch("time.monotonic", return_value=100.0):
+        limiter.consume("victim")
+        limiter.consume("victim")
+        assert limiter.consume("victim") > 0
+
+        # Flooding new keys must not push the victim's bucket out.
+        limiter.consume("attacker0")
+        assert limiter.consume("attacker1") > 0
+        assert limiter.consume("victim") > 0
+
+    # Once buckets refill they can be evicted to make room.
+    with patch("time.monotonic", return_value=200.0):
+        assert limiter.consume("attacker1") == 0
@@ -0,0 +1,101 @@
+from unittest.mock import Mock
+
+import redis
+
+from backend.webapp.chat.presence import PresenceLookup
+from backend.ws_server.presence import PresenceShards
+
+
+class _Pipeline:
+    """Stands in for a Redis pipeline; records the queued commands."""
+
+    def __init__(self, replies) -> None:
+        self.replies = replies
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, *args))
+
+    def execute(self):
+        if isinstance(self.replies, Exception):
+            raise self.replies
+        return self.replies(self.commands)
+
+
+def _client(online: set[str]) -> tuple[Mock, list[_Pipeline]]:
+    pipelines = []
+
+    def reply(commands):
+        return [
+            [int(email in online) for email in members]
+            for _, _, members in commands
+        ]
+
+    def pipeline(transaction=True):
+        pipelines.append(_Pipeline(reply))
+        return pipelines[-1]
+
+    return Mock(pipeline=pipeline), pipelines
+
+
+def test_presence_asks_each_shard_once_per_page_and_caches():
+    shards = PresenceShards(4, "online")
+    emails = [f"user{n}@x.io" for n in range(8)]
+    client, pipelines = _client({"user1@x.io", "user6@x.io"})
+    lookup = PresenceLookup(client, shards, ttl=60)
+
+    assert lookup.online(emails) == {
+        email: email in {"user1@x.io", "user6@x.io"} for email in emails
+    }
+    (pipe,) = pipelines
+    assert sorted(key for _, key, _ in pipe.commands) == sorted(
+        {shards.keys[shards.index(email)] for email in emails}
+    )
+    for _, key, members in pipe.commands:
+        assert all(shards.keys[shards.index(e)] == key for e in members)
+
+    assert lookup.online(["user1@x.io", "new@x.io"]) == {
+        "user1@x.io": True,
+        "new@x.io": False,
+    }
+    assert pipelines[1].commands == [
+        ("smismember", shards.keys[shards.index("new@x.io")], ["new@x.io"])
+    ]
+
+
+def test_presence_is_unknown_without_redis():
+    assert PresenceLookup(None).online(["a@x.io"]) == {"a@x.io": None}
+    assert PresenceLookup(None).counts() == {
+        "online": None,
+        "daily_active": None,
+    }
+
+    client = Mock()
+    client.pipeline = Mock(return_value=_Pipeline(redis.ConnectionError()))
+    lookup = PresenceLookup(client, ttl=60)
+    assert lookup.online(["a@x.io"]) == {"a@x.io": None}
+    # Failures are not cached.
+    client.pipeline = _client({"a@x.io"})[0].pipeline
+    assert lookup.online(["a@x.io"]) == {"a@x.io": True}
+
+
+def test_counts_sum_shard_counters_without_reading_sets():
+    shards = PresenceShards(3)
+    pipe = _Pipeline(lambda commands: ["2", None, "5", 41])
+    lookup = PresenceLookup(
+        Mock(pipeline=Mock(return_value=pipe)), shards, daily_active=True
+    )
+
+    assert lookup.counts() == {"online": 7, "daily_active": 41}
+    assert [command[0] for command in pipe.commands] == [
+        "get",
+        "get",
+        "get",
+        "pfcount",
+    ]
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Any
+
+
+class PendingDelivery:
+    __slots__ = ("payload", "sent_at", "deadline", "attempts")
+
+    def __init__(
+        self, payload: dict[str, Any], sent_at: float, deadline: float
+    ) -> None:
+        self.payload = payload
+        self.sent_at = sent_at
+        self.deadline = deadline
+        self.attempts = 1
+
+
+class AckTracker:
+    """Messages written to acking clients that have not been acked yet.
+
+    All entries share one timeout, so insertion order is deadline order
+    and expiry only ever looks at the head of the dict.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_retries: int = 2,
+        max_pending: int = 100_000,
+    ) -> None:
+        self.timeout = timeout
+        self._max_retries = max(max_retries, 0)
+        self._max_pending = max(max_pending, 1)
+        self._pending: OrderedDict[str, PendingDelivery] = OrderedDict()
+        self.expired_total = 0
+        self.failed_total = 0
+        self.evicted_total = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def track(
+        self, payload: dict[str, Any], sent_at: float, now: float
+    ) -> None:
+        message_id = payload["id"]
+        pending = self._pending.pop(message_id, None)
+        if pending is None:
+            pending = PendingDelivery(payload, sent_at, now + self.timeout)
+        else:
+            pending.deadline = now + self.timeout
+        self._pending[message_id] = pending
+
+        while len(self._pending) > self._max_pending:
+            self._pending.popitem(last=False)
+            self.evicted_total += 1
+
+    def ack(self, message_id: str, recipient: str) -> PendingDelivery | None:
+        pending = self._pending.get(message_id)
+        if pending is None or pending.payload.get("to") != recipient:
+            return None
+        del self._pending[message_id]
+        return pending
+
+    def pop_expired(self, now: float) -> list[PendingDelivery]:
+        """Remove overdue entries; returns those that may be retried."""
+        retry = []
+        while self._pending:
+            message_id, pending = next(iter(self._pending.items()))
+            if pending.deadline > now:
+                break
+            del self._pending[message_id]
+            self.expired_total += 1
+            if pending.attempts <= self._max_retries:
+                pending.attempts += 1
+                retry.append(pending)
+            else:
+                self.failed_total += 1
+        return retry
+
+    def retry(self, pending: PendingDelivery, now: float) -> None:
+        pending.deadline = now + self.timeout
+        self._pending[pending.payload["id"]] = pending
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "expired": self.expired_total,
+            "failed": self.failed_total,
+            "evicted": self.evicted_total,
+        }
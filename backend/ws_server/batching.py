@@ -0,0 +1,116 @@
+import asyncio
+import contextlib
+from dataclasses import dataclass
+
+from websockets.exceptions import ConnectionClosed
+from websockets.server import WebSocketServerProtocol
+
+
+@dataclass(frozen=True)
+class BatchPolicy:
+    """How frames for clients that opted into batching are coalesced.
+
+    Frames queued within `window` seconds of the first one, or until
+    `max_bytes` are queued, go out together as one JSON array frame. A
+    `window` of 0 turns the capability off. A client that lets more than
+    `max_queued` bytes pile up is too slow to keep and is disconnected.
+    """
+
+    window: float = 0.01
+    max_bytes: int = 32 * 1024
+    max_queued: int = 128 * 1024
+
+
+def encode_batch(frames: list[str]) -> str:
+    # Frames are already-serialized JSON objects, so the array is built
+    # by joining them rather than re-encoding.
+    if len(frames) == 1:
+        return frames[0]
+    return "[" + ",".join(frames) + "]"
+
+
+class FrameBatcher:
+    """Outbound queue of one batching socket.
+
+    `send` only appends, so callers never wait on the socket; a single
+    writer task per socket flushes the queue, which keeps frames in the
+    order they were queued. Past the policy's high-water mark the queue
+    is dropped and the socket closed with 1013, since the client no
+    longer gets the backpressure of awaiting its writes.
+    """
+
+    __slots__ = (
+        "_socket",
+        "_policy",
+        "_frames",
+        "_size",
+        "_full",
+        "_task",
+        "_closing",
+    )
+
+    def __init__(
+        self, socket: WebSocketServerProtocol, policy: BatchPolicy
+    ) -> None:
+        self._socket = socket
+        self._policy = policy
+        self._frames: list[str] = []
+        self._size = 0
+        self._full = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._closing: asyncio.Task[None] | None = None
+
+    def send(self, frame: str) -> None:
+        if self._closing is not None:
+            return
+        self._frames.append(frame)
+        self._size += len(frame)
+        if self._size > self._policy.max_queued:
+            self._frames.clear()
+            self._size = 0
+            self._closing = asyncio.create_task(
+                self._socket.close(code=1013, reason="Client too slow")
+            )
+            return
+        if self._size >= self._policy.max_bytes:
+            self._full.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        """Write everything queued without waiting out the window."""
+        task = self._task
+        if task is None:
+            return
+        self._full.set()
+        try:
+            await task
+        except asyncio.CancelledError:
+            # Only the writer was cancelled (by `close`); a cancellation
+            # of the caller itself must propagate.
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._frames.clear()
+        self._size = 0
+
+    async def _run(self) -> None:
+        try:
+            while self._frames:
+                if not self._full.is_set():
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(
+                            self._full.wait(), self._policy.window
+                        )
+                frames, self._frames, self._size = self._frames, [], 0
+                self._full.clear()
+                await self._socket.send(encode_batch(frames))
+        except ConnectionClosed:
+            self._frames.clear()
+            self._size = 0
+        finally:
+            self._task = None
@@ -0,0 +1,117 @@
+from typing import Any
+
+import redis.asyncio as redis
+
+# Channel Redis publishes invalidations on when tracking redirects to a
+# RESP2 pub/sub connection.
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+class TrackedSetCache:
+    """Node-local copies of Redis sets, invalidated by Redis itself.
+
+    Uses server-assisted client-side caching in broadcasting mode: the
+    pub/sub connection turns on `CLIENT TRACKING ... BCAST` for the cached
+    key prefixes and redirects the invalidations to itself, where they
+    arrive on `INVALIDATE_CHANNEL`. Reads may go through any connection.
+
+    Caching stays off until tracking is confirmed, and every (re)connect
+    flushes the cache since invalidations may have been missed meanwhile.
+    """
+
+    def __init__(self, prefixes: tuple[str, ...]) -> None:
+        self._prefixes = prefixes
+        self._values: dict[str, frozenset[str]] = {}
+        # Bumped on every invalidation so a read that raced with one is
+        # not stored.
+        self._generation = 0
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+
+    async def enable_tracking(self, connection: Any) -> None:
+        """Connect callback for the pub/sub connection.
+
+        Must run before the connection re-subscribes: RESP2 connections
+        only accept (un)subscribe commands once subscribed.
+        """
+        self.enabled = False
+        self.invalidate(None)
+        await connection.send_command("CLIENT", "ID")
+        client_id = await connection.read_response()
+        prefixes = [arg for p in self._prefixes for arg in ("PREFIX", p)]
+        await connection.send_command(
+            "CLIENT",
+            "TRACKING",
+            "ON",
+            "REDIRECT",
+            client_id,
+            "BCAST",
+            *prefixes,
+        )
+        await connection.read_response()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.invalidate(None)
+
+    def invalidate(self, keys: list[str] | None) -> None:
+        """Drop `keys`; None (a server-side flush) drops everything."""
+        self._generation += 1
+        if keys is None:
+            self._values.clear()
+            return
+        for key in keys:
+            self._values.pop(key, None)
+
+    async def smembers(self, client: redis.Redis, key: str) -> frozenset[str]:
+        if self.enabled:
+            cached = self._values.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        self.misses += 1
+        generation = self._generation
+        members = frozenset(await client.smembers(key))
+        if self.enabled and generation == self._generation:
+            self._values[key] = members
+        return members
+
+    async def smembers_many(
+        self, client: redis.Redis, keys: list[str]
+    ) -> dict[str, frozenset[str]]:
+        """Several sets; every uncached one is read in one pipeline."""
+        values = {}
+        missing = []
+        for key in keys:
+            cached = self._values.get(key) if self.enabled else None
+            if cached is not None:
+                self.hits += 1
+                values[key] = cached
+            else:
+                missing.append(key)
+        if not missing:
+            return values
+
+        self.misses += len(missing)
+        generation = self._generation
+        async with client.pipeline(transaction=False) as pipe:
+            for key in missing:
+                pipe.smembers(key)
+            results = await pipe.execute()
+        store = self.enabled and generation == self._generation
+        for key, members in zip(missing, results):
+            values[key] = frozenset(members)
+            if store:
+                self._values[key] = values[key]
+        return values
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "keys": len(self._values),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
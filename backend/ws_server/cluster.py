@@ -0,0 +1,214 @@
+import asyncio
+import contextlib
+import logging
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+
+import redis.asyncio as redis
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+
+logger = logging.getLogger(__name__)
+
+# How long subscribe() waits for Redis to confirm a shard subscription.
+SUBSCRIBE_TIMEOUT = 5.0
+
+MessageHandler = Callable[[str, str], Awaitable[None]]
+
+
+def hash_tagged(prefix: str, value: str) -> str:
+    """Key or channel whose cluster slot only depends on `value`.
+
+    Everything named after the same user (or room) lands in one slot, so
+    scripts and pipelines over it stay single-shard.
+    """
+    return f"{prefix}{{{value}}}"
+
+
+def strip_hash_tag(prefix: str, name: str) -> str:
+    return name[len(prefix) :].removeprefix("{").removesuffix("}")
+
+
+async def spublish(cluster: RedisCluster, channel: str, data: str) -> None:
+    node = cluster.get_node_from_key(channel)
+    await cluster.execute_command("SPUBLISH", channel, data, target_nodes=node)
+
+
+class _Shard:
+    """One subscriber connection to the node owning some shard channels."""
+
+    def __init__(self, owner: "ShardedSubscriber", node: ClusterNode) -> None:
+        self.name = node.name
+        self._owner = owner
+        # Subscribers idle for long stretches; never time out reads.
+        self._connection = node.connection_class(
+            **{**node.connection_kwargs, "socket_timeout": None}
+        )
+        self.channels: set[str] = set()
+        self._confirmations: dict[str, asyncio.Future[None]] = {}
+        self._reader: asyncio.Task[None] | None = None
+
+    async def subscribe(self, channels: list[str]) -> None:
+        if self._reader is None:
+            await self._connection.connect()
+            self._reader = asyncio.create_task(self._read())
+
+        loop = asyncio.get_running_loop()
+        waiting = []
+        for channel in channels:
+            future = self._confirmations.get(channel)
+            if future is None:
+                future = self._confirmations[channel] = loop.create_future()
+            waiting.append(future)
+        self.channels.update(channels)
+        await self._connection.send_command("SSUBSCRIBE", *channels)
+        try:
+            await asyncio.wait_for(asyncio.gather(*waiting), SUBSCRIBE_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            # The reader resets the shard and re-routes its channels.
+            logger.warning("Shard subscription to %s not confirmed", self.name)
+
+    async def unsubscribe(self, channels: list[str]) -> None:
+        # Dropped first so the reply is not mistaken for a slot migration.
+        self.channels.difference_update(channels)
+        with contextlib.suppress(redis.ConnectionError):
+            await self._connection.send_command("SUNSUBSCRIBE", *channels)
+
+    async def close(self) -> None:
+        if self._reader:
+            self._reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader
+        self._fail_confirmations()
+        await self._connection.disconnect()
+
+    def _fail_confirmations(self) -> None:
+        for future in self._confirmations.values():
+            if not future.done():
+                future.set_exception(ConnectionError(self.name))
+                # Nobody may be awaiting it any more.
+                future.exception()
+        self._confirmations.clear()
+
+    async def _read(self) -> None:
+        try:
+            while True:
+                response = await self._connection.read_response()
+                kind, channel = response[0], response[1]
+                if kind == "smessage":
+                    await self._owner.dispatch(channel, response[2])
+                elif kind == "ssubscribe":
+                    future = self._confirmations.pop(channel, None)
+                    if future and not future.done():
+                        future.set_result(None)
+                elif kind == "sunsubscribe" and channel in self.channels:
+                    # Not requested by us: the slot moved to another node.
+                    self.channels.discard(channel)
+                    self._owner.reroute([channel])
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Shard subscriber %s failed: %s", self.name, exc)
+            self._fail_confirmations()
+            self._owner.reset(self)
+
+
+class ShardedSubscriber:
+    """Sharded pub/sub (SSUBSCRIBE) over a Redis Cluster.
+
+    A shard channel is served only by the node that owns its slot, so one
+    connection is kept per node owning a subscribed channel. Connection
+    loss and slot migrations refresh the cluster topology and re-subscribe
+    the affected channels on their current owner.
+    """
+
+    def __init__(
+        self,
+        cluster: RedisCluster,
+        on_message: MessageHandler,
+        retry_delay: float = 1.0,
+    ) -> None:
+        self._cluster = cluster
+        self._on_message = on_message
+        self._retry_delay = retry_delay
+        self._channels: set[str] = set()
+        self._shards: dict[str, _Shard] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def channels(self) -> set[str]:
+        return self._channels
+
+    async def dispatch(self, channel: str, data: str) -> None:
+        try:
+            await self._on_message(channel, data)
+        except Exception:
+            logger.exception("Failed to handle shard message on %s", channel)
+
+    async def subscribe(self, *channels: str) -> None:
+        new = [
+            channel for channel in channels if channel not in self._channels
+        ]
+        self._channels.update(new)
+        await self._route(new)
+
+    async def unsubscribe(self, *channels: str) -> None:
+        self._channels.difference_update(channels)
+        for shard in list(self._shards.values()):
+            owned = [
+                channel for channel in channels if channel in shard.channels
+            ]
+            if owned:
+                await shard.unsubscribe(owned)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for shard in self._shards.values():
+            await shard.close()
+        self._shards.clear()
+        self._channels.clear()
+
+    async def _route(self, channels: list[str]) -> None:
+        by_node: dict[str, list[str]] = defaultdict(list)
+        nodes: dict[str, ClusterNode] = {}
+        for channel in channels:
+            node = self._cluster.get_node_from_key(channel)
+            nodes[node.name] = node
+            by_node[node.name].append(channel)
+
+        for name, owned in by_node.items():
+            shard = self._shards.get(name)
+            if shard is None:
+                shard = self._shards[name] = _Shard(self, nodes[name])
+            await shard.subscribe(owned)
+
+    def reroute(self, channels: list[str]) -> None:
+        self._spawn(self._resubscribe(channels))
+
+    def reset(self, shard: _Shard) -> None:
+        if self._shards.get(shard.name) is shard:
+            del self._shards[shard.name]
+        self._spawn(self._recover(shard))
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _recover(self, shard: _Shard) -> None:
+        with contextlib.suppress(Exception):
+            await shard.close()
+        await self._resubscribe(list(shard.channels))
+
+    async def _resubscribe(self, channels: list[str]) -> None:
+        while True:
+            pending = [c for c in channels if c in self._channels]
+            if not pending:
+                return
+            await asyncio.sleep(self._retry_delay)
+            try:
+                await self._cluster.nodes_manager.initialize()
+                await self._route(pending)
+                return
+            except Exception as exc:
+                logger.warning("Re-subscribing shard channels failed: %s", exc)
@@ -0,0 +1,142 @@
+from collections.abc import KeysView, Set, ValuesView
+from dataclasses import dataclass
+from typing import Any
+
+from websockets.server import WebSocketServerProtocol
+
+from backend.ws_server.batching import FrameBatcher
+from backend.ws_server.flood import FloodState
+
+
+class ClientConnection:
+    """Per-socket state kept by the hub for an authenticated client.
+
+    One slots object per connection, so idle sockets cost a fixed, small
+    amount on top of the websockets protocol itself.
+    """
+
+    __slots__ = ("email", "role", "socket", "flood", "acks", "batcher")
+
+    def __init__(
+        self,
+        email: str,
+        role: str,
+        socket: WebSocketServerProtocol,
+        flood: FloodState,
+        acks: bool = False,
+        batcher: FrameBatcher | None = None,
+    ) -> None:
+        self.email = email
+        self.role = role
+        self.socket = socket
+        self.flood = flood
+        # Client acks delivered messages.
+        self.acks = acks
+        # Set when the client opted into batched frames.
+        self.batcher = batcher
+
+
+class ClientRegistry:
+    """email -> connection map of the sockets held by this node.
+
+    Every method is synchronous, so each mutation is atomic with respect
+    to the event loop and reads need no lock. The set of open sockets is
+    maintained alongside the map instead of being rebuilt per broadcast,
+    split into sockets written directly and those with a batcher.
+    """
+
+    __slots__ = ("_clients", "_sockets", "_direct", "_batchers")
+
+    def __init__(self) -> None:
+        self._clients: dict[str, ClientConnection] = {}
+        self._sockets: set[WebSocketServerProtocol] = set()
+        self._direct: set[WebSocketServerProtocol] = set()
+        self._batchers: dict[WebSocketServerProtocol, FrameBatcher] = {}
+
+    def add(self, client: ClientConnection) -> ClientConnection | None:
+        """Register `client`; returns the connection it replaced, if any."""
+        previous = self._clients.get(client.email)
+        if previous is not None:
+            self._discard(previous.socket)
+        self._clients[client.email] = client
+        self._sockets.add(client.socket)
+        if client.batcher is None:
+            self._direct.add(client.socket)
+        else:
+            self._batchers[client.socket] = client.batcher
+        if previous is not None and previous.socket is client.socket:
+            return None
+        return previous
+
+    def _discard(self, socket: WebSocketServerProtocol) -> None:
+        self._sockets.discard(socket)
+        self._direct.discard(socket)
+        self._batchers.pop(socket, None)
+
+    def remove(
+        self, email: str, socket: WebSocketServerProtocol
+    ) -> ClientConnection | None:
+        """Drop `email` if `socket` is still its current connection."""
+        client = self._clients.get(email)
+        if client is None or client.socket is not socket:
+            return None
+        del self._clients[email]
+        self._discard(socket)
+        return client
+
+    def get(self, email: str) -> ClientConnection | None:
+        return self._clients.get(email)
+
+    def emails(self) -> KeysView[str]:
+        return self._clients.keys()
+
+    @property
+    def sockets(self) -> Set[WebSocketServerProtocol]:
+        """Live view; copy it before iterating across an await."""
+        return self._sockets
+
+    @property
+    def direct_sockets(self) -> Set[WebSocketServerProtocol]:
+        """Live view of the sockets without a batcher."""
+        return self._direct
+
+    def batchers(self) -> ValuesView[FrameBatcher]:
+        return self._batchers.values()
+
+    def batcher(self, socket: WebSocketServerProtocol) -> FrameBatcher | None:
+        return self._batchers.get(socket)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, email: object) -> bool:
+        return email in self._clients
+
+
+@dataclass(frozen=True)
+class BufferLimits:
+    """Per-connection buffer limits passed to `websockets.serve`.
+
+    `max_queue` bounds received frames waiting to be handled, `read_limit`
+    and `write_limit` are the high-water marks of the incoming stream and
+    outgoing transport buffers. Buffers only grow while data is in flight,
+    so idle sockets cost little either way; the limits cap busy ones.
+
+    Compression is off by default: permessage-deflate keeps zlib state per
+    socket, roughly tripling the footprint of an idle connection.
+    """
+
+    max_size: int = 2**20
+    max_queue: int = 16
+    read_limit: int = 2**16
+    write_limit: int = 2**16
+    compression: bool = False
+
+    def serve_kwargs(self) -> dict[str, Any]:
+        return {
+            "max_size": self.max_size,
+            "max_queue": self.max_queue,
+            "read_limit": self.read_limit,
+            "write_limit": self.write_limit,
+            "compression": "deflate" if self.compression else None,
+        }
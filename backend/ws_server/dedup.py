@@ -0,0 +1,118 @@
+import re
+import time
+from collections import OrderedDict
+
+import redis.asyncio as redis
+
+from backend.ws_server.cluster import hash_tagged
+
+DEDUP_PREFIX = "chat:dedup:"
+
+_CLIENT_MSG_ID = re.compile(r"[A-Za-z0-9_.:-]{1,64}")
+
+
+def parse_client_msg_id(value: object) -> str | None:
+    if isinstance(value, str) and _CLIENT_MSG_ID.fullmatch(value):
+        return value
+    return None
+
+
+class SendWindow:
+    """Recently sent client message ids of one sender, oldest first."""
+
+    __slots__ = ("ids",)
+
+    def __init__(self) -> None:
+        # client_msg_id -> (message id, expiry on the monotonic clock)
+        self.ids: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+
+class SendDeduplicator:
+    """Remembers which message id each `client_msg_id` was sent as.
+
+    Every sender keeps at most `max_per_sender` ids for `window` seconds;
+    all entries share the window, so insertion order is expiry order and
+    eviction only looks at the head. Senders themselves are kept in a
+    bounded LRU. This covers retries reaching the same node; the Redis
+    side (`RedisSendClaims`) covers retries after a reconnect elsewhere.
+    """
+
+    def __init__(
+        self,
+        window: float = 300.0,
+        max_per_sender: int = 256,
+        max_senders: int = 100_000,
+    ) -> None:
+        self.window = window
+        self._max_per_sender = max(max_per_sender, 1)
+        self._max_senders = max(max_senders, 1)
+        self._senders: OrderedDict[str, SendWindow] = OrderedDict()
+        self.duplicates_total = 0
+
+    def __len__(self) -> int:
+        return len(self._senders)
+
+    def claim(
+        self, sender: str, client_msg_id: str, message_id: str
+    ) -> str | None:
+        """Record a send; returns the earlier message id for a duplicate.
+
+        Check and insert happen without yielding, so two retries racing on
+        this node cannot both be published.
+        """
+        now = time.monotonic()
+        sent = self._senders.get(sender)
+        if sent is None:
+            sent = self._senders[sender] = SendWindow()
+            while len(self._senders) > self._max_senders:
+                self._senders.popitem(last=False)
+        else:
+            self._senders.move_to_end(sender)
+        ids = sent.ids
+
+        while ids:
+            oldest, (_, expires) = next(iter(ids.items()))
+            if expires > now and len(ids) < self._max_per_sender:
+                break
+            del ids[oldest]
+
+        existing = ids.get(client_msg_id)
+        if existing is not None:
+            self.duplicates_total += 1
+            return existing[0]
+        ids[client_msg_id] = (message_id, now + self.window)
+        return None
+
+    def remember(
+        self, sender: str, client_msg_id: str, message_id: str
+    ) -> None:
+        """Replace a claim with the id another node already sent it as."""
+        sent = self._senders.get(sender)
+        if sent is not None and client_msg_id in sent.ids:
+            sent.ids[client_msg_id] = (
+                message_id,
+                sent.ids[client_msg_id][1],
+            )
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "senders": len(self._senders),
+            "duplicates": self.duplicates_total,
+        }
+
+
+class RedisSendClaims:
+    """Cluster-wide send claims: one `SET NX EX` per new message."""
+
+    def __init__(self, client: redis.Redis, ttl: int) -> None:
+        self._client = client
+        self._ttl = max(ttl, 1)
+
+    async def claim(
+        self, sender: str, client_msg_id: str, message_id: str
+    ) -> str | None:
+        key = f"{hash_tagged(DEDUP_PREFIX, sender)}:{client_msg_id}"
+        if await self._client.set(key, message_id, nx=True, ex=self._ttl):
+            return None
+        # None when it expired in between: treat the send as new.
+        return await self._client.get(key)
@@ -0,0 +1,108 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class FloodLimit:
+    rate: float  # sustained messages per second
+    burst: int
+
+
+DEFAULT_FLOOD_LIMITS = {
+    "user": FloodLimit(rate=5, burst=20),
+    "admin": FloodLimit(rate=50, burst=200),
+}
+
+
+def parse_flood_limits(value: str | None) -> dict[str, FloodLimit]:
+    """Parse `role:rate:burst[,role:rate:burst...]`, e.g. `user:5:20`."""
+    limits = dict(DEFAULT_FLOOD_LIMITS)
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        role, rate, burst = item.strip().split(":")
+        limits[role] = FloodLimit(rate=float(rate), burst=int(burst))
+    return limits
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, limit: FloodLimit) -> None:
+        self.rate = limit.rate
+        self.capacity = float(limit.burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> bool:
+        """Top up to `now`; True when a token is available."""
+        tokens = self.tokens + (now - self.updated) * self.rate
+        self.tokens = tokens if tokens < self.capacity else self.capacity
+        self.updated = now
+        return self.tokens >= 1.0
+
+    def take(self, now: float) -> bool:
+        if not self.refill(now):
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class FloodState:
+    """Per-connection limiter state, created once at connect time."""
+
+    __slots__ = ("connection", "user", "strikes")
+
+    def __init__(self, connection: TokenBucket, user: TokenBucket) -> None:
+        self.connection = connection
+        self.user = user
+        self.strikes = 0
+
+
+class FloodGuard:
+    """Per-connection and per-user token buckets for outgoing messages.
+
+    The per-user bucket outlives the socket (bounded LRU), so reconnecting
+    does not refill it. Checking a message only updates preallocated
+    buckets.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, FloodLimit] | None = None,
+        max_strikes: int = 20,
+        max_users: int = 100_000,
+    ) -> None:
+        self._limits = limits or DEFAULT_FLOOD_LIMITS
+        self.max_strikes = max(max_strikes, 1)
+        self._max_users = max(max_users, 1)
+        self._users: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def _limit(self, role: str) -> FloodLimit:
+        return self._limits.get(role) or self._limits["user"]
+
+    def open(self, email: str, role: str) -> FloodState:
+        limit = self._limit(role)
+        user_bucket = self._users.get(email)
+        if user_bucket is None or user_bucket.rate != limit.rate:
+            user_bucket = self._users[email] = TokenBucket(limit)
+        self._users.move_to_end(email)
+        while len(self._users) > self._max_users:
+            self._users.popitem(last=False)
+        return FloodState(TokenBucket(limit), user_bucket)
+
+    @staticmethod
+    def allow(state: FloodState) -> bool:
+        now = time.monotonic()
+        # Both buckets are checked before either is charged, so a refusal
+        # by one does not spend a token from the other.
+        connection_ok = state.connection.refill(now)
+        user_ok = state.user.refill(now)
+        if connection_ok and user_ok:
+            state.connection.tokens -= 1.0
+            state.user.tokens -= 1.0
+            state.strikes = 0
+            return True
+        state.strikes += 1
+        return False
@@ -0,0 +1,201 @@
+"""Measure hub memory per idle and per active connection.
+
+    python -m backend.ws_server.memprofile --connections 2000 --top 10
+
+The hub runs in this process under tracemalloc (Python and zlib allocations,
+not kernel socket buffers); the clients run in a child process so their own
+allocations are not counted. "Idle" is after every client has connected and
+received its user list, "active" after each has sent and received one
+direct message.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+import jwt
+from websockets.client import connect
+from websockets.server import serve
+
+from backend.ws_server.connection import BufferLimits
+from backend.ws_server.server import ChatHub
+
+PROFILE_SECRET = "memprofile-secret"
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _email(index: int) -> str:
+    return f"user{index}@example.com"
+
+
+def _traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def _signal(proc: asyncio.subprocess.Process, command: str) -> None:
+    proc.stdin.write(f"{command}\n".encode())
+    await proc.stdin.drain()
+    line = await asyncio.wait_for(proc.stdout.readline(), 120)
+    if line.strip() != command.encode():
+        raise RuntimeError(f"client process failed at {command!r}")
+
+
+async def profile(
+    connections: int = 1000,
+    limits: BufferLimits | None = None,
+    top: int = 0,
+) -> dict[str, Any]:
+    limits = limits or BufferLimits()
+    tracemalloc.start()
+    try:
+        hub = ChatHub(PROFILE_SECRET)
+        await hub.start()
+        async with serve(
+            hub.handler, "127.0.0.1", 0, **limits.serve_kwargs()
+        ) as server:
+            port = server.sockets[0].getsockname()[1]
+            baseline = _traced()
+            snapshot = tracemalloc.take_snapshot() if top else None
+
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                "backend.ws_server.memprofile",
+                "--clients",
+                str(port),
+                "--connections",
+                str(connections),
+                *(["--compression"] if limits.compression else []),
+                cwd=ROOT,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+            )
+            try:
+                await _signal(proc, "idle")
+                idle = _traced()
+                idle_top = _top_stats(snapshot, top)
+                await _signal(proc, "active")
+                active = _traced()
+                await _signal(proc, "close")
+            finally:
+                with contextlib.suppress(ProcessLookupError):
+                    proc.kill()
+                await proc.wait()
+        await hub.stop()
+    finally:
+        tracemalloc.stop()
+
+    report: dict[str, Any] = {
+        "connections": connections,
+        "limits": limits.serve_kwargs(),
+        "idle_bytes_per_connection": round((idle - baseline) / connections),
+        "active_bytes_per_connection": round(
+            (active - baseline) / connections
+        ),
+    }
+    if top:
+        report["top_idle_allocations"] = idle_top
+    return report
+
+
+def _top_stats(baseline: tracemalloc.Snapshot | None, limit: int) -> list[str]:
+    if baseline is None:
+        return []
+    stats = tracemalloc.take_snapshot().compare_to(baseline, "lineno")
+    return [str(stat) for stat in stats[:limit]]
+
+
+async def _run_clients(port: int, count: int, compression: bool) -> None:
+    """Child process: open `count` sockets and step through the phases."""
+    loop = asyncio.get_running_loop()
+    received = [asyncio.Event() for _ in range(count)]
+    sockets = []
+
+    async def read(index: int, ws: Any) -> None:
+        with contextlib.suppress(Exception):
+            async for raw in ws:
+                if json.loads(raw).get("type") == "message":
+                    received[index].set()
+
+    async def command() -> str:
+        return (await loop.run_in_executor(None, sys.stdin.readline)).strip()
+
+    async def ack(phase: str) -> None:
+        print(phase, flush=True)
+
+    readers = []
+    await command()
+    for index in range(count):
+        token = jwt.encode({"email": _email(index)}, PROFILE_SECRET)
+        ws = await connect(
+            f"ws://127.0.0.1:{port}/?token={token}",
+            compression="deflate" if compression else None,
+        )
+        sockets.append(ws)
+        readers.append(asyncio.create_task(read(index, ws)))
+    # Let presence broadcasts settle so no frames are in flight.
+    await asyncio.sleep(1)
+    await ack("idle")
+
+    await command()
+    for index, ws in enumerate(sockets):
+        await ws.send(
+            json.dumps(
+                {
+                    "type": "message",
+                    "to": _email((index + 1) % count),
+                    "content": "x" * 100,
+                }
+            )
+        )
+    await asyncio.gather(*(event.wait() for event in received))
+    await asyncio.sleep(0.5)
+    await ack("active")
+
+    await command()
+    await asyncio.gather(*(ws.close() for ws in sockets))
+    for reader in readers:
+        reader.cancel()
+    await ack("close")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--read-limit", type=int, default=2**16)
+    parser.add_argument("--write-limit", type=int, default=2**16)
+    parser.add_argument("--compression", action="store_true")
+    parser.add_argument(
+        "--top", type=int, default=0, help="show the N largest allocations"
+    )
+    parser.add_argument(
+        "--clients", type=int, metavar="PORT", help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.clients:
+        asyncio.run(
+            _run_clients(args.clients, args.connections, args.compression)
+        )
+        return
+
+    limits = BufferLimits(
+        max_queue=args.max_queue,
+        read_limit=args.read_limit,
+        write_limit=args.write_limit,
+        compression=args.compression,
+    )
+    report = asyncio.run(profile(args.connections, limits, args.top))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from bisect import bisect_left
+
+# Upper bounds in milliseconds; the last bucket catches everything above.
+DEFAULT_BUCKETS_MS = (
+    1,
+    2,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; observing is O(log buckets)."""
+
+    __slots__ = ("_bounds", "_counts", "_count", "_sum")
+
+    def __init__(
+        self, bounds_ms: tuple[int, ...] = DEFAULT_BUCKETS_MS
+    ) -> None:
+        self._bounds = bounds_ms
+        self._counts = [0] * (len(bounds_ms) + 1)
+        self._count = 0
+        self._sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self._counts[bisect_left(self._bounds, ms)] += 1
+        self._count += 1
+        self._sum += ms
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum_ms(self) -> float:
+        return self._sum
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """(upper bound in ms, observations at or below it), ending at inf."""
+        result = []
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts):
+            seen += count
+            result.append((float(bound), seen))
+        result.append((float("inf"), self._count))
+        return result
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound (ms) of the bucket holding the q-th quantile.
+
+        Values past the largest bound are reported as that bound.
+        """
+        if not self._count:
+            return None
+        rank = q * self._count
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return float(self._bounds[-1])
+
+    def snapshot(self) -> dict[str, object]:
+        # Per-bucket (not cumulative) counts keyed by upper bound in ms.
+        buckets = {
+            str(bound): count
+            for bound, count in zip(self._bounds, self._counts)
+        }
+        buckets["+inf"] = self._counts[-1]
+        return {
+            "count": self._count,
+            "mean_ms": round(self._sum / self._count, 3)
+            if self._count
+            else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
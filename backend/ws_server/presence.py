@@ -0,0 +1,246 @@
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date
+
+import redis.asyncio as redis
+
+from backend.ws_server.cluster import hash_tagged
+
+ROSTER_PREFIX = "chat:roster:"
+ONLINE_SET = "chat:online_users"
+ONLINE_TOTAL_PREFIX = "chat:online_total:"
+DAILY_ACTIVE_PREFIX = "chat:daily_active:"
+# Daily HyperLogLogs are kept for a week of history.
+DAILY_ACTIVE_TTL = 8 * 86400
+
+MAX_ROSTER_CHANGE = 100
+
+# Adds ARGV[2..] to the roster KEYS[1] while it holds fewer than ARGV[1]
+# contacts, checking the size in the same round trip; returns the emails
+# that are on the roster afterwards.
+_ROSTER_ADD = """
+local limit = tonumber(ARGV[1])
+local size = redis.call('SCARD', KEYS[1])
+local kept = {}
+for i = 2, #ARGV do
+  if redis.call('SISMEMBER', KEYS[1], ARGV[i]) == 1 then
+    table.insert(kept, ARGV[i])
+  elseif size < limit then
+    redis.call('SADD', KEYS[1], ARGV[i])
+    size = size + 1
+    table.insert(kept, ARGV[i])
+  end
+end
+return kept
+"""
+
+# A shard's member set and its counter share a hash slot, so membership
+# and the count change together and the count cannot drift.
+_SET_ONLINE = """
+local changed
+if ARGV[2] == '1' then
+  changed = redis.call('SADD', KEYS[1], ARGV[1])
+  if changed == 1 then redis.call('INCR', KEYS[2]) end
+else
+  changed = redis.call('SREM', KEYS[1], ARGV[1])
+  if changed == 1 then redis.call('DECR', KEYS[2]) end
+end
+return changed
+"""
+
+
+def parse_roster_emails(value: object, owner: str) -> list[str] | None:
+    """Validate the `emails` of a roster frame; None when malformed."""
+    if not isinstance(value, list) or not 0 < len(value) <= MAX_ROSTER_CHANGE:
+        return None
+    emails = []
+    for email in value:
+        if not isinstance(email, str) or not 0 < len(email) <= 254:
+            return None
+        if email != owner and email not in emails:
+            emails.append(email)
+    return emails
+
+
+def add_to_roster(
+    roster: set[str], emails: list[str], max_size: int
+) -> list[str]:
+    """Node-local counterpart of `RedisRosters.add`."""
+    kept = []
+    for email in emails:
+        if email not in roster:
+            if len(roster) >= max_size:
+                continue
+            roster.add(email)
+        kept.append(email)
+    return kept
+
+
+class RedisRosters:
+    """Persisted contact rosters, each capped at `max_size` contacts."""
+
+    def __init__(self, client: redis.Redis, max_size: int) -> None:
+        self._client = client
+        self.max_size = max(max_size, 1)
+        self._add = client.register_script(_ROSTER_ADD)
+
+    async def add(self, owner: str, emails: list[str]) -> list[str]:
+        return await self._add(
+            keys=[hash_tagged(ROSTER_PREFIX, owner)],
+            args=[self.max_size, *emails],
+        )
+
+
+class InterestIndex:
+    """Node-local reverse index of who wants whose presence.
+
+    Maps each user to the locally connected users that have them on their
+    roster, so a presence change is written only to those sockets. Both
+    directions are kept so a disconnect can be undone without a scan.
+    """
+
+    def __init__(self) -> None:
+        self._watchers: dict[str, set[str]] = {}
+        self._watching: dict[str, set[str]] = {}
+
+    def add(self, watcher: str, emails: list[str] | set[str]) -> list[str]:
+        """Start routing presence of `emails`; returns the new ones."""
+        watching = self._watching.setdefault(watcher, set())
+        added = []
+        for email in emails:
+            if email in watching or email == watcher:
+                continue
+            watching.add(email)
+            self._watchers.setdefault(email, set()).add(watcher)
+            added.append(email)
+        if not watching:
+            del self._watching[watcher]
+        return added
+
+    def remove(self, watcher: str, emails: list[str] | set[str]) -> None:
+        watching = self._watching.get(watcher)
+        if watching is None:
+            return
+        for email in emails:
+            if email not in watching:
+                continue
+            watching.discard(email)
+            watchers = self._watchers[email]
+            watchers.discard(watcher)
+            if not watchers:
+                del self._watchers[email]
+        if not watching:
+            del self._watching[watcher]
+
+    def remove_user(self, watcher: str) -> None:
+        self.remove(watcher, list(self._watching.get(watcher, ())))
+
+    def watchers(self, email: str) -> set[str]:
+        return self._watchers.get(email, set())
+
+    def watching(self, watcher: str) -> set[str]:
+        return self._watching.get(watcher, set())
+
+    def __len__(self) -> int:
+        return len(self._watchers)
+
+
+class OfflinePeerCache:
+    """Users recently found offline, remembered for `ttl` seconds.
+
+    Lets repeated sends to an offline recipient skip the online lookup.
+    Bounded LRU of `max_size` emails; a user seen coming online is
+    dropped right away.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_size: int = 10_000) -> None:
+        self._ttl = ttl
+        self._max_size = max(max_size, 1)
+        self._expires: OrderedDict[str, float] = OrderedDict()
+
+    def add(self, email: str) -> None:
+        self._expires[email] = time.monotonic() + self._ttl
+        self._expires.move_to_end(email)
+        while len(self._expires) > self._max_size:
+            self._expires.popitem(last=False)
+
+    def discard(self, email: str) -> None:
+        self._expires.pop(email, None)
+
+    def __contains__(self, email: str) -> bool:
+        expires = self._expires.get(email)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._expires[email]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+def daily_active_key(day: date) -> str:
+    return f"{DAILY_ACTIVE_PREFIX}{day.isoformat()}"
+
+
+class PresenceShards:
+    """Where each user's online flag lives among `count` sharded sets.
+
+    Shard `i` is the set `<base>:{i}` with the exact member count of that
+    set in `chat:online_total:{i}`; the shard of a user is a CRC32 of the
+    email, so the ws server and the webapp agree without coordination.
+    Reads group users by shard and pipeline one command per shard.
+    """
+
+    def __init__(self, count: int = 16, base: str = ONLINE_SET) -> None:
+        self.count = max(count, 1)
+        self.keys = [
+            hash_tagged(f"{base}:", str(index)) for index in range(self.count)
+        ]
+        self.total_keys = [
+            hash_tagged(ONLINE_TOTAL_PREFIX, str(index))
+            for index in range(self.count)
+        ]
+
+    def index(self, email: str) -> int:
+        return zlib.crc32(email.encode()) % self.count
+
+    def group(self, emails: list[str]) -> dict[int, list[str]]:
+        shards: dict[int, list[str]] = {}
+        for email in emails:
+            shards.setdefault(self.index(email), []).append(email)
+        return shards
+
+
+class RedisOnlineSet:
+    """Online users across the shards of `PresenceShards`."""
+
+    def __init__(self, client: redis.Redis, shards: PresenceShards) -> None:
+        self._client = client
+        self._shards = shards
+        self._set_online = client.register_script(_SET_ONLINE)
+
+    async def mark(self, email: str, online: bool) -> bool:
+        """Add or remove `email`; True when its membership changed."""
+        index = self._shards.index(email)
+        changed = await self._set_online(
+            keys=[self._shards.keys[index], self._shards.total_keys[index]],
+            args=[email, "1" if online else "0"],
+        )
+        return bool(changed)
+
+    async def states(self, emails: list[str]) -> dict[str, bool]:
+        """One SMISMEMBER per shard touched, in a single round trip."""
+        groups = self._shards.group(emails)
+        async with self._client.pipeline(transaction=False) as pipe:
+            for index, members in groups.items():
+                pipe.smismember(self._shards.keys[index], members)
+            results = await pipe.execute()
+        states = {}
+        for members, flags in zip(groups.values(), results):
+            states.update(
+                (email, bool(flag)) for email, flag in zip(members, flags)
+            )
+        return {email: states[email] for email in emails}
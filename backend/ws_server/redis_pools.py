@@ -0,0 +1,94 @@
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+
+import redis.asyncio as redis
+
+
+@dataclass(frozen=True)
+class RedisPoolConfig:
+    """Connection pool tuning for one class of Redis traffic.
+
+    Pools block for up to `pool_timeout` seconds when all connections are
+    busy instead of failing straight away. A `socket_timeout` of None waits
+    forever, which is what the pub/sub listener needs.
+    """
+
+    max_connections: int = 32
+    pool_timeout: float = 1.0
+    socket_timeout: float | None = 2.0
+    socket_connect_timeout: float = 2.0
+    health_check_interval: int = 30
+
+
+# pubsub: the long-lived subscriber connection.
+# hot: per-message publishes, presence and replay appends.
+# background: room membership persistence and replay reads on resume.
+DEFAULT_REDIS_POOLS = {
+    "pubsub": RedisPoolConfig(
+        max_connections=2, socket_timeout=None, health_check_interval=15
+    ),
+    "hot": RedisPoolConfig(max_connections=64, socket_timeout=1.0),
+    "background": RedisPoolConfig(
+        max_connections=8, pool_timeout=5.0, socket_timeout=10.0
+    ),
+}
+
+
+def _optional_float(value: str) -> float | None:
+    if value.lower() in {"", "0", "none"}:
+        return None
+    return float(value)
+
+
+def redis_pools_from_env(
+    environ: Mapping[str, str] = os.environ,
+) -> dict[str, RedisPoolConfig]:
+    """Read `WS_REDIS_<POOL>_<SETTING>` overrides, e.g.
+
+    `WS_REDIS_HOT_MAX_CONNECTIONS=128` or `WS_REDIS_BACKGROUND_SOCKET_TIMEOUT=30`.
+    """
+    pools = {}
+    for name, default in DEFAULT_REDIS_POOLS.items():
+        prefix = f"WS_REDIS_{name.upper()}_"
+        config = default
+        if value := environ.get(f"{prefix}MAX_CONNECTIONS"):
+            config = replace(config, max_connections=int(value))
+        if value := environ.get(f"{prefix}POOL_TIMEOUT"):
+            config = replace(config, pool_timeout=float(value))
+        if (value := environ.get(f"{prefix}SOCKET_TIMEOUT")) is not None:
+            config = replace(config, socket_timeout=_optional_float(value))
+        if value := environ.get(f"{prefix}CONNECT_TIMEOUT"):
+            config = replace(config, socket_connect_timeout=float(value))
+        if value := environ.get(f"{prefix}HEALTH_CHECK_INTERVAL"):
+            config = replace(config, health_check_interval=int(value))
+        pools[name] = config
+    return pools
+
+
+def build_redis_client(url: str, config: RedisPoolConfig) -> redis.Redis:
+    pool = redis.BlockingConnectionPool.from_url(
+        url,
+        decode_responses=True,
+        max_connections=max(config.max_connections, 1),
+        timeout=config.pool_timeout,
+        socket_timeout=config.socket_timeout,
+        socket_connect_timeout=config.socket_connect_timeout,
+        health_check_interval=config.health_check_interval,
+    )
+    # The client owns the pool and disconnects it on close.
+    return redis.Redis.from_pool(pool)
+
+
+def build_redis_cluster_client(
+    url: str, config: RedisPoolConfig
+) -> redis.RedisCluster:
+    # Cluster clients keep one pool per node; max_connections is per node.
+    return redis.RedisCluster.from_url(
+        url,
+        decode_responses=True,
+        max_connections=max(config.max_connections, 1),
+        socket_timeout=config.socket_timeout,
+        socket_connect_timeout=config.socket_connect_timeout,
+        health_check_interval=config.health_check_interval,
+    )
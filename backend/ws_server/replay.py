@@ -0,0 +1,141 @@
+import json
+from collections import OrderedDict, deque
+from typing import Any
+
+import redis.asyncio as redis
+
+from backend.ws_server.cluster import hash_tagged
+
+SEQ_PREFIX = "chat:seq:"
+REPLAY_PREFIX = "chat:replay:"
+
+# Assigns the recipient's next sequence number, stores the message in the
+# recipient's bounded replay buffer and publishes it, in one round trip.
+# The counter expires with the buffer, so recipients that never connect
+# (`to` is client-supplied) do not leave keys behind; a client resuming
+# across a restarted counter is handled by `_replay_result`. ARGV[5] is
+# PUBLISH, or SPUBLISH for a shard channel in the recipient's slot.
+_APPEND_AND_PUBLISH = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+local payload = cjson.decode(ARGV[1])
+payload['seq'] = seq
+local encoded = cjson.encode(payload)
+redis.call('ZADD', KEYS[2], seq, encoded)
+redis.call('ZREMRANGEBYRANK', KEYS[2], 0, -(tonumber(ARGV[2]) + 1))
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+redis.call(ARGV[5], ARGV[4], '{"event":"message","payload":' .. encoded .. '}')
+return encoded
+"""
+
+
+def _replay_result(
+    messages: list[dict[str, Any]], last_seq: int, current_seq: int
+) -> tuple[list[dict[str, Any]], bool]:
+    """Pair missed messages with whether they cover the whole gap.
+
+    `messages` are those after `last_seq`, or the whole buffer when the
+    counter restarted (expired or evicted) below the client's position.
+    """
+    if current_seq < last_seq:
+        return messages, False
+    if current_seq == last_seq:
+        return [], True
+    if not messages:
+        return [], False
+    return messages, messages[0].get("seq") == last_seq + 1
+
+
+class LocalReplayBuffer:
+    """In-process replay buffers for single-node runs without Redis.
+
+    Recipients are kept in a bounded LRU; an evicted recipient starts a
+    new sequence, like an expired counter in Redis.
+    """
+
+    def __init__(self, size: int, max_recipients: int = 10_000) -> None:
+        self._size = max(size, 1)
+        self._max_recipients = max(max_recipients, 1)
+        self._seqs: OrderedDict[str, int] = OrderedDict()
+        self._buffers: dict[str, deque[dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._seqs)
+
+    def append(self, recipient: str, payload: dict[str, Any]) -> None:
+        seq = self._seqs.get(recipient, 0) + 1
+        self._seqs[recipient] = seq
+        self._seqs.move_to_end(recipient)
+        payload["seq"] = seq
+        buffer = self._buffers.get(recipient)
+        if buffer is None:
+            buffer = self._buffers[recipient] = deque(maxlen=self._size)
+        buffer.append(payload)
+        while len(self._seqs) > self._max_recipients:
+            evicted, _ = self._seqs.popitem(last=False)
+            del self._buffers[evicted]
+
+    def since(
+        self, recipient: str, last_seq: int
+    ) -> tuple[list[dict[str, Any]], bool]:
+        current_seq = self._seqs.get(recipient, 0)
+        buffered = self._buffers.get(recipient, ())
+        if current_seq < last_seq:
+            return _replay_result(list(buffered), last_seq, current_seq)
+        messages = [
+            message for message in buffered if message["seq"] > last_seq
+        ]
+        return _replay_result(messages, last_seq, current_seq)
+
+
+class RedisReplayBuffer:
+    def __init__(
+        self,
+        client: redis.Redis,
+        size: int,
+        ttl: int,
+        reader: redis.Redis | None = None,
+        sharded: bool = False,
+    ) -> None:
+        self._client = client
+        self._publish_command = "SPUBLISH" if sharded else "PUBLISH"
+        # Replays are bulk reads, so they can be routed to another pool.
+        self._reader = reader or client
+        self._size = max(size, 1)
+        self._ttl = max(ttl, 1)
+        self._append = client.register_script(_APPEND_AND_PUBLISH)
+
+    async def append_and_publish(
+        self, recipient: str, payload: dict[str, Any], channel: str
+    ) -> dict[str, Any]:
+        encoded = await self._append(
+            keys=[
+                hash_tagged(SEQ_PREFIX, recipient),
+                hash_tagged(REPLAY_PREFIX, recipient),
+            ],
+            args=[
+                json.dumps(payload),
+                self._size,
+                self._ttl,
+                channel,
+                self._publish_command,
+            ],
+        )
+        return json.loads(encoded)
+
+    async def since(
+        self, recipient: str, last_seq: int
+    ) -> tuple[list[dict[str, Any]], bool]:
+        async with self._reader.pipeline(transaction=False) as pipe:
+            pipe.zrangebyscore(
+                hash_tagged(REPLAY_PREFIX, recipient), f"({last_seq}", "+inf"
+            )
+            pipe.get(hash_tagged(SEQ_PREFIX, recipient))
+            raw_messages, current = await pipe.execute()
+        current_seq = int(current or 0)
+        if current_seq < last_seq:
+            raw_messages = await self._reader.zrange(
+                hash_tagged(REPLAY_PREFIX, recipient), 0, -1
+            )
+        messages = [json.loads(raw) for raw in raw_messages]
+        return _replay_result(messages, last_seq, current_seq)
@@ -0,0 +1,64 @@
+import re
+
+ROOM_NAME_PATTERN = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+
+
+def is_valid_room_name(room: object) -> bool:
+    return (
+        isinstance(room, str) and ROOM_NAME_PATTERN.fullmatch(room) is not None
+    )
+
+
+class RoomIndex:
+    """Node-local index of room -> members connected to this node.
+
+    `add` and `remove` report when a room gains its first or loses its last
+    local member, which is when the node has to (un)subscribe from the
+    room channel.
+    """
+
+    def __init__(self) -> None:
+        self._members: dict[str, set[str]] = {}
+        self._rooms: dict[str, set[str]] = {}
+
+    def add(self, room: str, email: str) -> bool:
+        members = self._members.get(room)
+        first = members is None
+        if members is None:
+            members = self._members[room] = set()
+        members.add(email)
+        self._rooms.setdefault(email, set()).add(room)
+        return first
+
+    def remove(self, room: str, email: str) -> bool:
+        rooms = self._rooms.get(email)
+        if rooms is not None:
+            rooms.discard(room)
+            if not rooms:
+                del self._rooms[email]
+
+        members = self._members.get(room)
+        if members is None:
+            return False
+        members.discard(email)
+        if members:
+            return False
+        del self._members[room]
+        return True
+
+    def remove_user(self, email: str) -> list[str]:
+        """Drop a user from all rooms; returns rooms left without members."""
+        emptied = []
+        for room in list(self._rooms.get(email, ())):
+            if self.remove(room, email):
+                emptied.append(room)
+        return emptied
+
+    def members(self, room: str) -> set[str]:
+        return self._members.get(room, set())
+
+    def rooms_of(self, email: str) -> set[str]:
+        return self._rooms.get(email, set())
+
+    def __contains__(self, room: str) -> bool:
+        return room in self._members
@@ -2,30 +2,165 @@ import asyncio
 import contextlib
 import json
 import logging
+import math
 import os
+import random
+import re
+import signal
+import time
+from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from http import HTTPStatus
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 from uuid import uuid4
 
 import jwt
 import redis.asyncio as redis
+from websockets import broadcast
+from websockets.datastructures import Headers
 from websockets.exceptions import ConnectionClosed
+from websockets.legacy.server import HTTPResponse
 from websockets.server import WebSocketServerProtocol, serve
 
+from backend.ws_server.acks import AckTracker
+from backend.ws_server.batching import BatchPolicy, FrameBatcher
+from backend.ws_server.client_cache import INVALIDATE_CHANNEL, TrackedSetCache
+from backend.ws_server.cluster import (
+    ShardedSubscriber,
+    hash_tagged,
+    spublish,
+    strip_hash_tag,
+)
+from backend.ws_server.connection import (
+    BufferLimits,
+    ClientConnection,
+    ClientRegistry,
+)
+from backend.ws_server.dedup import (
+    RedisSendClaims,
+    SendDeduplicator,
+    parse_client_msg_id,
+)
+from backend.ws_server.flood import (
+    FloodGuard,
+    FloodLimit,
+    FloodState,
+    parse_flood_limits,
+)
+from backend.ws_server.metrics import LatencyHistogram
+from backend.ws_server.presence import (
+    DAILY_ACTIVE_TTL,
+    ONLINE_SET,
+    ROSTER_PREFIX,
+    InterestIndex,
+    OfflinePeerCache,
+    PresenceShards,
+    RedisOnlineSet,
+    RedisRosters,
+    add_to_roster,
+    daily_active_key,
+    parse_roster_emails,
+)
+from backend.ws_server.redis_pools import (
+    DEFAULT_REDIS_POOLS,
+    RedisPoolConfig,
+    build_redis_client,
+    build_redis_cluster_client,
+    redis_pools_from_env,
+)
+from backend.ws_server.replay import LocalReplayBuffer, RedisReplayBuffer
+from backend.ws_server.rooms import RoomIndex, is_valid_room_name
+
 logger = logging.getLogger(__name__)
 
 MESSAGE_CHANNEL = "chat:messages"
 PRESENCE_CHANNEL = "chat:presence"
-ONLINE_SET = "chat:online_users"
 ONLINE_COUNT_PREFIX = "chat:online_count:"
+ROOM_CHANNEL_PREFIX = "chat:room:"
+USER_ROOMS_PREFIX = "chat:user_rooms:"
+# Per-user shard channel for direct messages in cluster mode.
+USER_CHANNEL_PREFIX = "chat:user:"
+# Direct messages, archived into the webapp's message store.
+HISTORY_STREAM = "chat:history"
+
+RATE_LIMITED_FRAME = json.dumps(
+    {"type": "error", "message": "Rate limit exceeded, slow down."}
+)
 
 
-@dataclass
-class ConnectedClient:
+@dataclass(frozen=True, slots=True)
+class Identity:
     email: str
-    socket: WebSocketServerProtocol
+    role: str
+    # Highest sequence number the client has seen, when resuming.
+    last_seq: int | None = None
+    # Client promises to ack delivered messages.
+    acks: bool = False
+    # Client accepts JSON array frames of coalesced messages.
+    batch: bool = False
+
+
+def _parse_last_seq(value: Any) -> int | None:
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    return None
+
+
+_ATTACHMENT_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _parse_attachment(value: Any) -> dict[str, Any] | None:
+    """Validate an uploaded-attachment reference; only its id is forwarded.
+
+    Filename, type and size come from the webapp
+    (`GET /attachments/<id>/info`), never from the sender.
+    """
+    attachment_id = value.get("id") if isinstance(value, dict) else None
+    if not isinstance(attachment_id, str) or not _ATTACHMENT_ID.fullmatch(
+        attachment_id
+    ):
+        return None
+    return {"id": attachment_id}
+
+
+def _parse_flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.lower() in {"1", "true", "yes"}
+    return value is True
+
+
+@dataclass(frozen=True)
+class DrainPolicy:
+    """How a draining node sheds its sockets.
+
+    Sockets are closed `batch_size` at a time, `interval` seconds apart,
+    and each client is told to wait a random 0..`jitter` seconds before
+    reconnecting so the remaining nodes see a spread-out ramp.
+    """
+
+    batch_size: int = 200
+    interval: float = 0.5
+    jitter: float = 10.0
+    timeout: float = 30.0
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    """Limits applied to sockets before they are authenticated.
+
+    Connections over a limit are closed with 1013 ("try again later").
+    `max_connections` and `max_loop_lag` of 0 disable those checks.
+    """
+
+    max_pending_auth: int = 1000
+    auth_timeout: float = 2.0
+    max_connections: int = 0
+    max_loop_lag: float = 0.5
+    lag_probe_interval: float = 0.25
 
 
 class ChatHub:
@@ -36,31 +171,131 @@ class ChatHub:
         redis_required: bool = False,
         redis_retries: int = 5,
         redis_delay: float = 1.0,
+        flood_limits: dict[str, FloodLimit] | None = None,
+        flood_max_strikes: int = 20,
+        drain_policy: DrainPolicy | None = None,
+        admission_policy: AdmissionPolicy | None = None,
+        replay_size: int = 100,
+        replay_ttl: int = 86400,
+        ack_timeout: float = 10.0,
+        ack_max_retries: int = 2,
+        redis_pools: dict[str, RedisPoolConfig] | None = None,
+        redis_cluster: bool = False,
+        history_maxlen: int = 1_000_000,
+        history_stream: str = HISTORY_STREAM,
+        dedup_window: float = 300.0,
+        dedup_max_per_sender: int = 256,
+        batch_policy: BatchPolicy | None = None,
+        presence_broadcast: bool = False,
+        presence_shards: int = 16,
+        online_set: str = ONLINE_SET,
+        daily_active: bool = False,
+        max_roster: int = 1000,
     ) -> None:
         self._jwt_secret = jwt_secret
         self._redis_url = redis_url
         self._redis_required = redis_required
         self._redis_retries = max(redis_retries, 1)
         self._redis_delay = max(redis_delay, 0.1)
-        self._clients: dict[str, WebSocketServerProtocol] = {}
-        self._lock = asyncio.Lock()
+        self._clients = ClientRegistry()
+        self._redis_pools = {**DEFAULT_REDIS_POOLS, **(redis_pools or {})}
+        # Hot-path commands; background work and the subscriber get their
+        # own pools so neither can starve message delivery.
         self._redis: redis.Redis | None = None
+        self._background: redis.Redis | None = None
+        self._pubsub_client: redis.Redis | None = None
         self._pubsub: redis.client.PubSub | None = None
+        # Cluster mode: sharded pub/sub instead of the single subscriber.
+        self._redis_cluster = redis_cluster
+        self._sharded: ShardedSubscriber | None = None
+        self._presence_cache = TrackedSetCache((online_set,))
         self._pubsub_task: asyncio.Task[None] | None = None
         self._server_id = uuid4().hex
+        self._rooms = RoomIndex()
+        self._flood_guard = FloodGuard(flood_limits, flood_max_strikes)
+        # Membership store used when running without Redis.
+        self._local_user_rooms: dict[str, set[str]] = {}
+        self._drain_policy = drain_policy or DrainPolicy()
+        self._draining = False
+        self._drain_task: asyncio.Task[None] | None = None
+        self._drained = asyncio.Event()
+        self._handler_tasks: set[asyncio.Task[Any]] = set()
+        self._admission = admission_policy or AdmissionPolicy()
+        self._pending_auth = 0
+        self._loop_lag = 0.0
+        self._lag_task: asyncio.Task[None] | None = None
+        self._rejections: Counter[str] = Counter()
+        self._replay_size = replay_size
+        self._replay_ttl = replay_ttl
+        self._local_replay = LocalReplayBuffer(replay_size)
+        self._replay: RedisReplayBuffer | None = None
+        # Live messages held back while a resuming client is replayed.
+        self._replaying: dict[str, list[dict[str, Any]]] = {}
+        self._acks = AckTracker(ack_timeout, ack_max_retries)
+        self._ack_task: asyncio.Task[None] | None = None
+        self._delivery_latency = LatencyHistogram()
+        self._ack_latency = LatencyHistogram()
+        self._history_maxlen = max(history_maxlen, 0)
+        self._history_stream = history_stream
+        self._dedup = SendDeduplicator(dedup_window, dedup_max_per_sender)
+        self._send_claims: RedisSendClaims | None = None
+        self._batch_policy = batch_policy or BatchPolicy()
+        # Presence goes to roster watchers only, unless every socket gets
+        # every change (small deployments).
+        self._presence_broadcast = presence_broadcast
+        self._interest = InterestIndex()
+        self._offline_peers = OfflinePeerCache()
+        # Roster store used when running without Redis.
+        self._local_rosters: dict[str, set[str]] = {}
+        self._max_roster = max(max_roster, 1)
+        self._rosters: RedisRosters | None = None
+        self._presence_shards = PresenceShards(presence_shards, online_set)
+        self._online: RedisOnlineSet | None = None
+        self._daily_active = daily_active
 
     async def start(self) -> None:
+        if self._admission.max_loop_lag > 0:
+            self._lag_task = asyncio.create_task(self._monitor_loop_lag())
+        self._ack_task = asyncio.create_task(self._sweep_unacked())
+
         if not self._redis_url:
             return
 
         for attempt in range(1, self._redis_retries + 1):
             try:
-                self._redis = redis.from_url(
-                    self._redis_url, decode_responses=True
+                if self._redis_cluster:
+                    await self._start_cluster()
+                    return
+                self._redis = build_redis_client(
+                    self._redis_url, self._redis_pools["hot"]
+                )
+                self._background = build_redis_client(
+                    self._redis_url, self._redis_pools["background"]
+                )
+                self._pubsub_client = build_redis_client(
+                    self._redis_url, self._redis_pools["pubsub"]
                 )
                 await self._redis.ping()
-                self._pubsub = self._redis.pubsub()
-                await self._pubsub.subscribe(MESSAGE_CHANNEL, PRESENCE_CHANNEL)
+                self._replay = RedisReplayBuffer(
+                    self._redis,
+                    self._replay_size,
+                    self._replay_ttl,
+                    reader=self._background,
+                )
+                self._send_claims = self._build_send_claims(self._redis)
+                self._online = RedisOnlineSet(
+                    self._redis, self._presence_shards
+                )
+                self._rosters = RedisRosters(
+                    self._background, self._max_roster
+                )
+                self._pubsub = self._pubsub_client.pubsub()
+                channels = [MESSAGE_CHANNEL, PRESENCE_CHANNEL]
+                # Only broadcast-mode user lists read the whole online set.
+                if self._presence_broadcast:
+                    await self._track_presence()
+                    channels.append(INVALIDATE_CHANNEL)
+                await self._pubsub.subscribe(*channels)
                 self._pubsub_task = asyncio.create_task(self._redis_listener())
                 return
             except Exception as exc:
@@ -70,50 +305,307 @@ class ChatHub:
                     self._redis_retries,
                     exc,
                 )
-                if self._redis:
-                    await self._redis.close()
-                    self._redis = None
+                await self._close_redis()
                 await asyncio.sleep(self._redis_delay)
 
         if self._redis_required:
             raise RuntimeError("Redis is required but unavailable")
 
     async def stop(self) -> None:
+        for task in (self._lag_task, self._ack_task):
+            if task:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
         if self._pubsub_task:
             self._pubsub_task.cancel()
             with contextlib.suppress(asyncio.CancelledError):
                 await self._pubsub_task
 
+        await self._close_redis()
+
+    async def _start_cluster(self) -> None:
+        """Connect to a Redis Cluster and use sharded pub/sub.
+
+        Direct messages and receipts go to a per-recipient shard channel that
+        shares the recipient's hash slot with their sequence and replay keys,
+        so each node only receives traffic for its own users. Presence keys
+        are not cached locally in this mode.
+        """
+        self._redis = build_redis_cluster_client(
+            self._redis_url, self._redis_pools["hot"]
+        )
+        self._background = build_redis_cluster_client(
+            self._redis_url, self._redis_pools["background"]
+        )
+        await self._redis.initialize()
+        await self._background.initialize()
+        self._replay = RedisReplayBuffer(
+            self._redis,
+            self._replay_size,
+            self._replay_ttl,
+            reader=self._background,
+            sharded=True,
+        )
+        self._send_claims = self._build_send_claims(self._redis)
+        self._online = RedisOnlineSet(self._redis, self._presence_shards)
+        self._rosters = RedisRosters(self._background, self._max_roster)
+        self._sharded = ShardedSubscriber(self._redis, self._dispatch_pubsub)
+        await self._sharded.subscribe(PRESENCE_CHANNEL)
+
+    async def _track_presence(self) -> None:
+        """Serve presence reads from node memory, invalidated by Redis."""
+        await self._pubsub.connect()
+        connection = self._pubsub.connection
+        cache = self._presence_cache
+        # Tracking must be re-enabled on reconnect before the pub/sub
+        # re-subscribes, so our callback goes first.
+        connection.deregister_connect_callback(self._pubsub.on_connect)
+        connection.register_connect_callback(cache.enable_tracking)
+        connection.register_connect_callback(self._pubsub.on_connect)
+        try:
+            await cache.enable_tracking(connection)
+        except redis.ResponseError as exc:
+            logger.warning("Client-side caching unavailable: %s", exc)
+            connection.deregister_connect_callback(cache.enable_tracking)
+
+    async def _close_redis(self) -> None:
+        self._presence_cache.disable()
         if self._pubsub:
-            await self._pubsub.close()
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._sharded:
+            await self._sharded.close()
+            self._sharded = None
+        for client in (self._redis, self._background, self._pubsub_client):
+            if client:
+                await client.aclose()
+        self._redis = self._background = self._pubsub_client = None
+        self._replay = None
+        self._send_claims = None
+        self._online = None
+        self._rosters = None
+
+    def _build_send_claims(self, client: Any) -> RedisSendClaims | None:
+        window = self._dedup.window
+        return RedisSendClaims(client, math.ceil(window)) if window else None
+
+    @property
+    def draining(self) -> bool:
+        return self._draining
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "connections": len(self._clients),
+            "pending_auth": self._pending_auth,
+            "loop_lag_ms": round(self._loop_lag * 1000, 3),
+            "draining": self._draining,
+            "rejected_handshakes": dict(self._rejections),
+            "delivery_latency": self._delivery_latency.snapshot(),
+            "ack_latency": self._ack_latency.snapshot(),
+            "acks": self._acks.snapshot(),
+            "dedup": self._dedup.snapshot(),
+            "presence_watched_users": len(self._interest),
+            "presence_cache": self._presence_cache.snapshot(),
+        }
 
-        if self._redis:
-            await self._redis.close()
+    async def _monitor_loop_lag(self) -> None:
+        interval = self._admission.lag_probe_interval
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(interval)
+            self._loop_lag = max(time.monotonic() - started - interval, 0.0)
+
+    def _admission_refusal(self) -> str | None:
+        policy = self._admission
+        if self._pending_auth >= policy.max_pending_auth:
+            return "pending_auth"
+        if policy.max_connections and (
+            len(self._clients) >= policy.max_connections
+        ):
+            return "max_connections"
+        if policy.max_loop_lag and self._loop_lag > policy.max_loop_lag:
+            return "loop_lag"
+        return None
+
+    async def wait_drained(self) -> None:
+        await self._drained.wait()
+
+    def request_drain(self) -> None:
+        """Start draining (idempotent); safe to call from signal handlers."""
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self.drain())
+
+    def handle_stop_signal(self) -> None:
+        """SIGTERM/SIGINT: drain, or on a second signal stop right away."""
+        if self._drain_task is None:
+            self.request_drain()
+            return
+        if self._drained.is_set():
+            return
+        logger.warning("Second stop signal, abandoning the drain")
+        self._drain_task.cancel()
+        self._drained.set()
+
+    async def drain(self) -> None:
+        self._draining = True
+        policy = self._drain_policy
+        sockets = list(self._clients.sockets)
+        logger.info("Draining %s connections", len(sockets))
+
+        batch_size = max(policy.batch_size, 1)
+        for start in range(0, len(sockets), batch_size):
+            if start:
+                await asyncio.sleep(policy.interval)
+            await asyncio.gather(
+                *(
+                    self._close_for_drain(socket)
+                    for socket in sockets[start : start + batch_size]
+                ),
+                return_exceptions=True,
+            )
+
+        # Handlers run _unregister on their way out, which flushes the
+        # presence state for every closed socket.
+        pending = {task for task in self._handler_tasks if not task.done()}
+        if pending:
+            await asyncio.wait(pending, timeout=policy.timeout)
+        self._drained.set()
+
+    async def _close_for_drain(
+        self, websocket: WebSocketServerProtocol
+    ) -> None:
+        retry_after_ms = int(
+            random.uniform(0, self._drain_policy.jitter) * 1000
+        )
+        await self._safe_send(
+            websocket, {"type": "reconnect", "retry_after_ms": retry_after_ms}
+        )
+        batcher = self._clients.batcher(websocket)
+        if batcher is not None:
+            await batcher.flush()
+        await websocket.close(
+            code=1012, reason=f"Draining, retry in {retry_after_ms}ms"
+        )
+
+    async def process_request(
+        self, path: str, request_headers: Headers
+    ) -> HTTPResponse | None:
+        request_path = urlparse(path).path
+        if request_path == "/admin/drain":
+            return self._handle_drain_request(request_headers)
+        if request_path == "/stats":
+            if not self._is_admin(request_headers):
+                return HTTPStatus.FORBIDDEN, [], b"forbidden\n"
+            return (
+                HTTPStatus.OK,
+                [("Content-Type", "application/json")],
+                json.dumps(self.stats()).encode(),
+            )
+
+        if self._draining:
+            # Refused before the upgrade so the balancer picks another node.
+            return (
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                [("Retry-After", str(int(self._drain_policy.jitter) or 1))],
+                b"draining\n",
+            )
+        return None
+
+    def _is_admin(self, request_headers: Headers) -> bool:
+        auth_header = request_headers.get("Authorization", "")
+        token = auth_header.removeprefix("Bearer ").strip()
+        try:
+            payload = jwt.decode(token, self._jwt_secret, algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            return False
+        return payload.get("role") == "admin"
+
+    def _handle_drain_request(self, request_headers: Headers) -> HTTPResponse:
+        if not self._is_admin(request_headers):
+            return HTTPStatus.FORBIDDEN, [], b"forbidden\n"
+
+        self.request_drain()
+        return HTTPStatus.ACCEPTED, [], b"draining\n"
 
     async def handler(
         self, websocket: WebSocketServerProtocol, path: str
     ) -> None:
-        email = await self._authenticate(websocket, path)
-        if not email:
+        task = asyncio.current_task()
+        if task:
+            self._handler_tasks.add(task)
+            task.add_done_callback(self._handler_tasks.discard)
+
+        refusal = self._admission_refusal()
+        if refusal:
+            self._rejections[refusal] += 1
+            await websocket.close(code=1013, reason="Try again later")
+            return
+
+        self._pending_auth += 1
+        try:
+            identity = await self._authenticate(websocket, path)
+        finally:
+            self._pending_auth -= 1
+        if not identity:
+            return
+        email = identity.email
+
+        if self._draining:
+            await websocket.close(code=1012, reason="Draining")
             return
 
-        await self._register(email, websocket)
-        await self._send_user_list(websocket)
+        batcher = None
+        if identity.batch and self._batch_policy.window > 0:
+            batcher = FrameBatcher(websocket, self._batch_policy)
+            # Sent before anything is batched, so the client knows array
+            # frames may follow.
+            await self._safe_send(
+                websocket,
+                {
+                    "type": "batching",
+                    "window_ms": round(self._batch_policy.window * 1000),
+                    "max_bytes": self._batch_policy.max_bytes,
+                },
+            )
+        client = ClientConnection(
+            email,
+            identity.role,
+            websocket,
+            self._flood_guard.open(email, identity.role),
+            identity.acks,
+            batcher,
+        )
+        if identity.last_seq is not None:
+            self._replaying[email] = []
+        try:
+            await self._register(client)
+            await self._send_user_list(email, websocket)
+            if identity.last_seq is not None:
+                await self._replay_missed(email, websocket, identity.last_seq)
+        finally:
+            self._replaying.pop(email, None)
 
         try:
             async for raw_message in websocket:
-                await self._handle_message(email, websocket, raw_message)
+                await self._handle_message(
+                    email, websocket, raw_message, client.flood
+                )
         except ConnectionClosed:
             logger.info(f"Connection closed for {email}")
         finally:
+            if batcher is not None:
+                batcher.close()
             await self._unregister(email, websocket)
 
     async def _authenticate(
         self, websocket: WebSocketServerProtocol, path: str
-    ) -> str | None:
-        token = self._token_from_path(path)
-        if not token:
-            token = await self._token_from_auth_message(websocket)
+    ) -> Identity | None:
+        params = self._auth_params_from_path(path)
+        if not params.get("token"):
+            params = await self._auth_params_from_message(websocket)
+        token = params.get("token")
 
         if not token:
             await self._safe_send(
@@ -142,46 +634,97 @@ class ChatHub:
             await websocket.close(code=4003, reason="Invalid auth payload")
             return None
 
-        return email
+        role = payload.get("role")
+        return Identity(
+            email=email,
+            role=role if isinstance(role, str) else "user",
+            last_seq=_parse_last_seq(params.get("last_seq")),
+            acks=_parse_flag(params.get("acks")),
+            batch=_parse_flag(params.get("batch")),
+        )
 
-    def _token_from_path(self, path: str) -> str | None:
+    def _auth_params_from_path(self, path: str) -> dict[str, Any]:
         query = urlparse(path).query
         params = parse_qs(query)
-        return params.get("token", [None])[0]
+        return {key: values[0] for key, values in params.items()}
 
-    async def _token_from_auth_message(
+    async def _auth_params_from_message(
         self, websocket: WebSocketServerProtocol
-    ) -> str | None:
+    ) -> dict[str, Any]:
         try:
-            raw = await asyncio.wait_for(websocket.recv(), timeout=5)
+            raw = await asyncio.wait_for(
+                websocket.recv(), timeout=self._admission.auth_timeout
+            )
         except asyncio.TimeoutError:
-            return None
+            self._rejections["auth_timeout"] += 1
+            return {}
+        except ConnectionClosed:
+            return {}
 
         try:
             message = json.loads(raw)
         except json.JSONDecodeError:
-            return None
+            return {}
 
         if not isinstance(message, dict):
-            return None
+            return {}
 
         if message.get("type") != "auth":
-            return None
+            return {}
 
-        token = message.get("token")
-        return token if isinstance(token, str) else None
+        if not isinstance(message.get("token"), str):
+            return {}
+        return message
 
-    async def _register(
-        self, email: str, websocket: WebSocketServerProtocol
+    async def _replay_missed(
+        self, email: str, websocket: WebSocketServerProtocol, last_seq: int
     ) -> None:
-        async with self._lock:
-            existing = self._clients.get(email)
-            if existing and existing is not websocket:
-                await existing.close(code=4000, reason="New connection")
-            self._clients[email] = websocket
+        """Send everything after `last_seq` in one frame, then go live.
+
+        Live deliveries for the user are queued while the buffer is read,
+        so the client sees each sequence number exactly once and in order.
+        """
+        try:
+            if self._replay:
+                messages, complete = await self._replay.since(email, last_seq)
+            else:
+                messages, complete = self._local_replay.since(email, last_seq)
+        except Exception:
+            logger.exception("Failed to read replay buffer for %s", email)
+            messages, complete = [], False
+
+        await self._safe_send(
+            websocket,
+            {"type": "replay", "messages": messages, "complete": complete},
+        )
+
+        replayed_up_to = messages[-1]["seq"] if messages else last_seq
+        held = self._replaying.get(email, [])
+        while held:
+            payload = held.pop(0)
+            if payload.get("seq", replayed_up_to + 1) > replayed_up_to:
+                await self._safe_send(websocket, payload)
+        # No await between the empty check and this pop, so nothing can be
+        # queued behind the flush.
+        self._replaying.pop(email, None)
+
+    async def _register(self, client: ClientConnection) -> None:
+        email = client.email
+        replaced = self._clients.add(client)
+        if replaced is not None:
+            await replaced.socket.close(code=4000, reason="New connection")
+
+        if self._sharded:
+            await self._sharded.subscribe(
+                hash_tagged(USER_CHANNEL_PREFIX, email)
+            )
+        await self._restore_rooms(email)
+        await self._restore_roster(email)
 
         if self._redis:
             state_changed = await self._mark_online(email)
+            if self._daily_active:
+                await self._record_active(email)
             if state_changed:
                 await self._broadcast_user_status(email, True)
         else:
@@ -190,10 +733,14 @@ class ChatHub:
     async def _unregister(
         self, email: str, websocket: WebSocketServerProtocol
     ) -> None:
-        async with self._lock:
-            is_current = self._clients.get(email) is websocket
-            if is_current:
-                self._clients.pop(email, None)
+        is_current = self._clients.remove(email, websocket) is not None
+        if is_current:
+            if self._sharded:
+                await self._sharded.unsubscribe(
+                    hash_tagged(USER_CHANNEL_PREFIX, email)
+                )
+            await self._unsubscribe_rooms(self._rooms.remove_user(email))
+            self._interest.remove_user(email)
 
         if self._redis:
             state_changed = await self._mark_offline(email)
@@ -203,7 +750,11 @@ class ChatHub:
             await self._broadcast_user_status(email, False)
 
     async def _handle_message(
-        self, email: str, websocket: WebSocketServerProtocol, raw: str
+        self,
+        email: str,
+        websocket: WebSocketServerProtocol,
+        raw: str,
+        flood: FloodState,
     ) -> None:
         try:
             message = json.loads(raw)
@@ -223,9 +774,23 @@ class ChatHub:
 
         message_type = message.get("type")
         if message_type == "message":
-            await self._handle_chat_message(email, websocket, message)
+            await self._handle_chat_message(email, websocket, message, flood)
+        elif message_type == "read":
+            await self._handle_read(email, websocket, message, flood)
+        elif message_type == "ack":
+            await self._handle_ack(email, message)
         elif message_type == "list_users":
-            await self._send_user_list(websocket)
+            await self._send_user_list(email, websocket)
+        elif message_type == "roster_add":
+            await self._handle_roster_add(email, websocket, message, flood)
+        elif message_type == "roster_remove":
+            await self._handle_roster_remove(email, websocket, message, flood)
+        elif message_type == "join_room":
+            await self._handle_join_room(email, websocket, message, flood)
+        elif message_type == "leave_room":
+            await self._handle_leave_room(email, websocket, message, flood)
+        elif message_type == "room_message":
+            await self._handle_room_message(email, websocket, message, flood)
         else:
             await self._safe_send(
                 websocket,
@@ -237,9 +802,11 @@ class ChatHub:
         email: str,
         websocket: WebSocketServerProtocol,
         message: dict[str, Any],
+        flood: FloodState,
     ) -> None:
         recipient = message.get("to")
-        content = message.get("content")
+        content = message.get("content", "")
+        attachment = None
 
         if not isinstance(recipient, str) or not recipient:
             await self._safe_send(
@@ -248,38 +815,519 @@ class ChatHub:
             )
             return
 
-        if not isinstance(content, str) or not content.strip():
+        if "attachment" in message:
+            attachment = _parse_attachment(message["attachment"])
+            if attachment is None:
+                await self._safe_send(
+                    websocket,
+                    {"type": "error", "message": "Invalid attachment."},
+                )
+                return
+
+        if not isinstance(content, str) or not (content.strip() or attachment):
             await self._safe_send(
                 websocket,
                 {"type": "error", "message": "Message cannot be empty."},
             )
             return
 
+        client_msg_id = None
+        if "client_msg_id" in message:
+            client_msg_id = parse_client_msg_id(message["client_msg_id"])
+            if client_msg_id is None:
+                await self._safe_send(
+                    websocket,
+                    {"type": "error", "message": "Invalid client_msg_id."},
+                )
+                return
+
+        if not await self._check_flood(websocket, flood):
+            return
+
+        message_id = uuid4().hex
+        if client_msg_id:
+            sent_as = await self._claim_send(email, client_msg_id, message_id)
+            if sent_as is not None:
+                # A retry of a send we already published: acknowledge it
+                # again, deliver nothing.
+                await self._safe_send(
+                    websocket,
+                    {
+                        "type": "sent",
+                        "client_msg_id": client_msg_id,
+                        "id": sent_as,
+                        "duplicate": True,
+                    },
+                )
+                return
+
         payload = {
             "type": "message",
+            "id": message_id,
             "from": email,
             "to": recipient,
             "content": content.strip(),
             "timestamp": datetime.now(timezone.utc).isoformat(),
+            "sent_at_ms": int(time.time() * 1000),
         }
+        if attachment:
+            payload["attachment"] = attachment
 
         await self._publish_message(payload)
+        if recipient not in self._interest.watching(email):
+            await self._add_contact(email, recipient)
+        if client_msg_id:
+            await self._safe_send(
+                websocket,
+                {
+                    "type": "sent",
+                    "client_msg_id": client_msg_id,
+                    "id": message_id,
+                    "duplicate": False,
+                },
+            )
+
+    async def _claim_send(
+        self, email: str, client_msg_id: str, message_id: str
+    ) -> str | None:
+        """The id a `client_msg_id` was already sent as, else None.
+
+        The node-local window answers retries on this node without a round
+        trip; Redis catches retries that reconnected to another node.
+        """
+        if not self._dedup.window:
+            return None
+        sent_as = self._dedup.claim(email, client_msg_id, message_id)
+        if sent_as is not None or not self._send_claims:
+            return sent_as
+        try:
+            sent_as = await self._send_claims.claim(
+                email, client_msg_id, message_id
+            )
+        except Exception:
+            # Fail open: a lost claim risks a duplicate, not a lost message.
+            logger.exception("Failed to claim send in Redis.")
+            return None
+        if sent_as is not None:
+            self._dedup.remember(email, client_msg_id, sent_as)
+        return sent_as
+
+    async def _handle_read(
+        self,
+        email: str,
+        websocket: WebSocketServerProtocol,
+        message: dict[str, Any],
+        flood: FloodState,
+    ) -> None:
+        peer = message.get("peer")
+        if not isinstance(peer, str) or not peer:
+            await self._safe_send(
+                websocket,
+                {"type": "error", "message": "Missing peer."},
+            )
+            return
+
+        if not await self._check_flood(websocket, flood):
+            return
+
+        await self._record_history(
+            "read",
+            {
+                "reader": email,
+                "peer": peer,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+
+    async def _handle_ack(self, email: str, message: dict[str, Any]) -> None:
+        message_id = message.get("id")
+        if not isinstance(message_id, str):
+            return
+
+        pending = self._acks.ack(message_id, email)
+        if pending is None:
+            return
+
+        self._ack_latency.observe(max(time.time() - pending.sent_at, 0.0))
+        sender = pending.payload.get("from")
+        if isinstance(sender, str):
+            await self._publish_receipt(
+                sender,
+                {
+                    "type": "receipt",
+                    "id": message_id,
+                    "recipient": email,
+                    "status": "delivered",
+                },
+            )
+
+    async def _publish_receipt(
+        self, sender: str, receipt: dict[str, Any]
+    ) -> None:
+        if self._redis:
+            message = {"event": "receipt", "to": sender, "payload": receipt}
+            channel = (
+                hash_tagged(USER_CHANNEL_PREFIX, sender)
+                if self._sharded
+                else MESSAGE_CHANNEL
+            )
+            try:
+                await self._publish(channel, json.dumps(message))
+                return
+            except Exception:
+                logger.exception("Failed to publish receipt.")
+        await self._send_to(sender, receipt)
+
+    async def _sweep_unacked(self) -> None:
+        interval = min(max(self._acks.timeout / 4, 0.05), 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for pending in self._acks.pop_expired(now):
+                # Only retry on a socket we still hold; reconnecting clients
+                # recover the message from the replay buffer instead.
+                client = self._clients.get(pending.payload.get("to"))
+                if client is None:
+                    continue
+                self._acks.retry(pending, now)
+                await self._safe_send(client.socket, pending.payload)
 
-    async def _send_to(self, email: str, payload: dict[str, Any]) -> None:
-        async with self._lock:
-            recipient = self._clients.get(email)
+    async def _check_flood(
+        self, websocket: WebSocketServerProtocol, flood: FloodState
+    ) -> bool:
+        if self._flood_guard.allow(flood):
+            return True
+
+        if flood.strikes >= self._flood_guard.max_strikes:
+            await websocket.close(code=1008, reason="Rate limit exceeded")
+        else:
+            await self._send_frame(websocket, RATE_LIMITED_FRAME)
+        return False
+
+    async def _handle_join_room(
+        self,
+        email: str,
+        websocket: WebSocketServerProtocol,
+        message: dict[str, Any],
+        flood: FloodState,
+    ) -> None:
+        room = message.get("room")
+        if not is_valid_room_name(room):
+            await self._safe_send(
+                websocket, {"type": "error", "message": "Invalid room."}
+            )
+            return
+
+        if not await self._check_flood(websocket, flood):
+            return
 
-        if recipient:
-            await self._safe_send(recipient, payload)
+        if self._background:
+            await self._background.sadd(
+                hash_tagged(USER_ROOMS_PREFIX, email), room
+            )
+        else:
+            self._local_user_rooms.setdefault(email, set()).add(room)
+
+        if self._rooms.add(room, email):
+            await self._subscribe_rooms([room])
+        await self._safe_send(websocket, {"type": "room_joined", "room": room})
+
+    async def _handle_leave_room(
+        self,
+        email: str,
+        websocket: WebSocketServerProtocol,
+        message: dict[str, Any],
+        flood: FloodState,
+    ) -> None:
+        room = message.get("room")
+        if not is_valid_room_name(room):
+            await self._safe_send(
+                websocket, {"type": "error", "message": "Invalid room."}
+            )
+            return
+
+        if not await self._check_flood(websocket, flood):
+            return
+
+        if self._background:
+            await self._background.srem(
+                hash_tagged(USER_ROOMS_PREFIX, email), room
+            )
+        else:
+            self._local_user_rooms.get(email, set()).discard(room)
+
+        if self._rooms.remove(room, email):
+            await self._unsubscribe_rooms([room])
+        await self._safe_send(websocket, {"type": "room_left", "room": room})
+
+    async def _handle_room_message(
+        self,
+        email: str,
+        websocket: WebSocketServerProtocol,
+        message: dict[str, Any],
+        flood: FloodState,
+    ) -> None:
+        room = message.get("room")
+        content = message.get("content")
+
+        # The sender is connected here, so the local index is authoritative.
+        if not is_valid_room_name(room) or email not in self._rooms.members(
+            room
+        ):
+            await self._safe_send(
+                websocket,
+                {"type": "error", "message": "Not a member of this room."},
+            )
+            return
+
+        if not isinstance(content, str) or not content.strip():
+            await self._safe_send(
+                websocket,
+                {"type": "error", "message": "Message cannot be empty."},
+            )
+            return
+
+        if not await self._check_flood(websocket, flood):
+            return
+
+        payload = {
+            "type": "room_message",
+            "room": room,
+            "from": email,
+            "content": content.strip(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        await self._publish_room_message(room, json.dumps(payload))
+
+    async def _handle_roster_add(
+        self,
+        email: str,
+        websocket: WebSocketServerProtocol,
+        message: dict[str, Any],
+        flood: FloodState,
+    ) -> None:
+        emails = parse_roster_emails(message.get("emails"), email)
+        if emails is None:
+            await self._safe_send(
+                websocket,
+                {"type": "error", "message": "Invalid roster emails."},
+            )
+            return
+
+        if not await self._check_flood(websocket, flood):
+            return
+
+        if self._rosters:
+            kept = await self._rosters.add(email, emails)
+        else:
+            kept = add_to_roster(
+                self._local_rosters.setdefault(email, set()),
+                emails,
+                self._max_roster,
+            )
+        self._interest.add(email, kept)
+
+        if len(kept) < len(emails):
+            await self._safe_send(
+                websocket, {"type": "error", "message": "Roster is full."}
+            )
+        states = await self._online_states(kept)
+        await self._safe_send(
+            websocket,
+            {
+                "type": "roster",
+                "users": [
+                    {"email": user, "online": online}
+                    for user, online in states.items()
+                ],
+            },
+        )
+
+    async def _handle_roster_remove(
+        self,
+        email: str,
+        websocket: WebSocketServerProtocol,
+        message: dict[str, Any],
+        flood: FloodState,
+    ) -> None:
+        emails = parse_roster_emails(message.get("emails"), email)
+        if emails is None:
+            await self._safe_send(
+                websocket,
+                {"type": "error", "message": "Invalid roster emails."},
+            )
+            return
+
+        if not await self._check_flood(websocket, flood):
+            return
+
+        if self._background:
+            await self._background.srem(
+                hash_tagged(ROSTER_PREFIX, email), *emails
+            )
+        else:
+            self._local_rosters.get(email, set()).difference_update(emails)
+        self._interest.remove(email, emails)
+        await self._safe_send(
+            websocket, {"type": "roster_removed", "emails": emails}
+        )
+
+    async def _add_contact(self, email: str, peer: str) -> None:
+        """Put two users who just talked on each other's roster.
+
+        `to` is client-supplied, so only a recipient that is online, and
+        therefore a real authenticated user, becomes a contact.
+        """
+        if peer == email or peer in self._offline_peers:
+            return
+        if not (await self._online_states([peer]))[peer]:
+            # Retried and repeated sends skip the lookup for a while.
+            self._offline_peers.add(peer)
+            return
+        if self._rosters:
+            try:
+                # Separate keys, possibly on separate cluster shards.
+                added, _ = await asyncio.gather(
+                    self._rosters.add(email, [peer]),
+                    self._rosters.add(peer, [email]),
+                )
+            except Exception:
+                logger.exception("Failed to store contacts.")
+                return
+        else:
+            added = add_to_roster(
+                self._local_rosters.setdefault(email, set()),
+                [peer],
+                self._max_roster,
+            )
+            reverse = add_to_roster(
+                self._local_rosters.setdefault(peer, set()),
+                [email],
+                self._max_roster,
+            )
+            if reverse and peer in self._clients:
+                self._interest.add(peer, reverse)
+        self._interest.add(email, added)
+
+    async def _restore_roster(self, email: str) -> None:
+        if self._background:
+            roster = await self._background.smembers(
+                hash_tagged(ROSTER_PREFIX, email)
+            )
+        else:
+            roster = self._local_rosters.get(email, set())
+        self._interest.add(email, roster)
+
+    async def _online_states(self, emails: list[str]) -> dict[str, bool]:
+        if not emails:
+            return {}
+        if not self._online:
+            return {user: user in self._clients for user in emails}
+        return await self._online.states(emails)
+
+    async def _restore_rooms(self, email: str) -> None:
+        if self._background:
+            rooms = await self._background.smembers(
+                hash_tagged(USER_ROOMS_PREFIX, email)
+            )
+        else:
+            rooms = self._local_user_rooms.get(email, set())
+
+        await self._subscribe_rooms(
+            [room for room in rooms if self._rooms.add(room, email)]
+        )
+
+    async def _subscribe_rooms(self, rooms: list[str]) -> None:
+        channels = [hash_tagged(ROOM_CHANNEL_PREFIX, room) for room in rooms]
+        if not channels:
+            return
+        if self._sharded:
+            await self._sharded.subscribe(*channels)
+        elif self._pubsub:
+            await self._pubsub.subscribe(*channels)
+
+    async def _unsubscribe_rooms(self, rooms: list[str]) -> None:
+        channels = [hash_tagged(ROOM_CHANNEL_PREFIX, room) for room in rooms]
+        if not channels:
+            return
+        if self._sharded:
+            await self._sharded.unsubscribe(*channels)
+        elif self._pubsub:
+            await self._pubsub.unsubscribe(*channels)
+
+    async def _publish(self, channel: str, data: str) -> None:
+        if self._sharded:
+            await spublish(self._redis, channel, data)
+        else:
+            await self._redis.publish(channel, data)
+
+    async def _publish_room_message(self, room: str, frame: str) -> None:
+        # One publish per room message; every subscribed node fans the
+        # already-serialized frame out to its own members.
+        if self._redis:
+            try:
+                await self._publish(
+                    hash_tagged(ROOM_CHANNEL_PREFIX, room), frame
+                )
+                return
+            except Exception:
+                logger.exception("Failed to publish room message.")
+        self._fanout_room(room, frame)
+
+    def _fanout_room(self, room: str, frame: str) -> None:
+        self._write_to_users(self._rooms.members(room), frame)
+
+    def _write_to_users(self, emails: set[str], frame: str) -> None:
+        sockets = []
+        for member in emails:
+            client = self._clients.get(member)
+            if client is None:
+                continue
+            if client.batcher is None:
+                sockets.append(client.socket)
+            else:
+                client.batcher.send(frame)
+        broadcast(sockets, frame)
+
+    async def _send_to(self, email: str, payload: dict[str, Any]) -> bool:
+        """Write to the user's local socket; False if none or held back."""
+        held = self._replaying.get(email)
+        if held is not None:
+            held.append(payload)
+            return False
+
+        client = self._clients.get(email)
+        if client:
+            await self._safe_send(client.socket, payload)
+            return True
+        return False
 
     async def _send_user_list(
-        self, websocket: WebSocketServerProtocol
+        self, email: str, websocket: WebSocketServerProtocol
     ) -> None:
+        if not self._presence_broadcast:
+            states = await self._online_states(
+                list(self._interest.watching(email))
+            )
+            await self._safe_send(
+                websocket,
+                {
+                    "type": "user_list",
+                    "users": [
+                        {"email": user, "online": online}
+                        for user, online in states.items()
+                    ],
+                },
+            )
+            return
+
         if self._redis:
-            users = list(await self._redis.smembers(ONLINE_SET))
+            shards = await self._presence_cache.smembers_many(
+                self._redis, self._presence_shards.keys
+            )
+            users = [user for members in shards.values() for user in members]
         else:
-            async with self._lock:
-                users = list(self._clients.keys())
+            users = list(self._clients.emails())
 
         payload = {
             "type": "user_list",
@@ -294,26 +1342,54 @@ class ChatHub:
     async def _broadcast_user_status_local(
         self, email: str, online: bool
     ) -> None:
-        async with self._lock:
-            sockets = list(self._clients.values())
-
-        payload = {"type": "user_status", "email": email, "online": online}
-        await asyncio.gather(
-            *(self._safe_send(socket, payload) for socket in sockets),
-            return_exceptions=True,
+        # Serialized once and written without yielding, so the live socket
+        # set needs no copy.
+        if online:
+            self._offline_peers.discard(email)
+        frame = json.dumps(
+            {"type": "user_status", "email": email, "online": online}
         )
+        if not self._presence_broadcast:
+            self._write_to_users(self._interest.watchers(email), frame)
+            return
+        broadcast(self._clients.direct_sockets, frame)
+        for batcher in self._clients.batchers():
+            batcher.send(frame)
 
     async def _publish_message(self, payload: dict[str, Any]) -> None:
-        if not self._redis:
+        if not self._replay:
+            self._local_replay.append(payload["to"], payload)
             await self._deliver_message(payload)
             return
 
-        message = {"event": "message", "payload": payload}
         try:
-            await self._redis.publish(MESSAGE_CHANNEL, json.dumps(message))
+            channel = (
+                hash_tagged(USER_CHANNEL_PREFIX, payload["to"])
+                if self._sharded
+                else MESSAGE_CHANNEL
+            )
+            await self._replay.append_and_publish(
+                payload["to"], payload, channel
+            )
         except Exception:
             logger.exception("Failed to publish message, delivering locally.")
             await self._deliver_message(payload)
+        await self._record_history("message", payload)
+
+    async def _record_history(
+        self, event: str, payload: dict[str, Any]
+    ) -> None:
+        if not self._background or not self._history_maxlen:
+            return
+        try:
+            await self._background.xadd(
+                self._history_stream,
+                {"event": event, "payload": json.dumps(payload)},
+                maxlen=self._history_maxlen,
+                approximate=True,
+            )
+        except Exception:
+            logger.exception("Failed to record chat history.")
 
     async def _publish_presence(self, email: str, online: bool) -> None:
         if not self._redis:
@@ -324,34 +1400,63 @@ class ChatHub:
             "origin": self._server_id,
             "payload": {"email": email, "online": online},
         }
-        await self._redis.publish(PRESENCE_CHANNEL, json.dumps(message))
+        await self._publish(PRESENCE_CHANNEL, json.dumps(message))
 
     async def _deliver_message(self, payload: dict[str, Any]) -> None:
         recipient = payload.get("to")
         if not isinstance(recipient, str) or not recipient:
             return
-        await self._send_to(recipient, payload)
+        if not await self._send_to(recipient, payload):
+            return
+        sender = payload.get("from")
+        if (
+            isinstance(sender, str)
+            and len(self._interest.watching(recipient)) < self._max_roster
+        ):
+            # The sender's node persisted the contact on both rosters.
+            self._interest.add(recipient, [sender])
+
+        sent_at_ms = payload.get("sent_at_ms")
+        if not isinstance(sent_at_ms, int):
+            return
+        sent_at = sent_at_ms / 1000
+        self._delivery_latency.observe(max(time.time() - sent_at, 0.0))
+        client = self._clients.get(recipient)
+        if (
+            client is not None
+            and client.acks
+            and isinstance(payload.get("id"), str)
+        ):
+            self._acks.track(payload, sent_at, time.monotonic())
 
     async def _mark_online(self, email: str) -> bool:
         if not self._redis:
             return True
 
-        count_key = f"{ONLINE_COUNT_PREFIX}{email}"
+        count_key = hash_tagged(ONLINE_COUNT_PREFIX, email)
         count = await self._redis.incr(count_key)
         if count == 1:
-            await self._redis.sadd(ONLINE_SET, email)
+            await self._online.mark(email, True)
             return True
         return False
 
+    async def _record_active(self, email: str) -> None:
+        # Unique daily actives, approximate (HyperLogLog, ~0.8% error).
+        key = daily_active_key(datetime.now(timezone.utc).date())
+        async with self._background.pipeline(transaction=False) as pipe:
+            pipe.pfadd(key, email)
+            pipe.expire(key, DAILY_ACTIVE_TTL)
+            await pipe.execute()
+
     async def _mark_offline(self, email: str) -> bool:
         if not self._redis:
             return True
 
-        count_key = f"{ONLINE_COUNT_PREFIX}{email}"
+        count_key = hash_tagged(ONLINE_COUNT_PREFIX, email)
         count = await self._redis.decr(count_key)
         if count <= 0:
             await self._redis.delete(count_key)
-            await self._redis.srem(ONLINE_SET, email)
+            await self._online.mark(email, False)
             return True
         return False
 
@@ -365,39 +1470,70 @@ class ChatHub:
                     continue
 
                 data = raw.get("data")
-                if isinstance(data, bytes):
-                    data = data.decode("utf-8")
-
-                try:
-                    message = json.loads(data)
-                except json.JSONDecodeError:
+                channel = raw.get("channel")
+                if channel == INVALIDATE_CHANNEL:
+                    self._presence_cache.invalidate(data)
                     continue
 
-                event = message.get("event")
-                if event == "message":
-                    payload = message.get("payload")
-                    if isinstance(payload, dict):
-                        await self._deliver_message(payload)
-                elif event == "presence":
-                    if message.get("origin") == self._server_id:
-                        continue
-                    payload = message.get("payload")
-                    if not isinstance(payload, dict):
-                        continue
-                    email = payload.get("email")
-                    online = payload.get("online")
-                    if isinstance(email, str) and isinstance(online, bool):
-                        await self._broadcast_user_status_local(email, online)
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+                await self._dispatch_pubsub(channel, data)
         except asyncio.CancelledError:
             return
         except Exception:
+            # Invalidations stop with the listener.
+            self._presence_cache.disable()
             logger.exception("Redis listener failed")
 
+    async def _dispatch_pubsub(self, channel: Any, data: str) -> None:
+        if isinstance(channel, str) and channel.startswith(
+            ROOM_CHANNEL_PREFIX
+        ):
+            self._fanout_room(
+                strip_hash_tag(ROOM_CHANNEL_PREFIX, channel), data
+            )
+            return
+
+        try:
+            message = json.loads(data)
+        except json.JSONDecodeError:
+            return
+
+        event = message.get("event")
+        if event == "receipt":
+            sender = message.get("to")
+            payload = message.get("payload")
+            if isinstance(sender, str) and isinstance(payload, dict):
+                await self._send_to(sender, payload)
+        elif event == "message":
+            payload = message.get("payload")
+            if isinstance(payload, dict):
+                await self._deliver_message(payload)
+        elif event == "presence":
+            if message.get("origin") == self._server_id:
+                return
+            payload = message.get("payload")
+            if not isinstance(payload, dict):
+                return
+            email = payload.get("email")
+            online = payload.get("online")
+            if isinstance(email, str) and isinstance(online, bool):
+                await self._broadcast_user_status_local(email, online)
+
     async def _safe_send(
         self, websocket: WebSocketServerProtocol, payload: dict[str, Any]
     ) -> None:
+        await self._send_frame(websocket, json.dumps(payload))
+
+    async def _send_frame(
+        self, websocket: WebSocketServerProtocol, frame: str
+    ) -> None:
+        batcher = self._clients.batcher(websocket)
+        if batcher is not None:
+            batcher.send(frame)
+            return
         try:
-            await websocket.send(json.dumps(payload))
+            await websocket.send(frame)
         except ConnectionClosed:
             return
 
@@ -415,6 +1551,62 @@ async def main() -> None:
     }
     redis_retries = int(os.getenv("REDIS_CONNECT_RETRIES", "10"))
     redis_delay = float(os.getenv("REDIS_CONNECT_DELAY", "1"))
+    flood_limits = parse_flood_limits(os.getenv("WS_FLOOD_LIMITS"))
+    flood_max_strikes = int(os.getenv("WS_FLOOD_MAX_STRIKES", "20"))
+    drain_policy = DrainPolicy(
+        batch_size=int(os.getenv("WS_DRAIN_BATCH_SIZE", "200")),
+        interval=float(os.getenv("WS_DRAIN_INTERVAL", "0.5")),
+        jitter=float(os.getenv("WS_DRAIN_JITTER", "10")),
+        timeout=float(os.getenv("WS_DRAIN_TIMEOUT", "30")),
+    )
+    admission_policy = AdmissionPolicy(
+        max_pending_auth=int(os.getenv("WS_MAX_PENDING_AUTH", "1000")),
+        auth_timeout=float(os.getenv("WS_AUTH_TIMEOUT", "2")),
+        max_connections=int(os.getenv("WS_MAX_CONNECTIONS", "0")),
+        max_loop_lag=float(os.getenv("WS_MAX_LOOP_LAG", "0.5")),
+    )
+    replay_size = int(os.getenv("WS_REPLAY_SIZE", "100"))
+    replay_ttl = int(os.getenv("WS_REPLAY_TTL", "86400"))
+    ack_timeout = float(os.getenv("WS_ACK_TIMEOUT", "10"))
+    ack_max_retries = int(os.getenv("WS_ACK_MAX_RETRIES", "2"))
+    # Files travel through the webapp's attachment uploads, so frames only
+    # need to fit text and small references.
+    buffer_limits = BufferLimits(
+        max_size=int(os.getenv("WS_MAX_MESSAGE_SIZE", str(2**20))),
+        max_queue=int(os.getenv("WS_MAX_QUEUE", "16")),
+        read_limit=int(os.getenv("WS_READ_LIMIT", str(2**16))),
+        write_limit=int(os.getenv("WS_WRITE_LIMIT", str(2**16))),
+        compression=os.getenv("WS_COMPRESSION", "0").lower()
+        in {"1", "true", "yes"},
+    )
+    redis_cluster = os.getenv("REDIS_CLUSTER", "0").lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+    history_maxlen = int(os.getenv("WS_HISTORY_MAXLEN", "1000000"))
+    # Shared with the webapp, which archives it.
+    history_stream = os.getenv("CHAT_HISTORY_STREAM", HISTORY_STREAM)
+    dedup_window = float(os.getenv("WS_DEDUP_WINDOW", "300"))
+    dedup_max_per_sender = int(os.getenv("WS_DEDUP_MAX_PER_SENDER", "256"))
+    presence_broadcast = os.getenv("WS_PRESENCE_BROADCAST", "0").lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+    presence_shards = int(os.getenv("PRESENCE_SHARDS", "16"))
+    online_set = os.getenv("PRESENCE_ONLINE_SET", ONLINE_SET)
+    daily_active = os.getenv("PRESENCE_DAILY_ACTIVE", "0").lower() in {
+        "1",
+        "true",
+        "yes",
+    }
+    max_roster = int(os.getenv("WS_MAX_ROSTER", "1000"))
+    batch_policy = BatchPolicy(
+        window=float(os.getenv("WS_BATCH_WINDOW_MS", "10")) / 1000,
+        max_bytes=int(os.getenv("WS_BATCH_MAX_BYTES", str(32 * 1024))),
+        max_queued=int(os.getenv("WS_BATCH_MAX_QUEUED", str(128 * 1024))),
+    )
 
     chat_hub = ChatHub(
         jwt_secret,
@@ -422,13 +1614,43 @@ async def main() -> None:
         redis_required=redis_required,
         redis_retries=redis_retries,
         redis_delay=redis_delay,
+        flood_limits=flood_limits,
+        flood_max_strikes=flood_max_strikes,
+        drain_policy=drain_policy,
+        admission_policy=admission_policy,
+        replay_size=replay_size,
+        replay_ttl=replay_ttl,
+        ack_timeout=ack_timeout,
+        ack_max_retries=ack_max_retries,
+        redis_pools=redis_pools_from_env(),
+        redis_cluster=redis_cluster,
+        history_maxlen=history_maxlen,
+        history_stream=history_stream,
+        dedup_window=dedup_window,
+        dedup_max_per_sender=dedup_max_per_sender,
+        batch_policy=batch_policy,
+        presence_broadcast=presence_broadcast,
+        presence_shards=presence_shards,
+        online_set=online_set,
+        daily_active=daily_active,
+        max_roster=max_roster,
     )
     await chat_hub.start()
 
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, chat_hub.handle_stop_signal)
+
     logger.info(f"Starting ws server on {host}:{port}")
     try:
-        async with serve(chat_hub.handler, host, port, max_size=2**20):
-            await asyncio.Future()
+        async with serve(
+            chat_hub.handler,
+            host,
+            port,
+            process_request=chat_hub.process_request,
+            **buffer_limits.serve_kwargs(),
+        ):
+            await chat_hub.wait_drained()
     finally:
         await chat_hub.stop()
 
@@ -0,0 +1,65 @@
+import asyncio
+import contextlib
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+from urllib.parse import urlencode
+
+import jwt
+from websockets.client import WebSocketClientProtocol, connect
+from websockets.server import serve
+
+from backend.ws_server.server import ChatHub
+
+JWT_SECRET = "test-secret"
+
+
+def make_token(email: str, **claims: Any) -> str:
+    return jwt.encode(
+        {"email": email, **claims}, JWT_SECRET, algorithm="HS256"
+    )
+
+
+@contextlib.asynccontextmanager
+async def running_hub(hub: ChatHub | None = None) -> AsyncIterator[Any]:
+    """Serve a Redis-less ChatHub on a random local port."""
+    hub = hub or ChatHub(JWT_SECRET)
+    await hub.start()
+    async with serve(
+        hub.handler, "127.0.0.1", 0, process_request=hub.process_request
+    ) as server:
+        port = server.sockets[0].getsockname()[1]
+
+        @contextlib.asynccontextmanager
+        async def client(
+            email: str, **params: Any
+        ) -> AsyncIterator[WebSocketClientProtocol]:
+            query = urlencode({"token": make_token(email), **params})
+            url = f"ws://127.0.0.1:{port}/?{query}"
+            async with connect(url) as ws:
+                assert (await recv_type(ws, "user_list"))["type"]
+                yield ws
+
+        client.hub = hub  # type: ignore[attr-defined]
+        client.port = port  # type: ignore[attr-defined]
+        yield client
+    await hub.stop()
+
+
+async def recv_json(ws: WebSocketClientProtocol, timeout: float = 2) -> Any:
+    return json.loads(await asyncio.wait_for(ws.recv(), timeout))
+
+
+async def recv_type(
+    ws: WebSocketClientProtocol, frame_type: str, timeout: float = 2
+) -> dict[str, Any]:
+    """Receive frames until one of `frame_type` arrives.
+
+    Batched (array) frames are searched too; the rest of the batch is
+    dropped.
+    """
+    while True:
+        received = await recv_json(ws, timeout)
+        for frame in received if isinstance(received, list) else [received]:
+            if isinstance(frame, dict) and frame.get("type") == frame_type:
+                return frame
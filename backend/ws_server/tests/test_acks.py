@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from backend.ws_server.acks import AckTracker
+from backend.ws_server.metrics import LatencyHistogram
+from backend.ws_server.server import ChatHub
+from backend.ws_server.tests.conftest import (
+    JWT_SECRET,
+    recv_type,
+    running_hub,
+)
+
+
+def test_ack_tracker_retries_then_fails():
+    tracker = AckTracker(timeout=1.0, max_retries=1)
+    tracker.track({"id": "m1", "to": "b@example.com"}, sent_at=0.0, now=0.0)
+    tracker.track({"id": "m2", "to": "b@example.com"}, sent_at=0.0, now=0.5)
+
+    assert tracker.ack("m2", "c@example.com") is None
+    [retry] = tracker.pop_expired(1.0)
+    assert retry.payload["id"] == "m1"
+    tracker.retry(retry, 1.0)
+
+    assert tracker.ack("m2", "b@example.com") is not None
+    assert tracker.pop_expired(2.0) == []
+    assert tracker.snapshot() == {
+        "pending": 0,
+        "expired": 2,
+        "failed": 1,
+        "evicted": 0,
+    }
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram((1, 10, 100))
+    for seconds in (0.0005, 0.005, 0.005, 0.05, 5):
+        histogram.observe(seconds)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 5
+    assert snapshot["p50_ms"] == 10.0
+    assert snapshot["p99_ms"] == 100.0
+    assert snapshot["buckets"] == {"1": 1, "10": 2, "100": 1, "+inf": 1}
+
+
+def test_ack_sends_receipt_to_sender():
+    async def scenario():
+        hub = ChatHub(JWT_SECRET)
+        async with running_hub(hub) as client:
+            async with (
+                client("a@example.com") as alice,
+                client("b@example.com", acks=1) as bob,
+            ):
+                await alice.send(
+                    json.dumps(
+                        {
+                            "type": "message",
+                            "to": "b@example.com",
+                            "content": "hi",
+                        }
+                    )
+                )
+                message = await recv_type(bob, "message")
+                pending = len(hub._acks)
+                await bob.send(
+                    json.dumps({"type": "ack", "id": message["id"]})
+                )
+                receipt = await recv_type(alice, "receipt")
+                stats = hub.stats()
+        return message, pending, receipt, stats
+
+    message, pending, receipt, stats = asyncio.run(scenario())
+    assert pending == 1
+    assert receipt == {
+        "type": "receipt",
+        "id": message["id"],
+        "recipient": "b@example.com",
+        "status": "delivered",
+    }
+    assert stats["delivery_latency"]["count"] == 1
+    assert stats["ack_latency"]["count"] == 1
+    assert stats["acks"]["pending"] == 0
+
+
+def test_unacked_message_is_resent():
+    async def scenario():
+        hub = ChatHub(JWT_SECRET, ack_timeout=0.1, ack_max_retries=1)
+        async with running_hub(hub) as client:
+            async with (
+                client("a@example.com") as alice,
+                client("b@example.com", acks=1) as bob,
+            ):
+                await alice.send(
+                    json.dumps(
+                        {
+                            "type": "message",
+                            "to": "b@example.com",
+                            "content": "hi",
+                        }
+                    )
+                )
+                first = await recv_type(bob, "message")
+                second = await recv_type(bob, "message")
+                await asyncio.sleep(0.4)
+                stats = hub.stats()["acks"]
+        return first, second, stats
+
+    first, second, stats = asyncio.run(scenario())
+    assert first["id"] == second["id"]
+    assert stats["expired"] == 2
+    assert stats["failed"] == 1
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+from websockets.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from backend.ws_server.server import AdmissionPolicy, ChatHub
+from backend.ws_server.tests.conftest import (
+    JWT_SECRET,
+    make_token,
+    running_hub,
+)
+
+
+async def _close_code(url: str) -> int:
+    async with connect(url) as ws:
+        with pytest.raises(ConnectionClosed) as closed:
+            while True:
+                await asyncio.wait_for(ws.recv(), 2)
+    return closed.value.rcvd.code
+
+
+def test_over_capacity_and_slow_auth_are_refused():
+    hub = ChatHub(
+        JWT_SECRET,
+        admission_policy=AdmissionPolicy(max_connections=1, auth_timeout=0.05),
+    )
+
+    async def scenario():
+        async with running_hub(hub) as client:
+            base = f"ws://127.0.0.1:{client.port}/"
+            async with client("a@example.com"):
+                over_capacity = await _close_code(
+                    f"{base}?token={make_token('b@example.com')}"
+                )
+            await asyncio.sleep(0.05)
+            silent = await _close_code(base)
+            url = f"http://127.0.0.1:{client.port}/stats"
+            with pytest.raises(urllib.error.HTTPError) as anonymous:
+                await asyncio.to_thread(urllib.request.urlopen, url)
+            admin = make_token("ops@example.com", role="admin")
+            stats = await asyncio.to_thread(
+                lambda: json.load(
+                    urllib.request.urlopen(
+                        urllib.request.Request(
+                            url, headers={"Authorization": f"Bearer {admin}"}
+                        )
+                    )
+                )
+            )
+            return over_capacity, silent, anonymous.value.code, stats
+
+    over_capacity, silent, anonymous, stats = asyncio.run(scenario())
+    assert over_capacity == 1013
+    assert silent == 4001
+    assert anonymous == 403
+    assert stats["rejected_handshakes"] == {
+        "max_connections": 1,
+        "auth_timeout": 1,
+    }
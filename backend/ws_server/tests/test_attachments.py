@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from backend.ws_server.tests.conftest import recv_type, running_hub
+
+REFERENCE = {
+    "id": "0123456789abcdef0123456789abcdef",
+    "filename": "pic.png",
+    "content_type": "image/png",
+    "size": 2048,
+}
+
+
+def test_message_carries_attachment_reference():
+    async def scenario():
+        async with running_hub() as client:
+            async with (
+                client("a@example.com") as alice,
+                client("b@example.com") as bob,
+            ):
+                await alice.send(
+                    json.dumps(
+                        {
+                            "type": "message",
+                            "to": "b@example.com",
+                            "attachment": {**REFERENCE, "data": "AAAA"},
+                        }
+                    )
+                )
+                delivered = await recv_type(bob, "message")
+
+                await alice.send(
+                    json.dumps(
+                        {
+                            "type": "message",
+                            "to": "b@example.com",
+                            "attachment": {**REFERENCE, "id": "../etc"},
+                        }
+                    )
+                )
+                error = await recv_type(alice, "error")
+        return delivered, error
+
+    delivered, error = asyncio.run(scenario())
+    assert delivered["content"] == ""
+    # Metadata is resolved from the webapp, never taken from the sender.
+    assert delivered["attachment"] == {"id": REFERENCE["id"]}
+    assert error["message"] == "Invalid attachment."
@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+from websockets.client import connect
+
+from backend.ws_server.batching import BatchPolicy, FrameBatcher
+from backend.ws_server.server import ChatHub
+from backend.ws_server.tests.conftest import (
+    JWT_SECRET,
+    make_token,
+    recv_json,
+    recv_type,
+    running_hub,
+)
+
+
+class _Socket:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    async def send(self, data: str) -> None:
+        self.sent.append(data)
+
+
+class _StalledSocket:
+    """A client that never reads: every write blocks."""
+
+    def __init__(self) -> None:
+        self.closed_with: int | None = None
+
+    async def send(self, data: str) -> None:
+        await asyncio.Event().wait()
+
+    async def close(self, code: int, reason: str) -> None:
+        self.closed_with = code
+
+
+def test_batcher_disconnects_a_client_past_the_high_water_mark():
+    async def scenario():
+        socket = _StalledSocket()
+        policy = BatchPolicy(window=0, max_bytes=10, max_queued=50)
+        batcher = FrameBatcher(socket, policy)  # type: ignore[arg-type]
+        for n in range(20):
+            batcher.send(f'{{"n":{n}}}')
+        await asyncio.sleep(0)
+        batcher.close()
+        return socket
+
+    assert asyncio.run(scenario()).closed_with == 1013
+
+
+def test_batcher_flushes_on_window_or_byte_limit():
+    async def scenario():
+        socket = _Socket()
+        batcher = FrameBatcher(socket, BatchPolicy(window=0.05, max_bytes=20))  # type: ignore[arg-type]
+        batcher.send('{"n":1}')
+        batcher.send('{"n":2}')
+        await asyncio.sleep(0.01)
+        held = list(socket.sent)
+        await asyncio.sleep(0.1)
+        windowed = list(socket.sent)
+
+        # Crossing max_bytes flushes without waiting out the window.
+        for n in range(3):
+            batcher.send(f'{{"n":{n}}}')
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return held, windowed, socket.sent[len(windowed) :]
+
+    held, windowed, limited = asyncio.run(scenario())
+    assert held == []
+    assert windowed == ['[{"n":1},{"n":2}]']
+    assert limited == ['[{"n":0},{"n":1},{"n":2}]']
+
+
+def test_opted_in_client_receives_array_frames():
+    async def scenario():
+        hub = ChatHub(JWT_SECRET, batch_policy=BatchPolicy(window=0.05))
+        async with running_hub(hub) as client:
+            async with (
+                client("a@example.com") as alice,
+                client("b@example.com", batch=1) as bob,
+            ):
+                for content in ("one", "two", "three"):
+                    await alice.send(
+                        json.dumps(
+                            {
+                                "type": "message",
+                                "to": "b@example.com",
+                                "content": content,
+                            }
+                        )
+                    )
+                received, arrays = [], 0
+                while len(received) < 3:
+                    frame = await recv_json(bob)
+                    arrays += isinstance(frame, list)
+                    frames = frame if isinstance(frame, list) else [frame]
+                    received.extend(
+                        f["content"] for f in frames if f["type"] == "message"
+                    )
+                # Alice did not opt in and still gets plain frames.
+                await bob.send(
+                    json.dumps(
+                        {
+                            "type": "message",
+                            "to": "a@example.com",
+                            "content": "x",
+                        }
+                    )
+                )
+                plain = await recv_json(alice)
+                while plain.get("type") != "message":
+                    plain = await recv_json(alice)
+        return received, arrays, plain
+
+    received, arrays, plain = asyncio.run(scenario())
+    assert received == ["one", "two", "three"]
+    assert arrays >= 1
+    assert plain["content"] == "x"
+
+
+def test_batching_is_announced_on_connect():
+    async def scenario():
+        async with running_hub() as client:
+            url = (
+                f"ws://127.0.0.1:{client.port}/"
+                f"?token={make_token('b@example.com')}&batch=1"
+            )
+            async with connect(url) as ws:
+                first = await recv_json(ws)
+                users = await recv_type(ws, "user_list")
+        return first, users
+
+    first, users = asyncio.run(scenario())
+    assert first == {"type": "batching", "window_ms": 10, "max_bytes": 32768}
+    assert users["type"] == "user_list"
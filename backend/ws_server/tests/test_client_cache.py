@@ -0,0 +1,114 @@
+import asyncio
+
+from backend.ws_server.client_cache import TrackedSetCache
+from backend.ws_server.redis_pools import (
+    DEFAULT_REDIS_POOLS,
+    redis_pools_from_env,
+)
+
+
+class _SetReader:
+    """Stands in for a Redis client; runs `during_read` mid-request."""
+
+    def __init__(self, members: set[str], during_read=None) -> None:
+        self.members = members
+        self.during_read = during_read
+        self.reads = 0
+
+    async def smembers(self, key: str) -> set[str]:
+        self.reads += 1
+        if self.during_read:
+            self.during_read()
+        return set(self.members)
+
+
+def test_tracked_set_cache_serves_until_invalidated():
+    async def scenario():
+        cache = TrackedSetCache(("chat:online_users",))
+        cache.enabled = True
+        reader = _SetReader({"a@example.com"})
+
+        first = await cache.smembers(reader, "chat:online_users")
+        second = await cache.smembers(reader, "chat:online_users")
+        reader.members.add("b@example.com")
+        cache.invalidate(["chat:online_users"])
+        third = await cache.smembers(reader, "chat:online_users")
+        return cache, reader, first, second, third
+
+    cache, reader, first, second, third = asyncio.run(scenario())
+    assert first == second == {"a@example.com"}
+    assert third == {"a@example.com", "b@example.com"}
+    assert reader.reads == 2
+    assert cache.snapshot()["hits"] == 1
+
+
+def test_tracked_set_cache_drops_reads_racing_an_invalidation():
+    async def scenario():
+        cache = TrackedSetCache(("chat:online_users",))
+        cache.enabled = True
+        reader = _SetReader({"a@example.com"}, lambda: cache.invalidate(None))
+        await cache.smembers(reader, "chat:online_users")
+        reader.during_read = None
+        await cache.smembers(reader, "chat:online_users")
+        return reader
+
+    assert asyncio.run(scenario()).reads == 2
+
+
+class _PipelineReader:
+    """Stands in for a Redis client whose reads go through pipelines."""
+
+    def __init__(self, sets: dict[str, set[str]]) -> None:
+        self.sets = sets
+        self.pipelines: list[list[str]] = []
+
+    def pipeline(self, transaction: bool = True):
+        reader = self
+        keys: list[str] = []
+        reader.pipelines.append(keys)
+
+        class Pipeline:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return None
+
+            def smembers(self, key: str) -> None:
+                keys.append(key)
+
+            async def execute(self):
+                return [set(reader.sets.get(key, ())) for key in keys]
+
+        return Pipeline()
+
+
+def test_tracked_set_cache_reads_all_missing_shards_in_one_pipeline():
+    async def scenario():
+        cache = TrackedSetCache(("chat:online_users",))
+        cache.enabled = True
+        reader = _PipelineReader({"s:0": {"a"}, "s:1": {"b"}, "s:2": set()})
+        await cache.smembers_many(reader, ["s:0", "s:1"])
+        values = await cache.smembers_many(reader, ["s:0", "s:1", "s:2"])
+        return cache, reader, values
+
+    cache, reader, values = asyncio.run(scenario())
+    assert values == {
+        "s:0": {"a"},
+        "s:1": {"b"},
+        "s:2": frozenset(),
+    }
+    assert reader.pipelines == [["s:0", "s:1"], ["s:2"]]
+    assert cache.snapshot()["hits"] == 2
+
+
+def test_redis_pools_from_env_overrides_defaults():
+    pools = redis_pools_from_env(
+        {
+            "WS_REDIS_HOT_MAX_CONNECTIONS": "128",
+            "WS_REDIS_BACKGROUND_SOCKET_TIMEOUT": "none",
+        }
+    )
+    assert pools["hot"].max_connections == 128
+    assert pools["background"].socket_timeout is None
+    assert pools["pubsub"] == DEFAULT_REDIS_POOLS["pubsub"]
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+from uuid import uuid4
+
+import pytest
+from redis.crc import key_slot
+
+from backend.ws_server.cluster import hash_tagged
+from backend.ws_server.replay import REPLAY_PREFIX, SEQ_PREFIX
+from backend.ws_server.server import (
+    ONLINE_COUNT_PREFIX,
+    USER_CHANNEL_PREFIX,
+    USER_ROOMS_PREFIX,
+    ChatHub,
+)
+from backend.ws_server.tests.conftest import (
+    JWT_SECRET,
+    recv_type,
+    running_hub,
+)
+
+# Points at a node of a running cluster, e.g. the one started with
+# `docker compose -f docker-compose.cluster.yml up -d`.
+CLUSTER_URL = os.getenv("REDIS_CLUSTER_URL")
+requires_cluster = pytest.mark.skipif(
+    not CLUSTER_URL, reason="REDIS_CLUSTER_URL not set"
+)
+
+
+def test_user_keys_and_channel_share_a_slot():
+    email = "a@example.com"
+    names = [
+        hash_tagged(prefix, email)
+        for prefix in (
+            SEQ_PREFIX,
+            REPLAY_PREFIX,
+            ONLINE_COUNT_PREFIX,
+            USER_ROOMS_PREFIX,
+            USER_CHANNEL_PREFIX,
+        )
+    ]
+    assert len({key_slot(name.encode()) for name in names}) == 1
+
+
+def _cluster_hub() -> ChatHub:
+    return ChatHub(
+        JWT_SECRET,
+        CLUSTER_URL,
+        redis_required=True,
+        redis_retries=1,
+        redis_cluster=True,
+    )
+
+
+@requires_cluster
+def test_messages_cross_nodes_over_sharded_pubsub():
+    # Fresh users so sequence numbers from earlier runs do not matter.
+    run = uuid4().hex[:8]
+    alice_email = f"alice-{run}@example.com"
+    bob_email = f"bob-{run}@example.com"
+    room = f"team-{run}"
+
+    async def scenario():
+        async with (
+            running_hub(_cluster_hub()) as node_a,
+            running_hub(_cluster_hub()) as node_b,
+        ):
+            async with (
+                node_a(alice_email) as alice,
+                node_b(bob_email, acks=1) as bob,
+            ):
+                await alice.send(
+                    json.dumps(
+                        {"type": "message", "to": bob_email, "content": "hi"}
+                    )
+                )
+                message = await recv_type(bob, "message")
+                await bob.send(
+                    json.dumps({"type": "ack", "id": message["id"]})
+                )
+                receipt = await recv_type(alice, "receipt")
+
+                for ws in (alice, bob):
+                    await ws.send(
+                        json.dumps({"type": "join_room", "room": room})
+                    )
+                    await recv_type(ws, "room_joined")
+                await bob.send(
+                    json.dumps(
+                        {"type": "room_message", "room": room, "content": "yo"}
+                    )
+                )
+                room_message = await recv_type(alice, "room_message")
+        return message, receipt, room_message
+
+    message, receipt, room_message = asyncio.run(scenario())
+    assert message["seq"] == 1
+    assert message["from"] == alice_email
+    assert receipt["id"] == message["id"]
+    assert room_message["from"] == bob_email
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from backend.ws_server.dedup import SendDeduplicator, parse_client_msg_id
+from backend.ws_server.tests.conftest import recv_json, recv_type, running_hub
+
+
+def test_deduplicator_window_is_bounded_per_sender():
+    dedup = SendDeduplicator(window=60, max_per_sender=2)
+
+    assert dedup.claim("a@example.com", "c1", "m1") is None
+    assert dedup.claim("a@example.com", "c1", "m9") == "m1"
+    assert dedup.claim("b@example.com", "c1", "m2") is None
+    assert dedup.claim("a@example.com", "c2", "m3") is None
+    # A third id pushes the oldest one out of a's window.
+    assert dedup.claim("a@example.com", "c3", "m4") is None
+    assert dedup.claim("a@example.com", "c1", "m5") is None
+    assert dedup.snapshot() == {"senders": 2, "duplicates": 1}
+
+    assert parse_client_msg_id("retry-1:abc") == "retry-1:abc"
+    assert parse_client_msg_id("x" * 65) is None
+    assert parse_client_msg_id("retry-1\n") is None
+    assert parse_client_msg_id(7) is None
+
+
+def test_retried_send_is_acknowledged_but_delivered_once():
+    async def scenario():
+        async with running_hub() as client:
+            async with (
+                client("a@example.com") as alice,
+                client("b@example.com") as bob,
+            ):
+                frame = json.dumps(
+                    {
+                        "type": "message",
+                        "to": "b@example.com",
+                        "content": "hi",
+                        "client_msg_id": "c-1",
+                    }
+                )
+                await alice.send(frame)
+                first = await recv_type(alice, "sent")
+                await alice.send(frame)
+                second = await recv_type(alice, "sent")
+                delivered = await recv_type(bob, "message")
+                try:
+                    extra = await recv_json(bob, timeout=0.2)
+                except TimeoutError:
+                    extra = None
+        return first, second, delivered, extra
+
+    first, second, delivered, extra = asyncio.run(scenario())
+    assert first == {
+        "type": "sent",
+        "client_msg_id": "c-1",
+        "id": delivered["id"],
+        "duplicate": False,
+    }
+    assert second == {**first, "duplicate": True}
+    assert extra is None
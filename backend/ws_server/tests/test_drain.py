@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from websockets.client import connect
+from websockets.exceptions import ConnectionClosed, InvalidStatusCode
+
+from backend.ws_server.server import ChatHub, DrainPolicy
+from backend.ws_server.tests.conftest import (
+    JWT_SECRET,
+    make_token,
+    recv_type,
+    running_hub,
+)
+
+
+def test_drain_closes_sockets_with_retry_hint_and_refuses_new_ones():
+    hub = ChatHub(
+        JWT_SECRET,
+        drain_policy=DrainPolicy(batch_size=1, interval=0.01, jitter=2),
+    )
+
+    async def scenario():
+        async with running_hub(hub) as client:
+            async with (
+                client("a@example.com") as alice,
+                client("b@example.com") as bob,
+            ):
+                hub.request_drain()
+                results = []
+                for ws in (alice, bob):
+                    hint = await recv_type(ws, "reconnect")
+                    with pytest.raises(ConnectionClosed) as closed:
+                        await asyncio.wait_for(ws.recv(), 2)
+                    results.append((hint, closed.value.rcvd.code))
+
+                await asyncio.wait_for(hub.wait_drained(), 2)
+                url = (
+                    f"ws://127.0.0.1:{client.port}/"
+                    f"?token={make_token('c@example.com')}"
+                )
+                with pytest.raises(InvalidStatusCode) as refused:
+                    async with connect(url):
+                        pass
+                return results, refused.value.status_code
+
+    results, status = asyncio.run(scenario())
+    for hint, code in results:
+        assert 0 <= hint["retry_after_ms"] <= 2000
+        assert code == 1012
+    assert status == 503
+    assert not hub._clients
+
+
+def test_second_stop_signal_abandons_the_drain():
+    # Sockets would be closed one per minute.
+    hub = ChatHub(
+        JWT_SECRET,
+        drain_policy=DrainPolicy(batch_size=1, interval=60, jitter=0),
+    )
+
+    async def scenario():
+        async with running_hub(hub) as client:
+            async with client("a@example.com"), client("b@example.com"):
+                hub.handle_stop_signal()
+                await asyncio.sleep(0.05)
+                assert not hub._drained.is_set()
+                hub.handle_stop_signal()
+                await asyncio.wait_for(hub.wait_drained(), 1)
+                await asyncio.sleep(0)
+                return hub._drain_task.cancelled()
+
+    assert asyncio.run(scenario())
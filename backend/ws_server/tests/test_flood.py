@@ -0,0 +1,72 @@
+import asyncio
+
+from websockets.exceptions import ConnectionClosed
+
+from backend.ws_server.flood import (
+    FloodGuard,
+    FloodLimit,
+    TokenBucket,
+    parse_flood_limits,
+)
+from backend.ws_server.server import ChatHub
+from backend.ws_server.tests.conftest import (
+    JWT_SECRET,
+    recv_type,
+    running_hub,
+)
+
+
+def test_parse_flood_limits_overrides_defaults():
+    limits = parse_flood_limits("user:1:2, support:10:50")
+    assert limits["user"] == FloodLimit(rate=1, burst=2)
+    assert limits["support"] == FloodLimit(rate=10, burst=50)
+    assert "admin" in limits
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(FloodLimit(rate=2, burst=1))
+    now = bucket.updated
+    assert bucket.take(now) is True
+    assert bucket.take(now) is False
+    assert bucket.take(now + 0.5) is True
+
+
+def test_user_bucket_survives_reconnect():
+    guard = FloodGuard({"user": FloodLimit(rate=0.001, burst=1)})
+    assert guard.allow(guard.open("a@example.com", "user")) is True
+    assert guard.allow(guard.open("a@example.com", "user")) is False
+    # The refused check did not charge the fresh connection's bucket.
+    state = guard.open("a@example.com", "user")
+    guard.allow(state)
+    assert state.connection.tokens == 1.0
+
+
+def test_flooding_client_gets_errors_then_is_disconnected():
+    hub = ChatHub(
+        JWT_SECRET,
+        flood_limits={"user": FloodLimit(rate=0.001, burst=2)},
+        flood_max_strikes=3,
+    )
+    frame = '{"type": "message", "to": "a@example.com", "content": "x"}'
+
+    async def scenario():
+        async with running_hub(hub) as client:
+            async with client("a@example.com") as ws:
+                for _ in range(2):
+                    await ws.send(frame)
+                    await recv_type(ws, "message")
+
+                await ws.send(frame)
+                error = await recv_type(ws, "error")
+
+                for _ in range(2):
+                    await ws.send(frame)
+                try:
+                    while True:
+                        await asyncio.wait_for(ws.recv(), 2)
+                except ConnectionClosed as exc:
+                    return error, exc.rcvd.code
+
+    error, close_code = asyncio.run(scenario())
+    assert error["message"].startswith("Rate limit exceeded")
+    assert close_code == 1008
@@ -0,0 +1,16 @@
+import asyncio
+
+from backend.ws_server.connection import BufferLimits
+from backend.ws_server.memprofile import profile
+
+# Measured hub-side footprint is about 19.5 KiB idle and 21 KiB active per
+# connection without compression; fail when it grows noticeably.
+IDLE_BUDGET = 24 * 1024
+ACTIVE_BUDGET = 28 * 1024
+
+
+def test_per_connection_footprint_stays_within_budget():
+    report = asyncio.run(profile(100, BufferLimits(compression=False)))
+
+    assert report["idle_bytes_per_connection"] < IDLE_BUDGET, report
+    assert report["active_bytes_per_connection"] < ACTIVE_BUDGET, report
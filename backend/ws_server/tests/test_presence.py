@@ -0,0 +1,171 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from backend.ws_server.presence import (
+    InterestIndex,
+    OfflinePeerCache,
+    PresenceShards,
+    parse_roster_emails,
+)
+from backend.ws_server.server import ChatHub
+from backend.ws_server.tests.conftest import (
+    JWT_SECRET,
+    recv_type,
+    running_hub,
+)
+
+
+def test_interest_index_tracks_both_directions():
+    index = InterestIndex()
+
+    assert index.add("a", ["b", "c", "a"]) == ["b", "c"]
+    assert index.add("d", ["b"]) == ["b"]
+    assert index.watchers("b") == {"a", "d"}
+
+    index.remove("a", ["b"])
+    index.remove_user("d")
+    assert index.watchers("b") == set()
+    assert index.watching("a") == {"c"}
+    assert len(index) == 1
+
+    assert parse_roster_emails(["x@e.com", "x@e.com", "me"], "me") == [
+        "x@e.com"
+    ]
+    assert parse_roster_emails("x@e.com", "me") is None
+
+
+def test_presence_shards_spread_users_over_tagged_keys():
+    shards = PresenceShards(8)
+    emails = [f"user{n}@example.com" for n in range(800)]
+    groups = shards.group(emails)
+
+    assert shards.keys[3] == "chat:online_users:{3}"
+    assert shards.total_keys[3] == "chat:online_total:{3}"
+    # Stable across processes: the webapp computes the same shard.
+    assert PresenceShards(8).index("user1@example.com") == shards.index(
+        "user1@example.com"
+    )
+    assert sorted(groups) == list(range(8))
+    assert all(60 < len(members) < 140 for members in groups.values())
+    assert PresenceShards(0).keys == ["chat:online_users:{0}"]
+
+
+async def _status_of(ws, email: str, timeout: float = 0.3):
+    """The next user_status frame about `email`, or None."""
+    try:
+        while True:
+            frame = await recv_type(ws, "user_status", timeout)
+            if frame["email"] == email:
+                return frame["online"]
+    except TimeoutError:
+        return None
+
+
+def test_presence_reaches_roster_watchers_only():
+    async def scenario():
+        async with running_hub() as client:
+            async with client("a@example.com") as alice:
+                async with client("b@example.com"):
+                    await alice.send(
+                        json.dumps(
+                            {"type": "roster_add", "emails": ["b@example.com"]}
+                        )
+                    )
+                    roster = await recv_type(alice, "roster")
+                bob_left = await _status_of(alice, "b@example.com")
+
+                async with client("c@example.com"):
+                    stranger = await _status_of(alice, "c@example.com")
+
+                async with client("c@example.com") as carol:
+                    # Talking makes two users contacts.
+                    await carol.send(
+                        json.dumps(
+                            {
+                                "type": "message",
+                                "to": "a@example.com",
+                                "content": "hi",
+                            }
+                        )
+                    )
+                    await recv_type(alice, "message")
+                contact_left = await _status_of(alice, "c@example.com")
+
+            async with client("a@example.com") as alice:
+                await alice.send(json.dumps({"type": "list_users"}))
+                users = await recv_type(alice, "user_list")
+        return roster, bob_left, stranger, contact_left, users
+
+    roster, bob_left, stranger, contact_left, users = asyncio.run(scenario())
+    assert roster["users"] == [{"email": "b@example.com", "online": True}]
+    assert bob_left is False
+    assert stranger is None
+    assert contact_left is False
+    # The roster is kept across reconnects.
+    assert sorted(user["email"] for user in users["users"]) == [
+        "b@example.com",
+        "c@example.com",
+    ]
+
+
+def test_rosters_are_capped_and_skip_unknown_recipients():
+    async def scenario():
+        hub = ChatHub(JWT_SECRET, max_roster=2)
+        async with running_hub(hub) as client:
+            async with client("a@example.com") as alice:
+                await alice.send(
+                    json.dumps(
+                        {
+                            "type": "message",
+                            "to": "ghost@example.com",
+                            "content": "anyone?",
+                        }
+                    )
+                )
+                await alice.send(
+                    json.dumps(
+                        {
+                            "type": "roster_add",
+                            "emails": ["b@e.com", "c@e.com", "d@e.com"],
+                        }
+                    )
+                )
+                full = await recv_type(alice, "error")
+                roster = await recv_type(alice, "roster")
+        return hub, full, roster
+
+    hub, full, roster = asyncio.run(scenario())
+    assert full["message"] == "Roster is full."
+    assert [user["email"] for user in roster["users"]] == [
+        "b@e.com",
+        "c@e.com",
+    ]
+    assert hub._local_rosters["a@example.com"] == {"b@e.com", "c@e.com"}
+    assert "ghost@example.com" in hub._offline_peers
+
+
+def test_offline_peer_cache_expires_and_is_bounded():
+    cache = OfflinePeerCache(ttl=5, max_size=2)
+    with patch("time.monotonic", return_value=100.0):
+        cache.add("a")
+        cache.add("b")
+        cache.add("c")
+        assert "a" not in cache and "b" in cache
+        cache.discard("b")
+        assert "b" not in cache
+    with patch("time.monotonic", return_value=106.0):
+        assert "c" not in cache
+    assert len(cache) == 0
+
+
+def test_presence_broadcast_is_opt_in():
+    async def scenario():
+        hub = ChatHub(JWT_SECRET, presence_broadcast=True)
+        async with running_hub(hub) as client:
+            async with client("a@example.com") as alice:
+                async with client("c@example.com"):
+                    pass
+                return await _status_of(alice, "c@example.com")
+
+    assert asyncio.run(scenario()) is True
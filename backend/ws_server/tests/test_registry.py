@@ -0,0 +1,25 @@
+from backend.ws_server.connection import ClientConnection, ClientRegistry
+from backend.ws_server.flood import FloodGuard
+
+
+def _client(email: str, socket: object) -> ClientConnection:
+    flood = FloodGuard().open(email, "user")
+    return ClientConnection(email, "user", socket, flood)  # type: ignore[arg-type]
+
+
+def test_registry_keeps_socket_set_in_step_with_clients():
+    registry = ClientRegistry()
+    first, second, other = object(), object(), object()
+
+    assert registry.add(_client("a@example.com", first)) is None
+    assert registry.add(_client("b@example.com", other)) is None
+    replaced = registry.add(_client("a@example.com", second))
+
+    assert replaced is not None and replaced.socket is first
+    assert set(registry.sockets) == {second, other}
+    # The replaced socket's late unregister must not drop the new one.
+    assert registry.remove("a@example.com", first) is None
+    assert registry.remove("a@example.com", second) is not None
+    assert set(registry.sockets) == {other}
+    assert list(registry.emails()) == ["b@example.com"]
+    assert len(registry) == 1
@@ -0,0 +1,81 @@
+import asyncio
+
+from backend.ws_server.replay import LocalReplayBuffer
+from backend.ws_server.server import ChatHub
+from backend.ws_server.tests.conftest import (
+    JWT_SECRET,
+    recv_type,
+    running_hub,
+)
+
+
+def test_local_replay_buffer_reports_gaps():
+    buffer = LocalReplayBuffer(size=2)
+    for content in ("one", "two", "three"):
+        buffer.append("b@example.com", {"content": content})
+
+    messages, complete = buffer.since("b@example.com", 1)
+    assert [m["seq"] for m in messages] == [2, 3]
+    assert complete is True
+
+    messages, complete = buffer.since("b@example.com", 0)
+    assert [m["seq"] for m in messages] == [2, 3]
+    assert complete is False
+
+    assert buffer.since("b@example.com", 3) == ([], True)
+
+
+def test_local_replay_buffer_evicts_idle_recipients():
+    buffer = LocalReplayBuffer(size=5, max_recipients=2)
+    for recipient in ("a@example.com", "b@example.com", "c@example.com"):
+        buffer.append(recipient, {"content": "hi"})
+    assert len(buffer) == 2
+
+    # "a" restarts from 1; a client resuming from 5 gets the new messages
+    # and learns that earlier ones are gone.
+    buffer.append("a@example.com", {"content": "again"})
+    buffer.append("a@example.com", {"content": "more"})
+    assert buffer.since("a@example.com", 5) == (
+        [
+            {"content": "again", "seq": 1},
+            {"content": "more", "seq": 2},
+        ],
+        False,
+    )
+
+
+def test_reconnecting_client_gets_missed_messages_once():
+    def frame(content: str) -> str:
+        return (
+            '{"type": "message", "to": "b@example.com", '
+            f'"content": "{content}"}}'
+        )
+
+    async def scenario():
+        async with running_hub(ChatHub(JWT_SECRET)) as client:
+            async with (
+                client("a@example.com") as alice,
+                client("b@example.com") as bob,
+            ):
+                await alice.send(frame("first"))
+                live = await recv_type(bob, "message")
+
+            async with client("a@example.com") as alice:
+                await alice.send(frame("second"))
+                await alice.send(frame("third"))
+                await asyncio.sleep(0.05)
+
+                async with client(
+                    "b@example.com", last_seq=live["seq"]
+                ) as bob:
+                    replay = await recv_type(bob, "replay")
+                    await alice.send(frame("fourth"))
+                    after = await recv_type(bob, "message")
+        return live, replay, after
+
+    live, replay, after = asyncio.run(scenario())
+    assert live["seq"] == 1
+    assert [m["content"] for m in replay["messages"]] == ["second", "third"]
+    assert [m["seq"] for m in replay["messages"]] == [2, 3]
+    assert replay["complete"] is True
+    assert after["seq"] == 4
@@ -0,0 +1,73 @@
+import asyncio
+
+from backend.ws_server.rooms import RoomIndex, is_valid_room_name
+from backend.ws_server.tests.conftest import recv_type, running_hub
+
+
+def test_room_index_reports_first_and_last_local_member():
+    index = RoomIndex()
+    assert index.add("general", "a@example.com") is True
+    assert index.add("general", "b@example.com") is False
+    assert index.remove("general", "a@example.com") is False
+    assert index.remove_user("b@example.com") == ["general"]
+    assert "general" not in index
+
+
+def test_room_names_are_short_ascii_identifiers():
+    assert is_valid_room_name("team-1.general_chat")
+    assert not is_valid_room_name("team\n")
+    assert not is_valid_room_name("zespół")
+    assert not is_valid_room_name("x" * 65)
+    assert not is_valid_room_name(None)
+
+
+def test_room_message_fans_out_to_members_only():
+    async def scenario():
+        async with running_hub() as client:
+            async with (
+                client("a@example.com") as alice,
+                client("b@example.com") as bob,
+                client("c@example.com") as carol,
+            ):
+                for ws in (alice, bob):
+                    await ws.send('{"type": "join_room", "room": "team"}')
+                    await recv_type(ws, "room_joined")
+
+                await alice.send(
+                    '{"type": "room_message", "room": "team", '
+                    '"content": "hi all"}'
+                )
+                to_alice = await recv_type(alice, "room_message")
+                to_bob = await recv_type(bob, "room_message")
+
+                await carol.send(
+                    '{"type": "room_message", "room": "team", '
+                    '"content": "let me in"}'
+                )
+                error = await recv_type(carol, "error")
+                return to_alice, to_bob, error
+
+    to_alice, to_bob, error = asyncio.run(scenario())
+    assert to_alice == to_bob
+    assert to_bob["from"] == "a@example.com"
+    assert to_bob["content"] == "hi all"
+    assert error["message"] == "Not a member of this room."
+
+
+def test_room_membership_survives_reconnect():
+    async def scenario():
+        async with running_hub() as client:
+            async with client("a@example.com") as alice:
+                await alice.send('{"type": "join_room", "room": "ops"}')
+                await recv_type(alice, "room_joined")
+            await asyncio.sleep(0.05)
+            assert "ops" not in client.hub._rooms
+
+            async with client("a@example.com") as alice:
+                await alice.send(
+                    '{"type": "room_message", "room": "ops", '
+                    '"content": "back"}'
+                )
+                return await recv_type(alice, "room_message")
+
+    assert asyncio.run(scenario())["content"] == "back"
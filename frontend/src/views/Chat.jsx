@@ -13,6 +13,7 @@ function Chat() {
   const [error, setError] = useState('');
   const [onlineUsers, setOnlineUsers] = useState({});
   const wsRef = useRef(null);
+  const presenceLoadedRef = useRef(false);
 
   const appendMessage = useCallback((partner, message) => {
     setMessagesByUser((prev) => {
@@ -41,7 +42,23 @@ function Chat() {
 
     fetchChatUsers(token)
       .then((response) => {
-        setUsers(response.users || []);
+        const loaded = response.users || [];
+        setUsers(loaded);
+
+        // Online state comes with the directory when the API can see the
+        // ws server's presence; otherwise the socket's user_list fills it.
+        const userMap = {};
+        loaded.forEach((user) => {
+          if (typeof user.online === 'boolean') {
+            userMap[user.email] = user.online;
+          }
+        });
+        if (Object.keys(userMap).length) {
+          presenceLoadedRef.current = true;
+          setOnlineUsers((prev) => ({ ...userMap, ...prev }));
+        } else if (wsRef.current?.readyState === WebSocket.OPEN) {
+          wsRef.current.send(JSON.stringify({ type: 'list_users' }));
+        }
       })
       .catch((err) => {
         setError(err.message || 'Failed to load users.');
@@ -60,7 +77,9 @@ function Chat() {
 
     ws.onopen = () => {
       setStatus('connected');
-      ws.send(JSON.stringify({ type: 'list_users' }));
+      if (!presenceLoadedRef.current) {
+        ws.send(JSON.stringify({ type: 'list_users' }));
+      }
     };
 
     ws.onclose = () => {
@@ -96,14 +115,16 @@ function Chat() {
         });
       }
 
-      if (payload.type === 'user_list') {
+      if (payload.type === 'user_list' || payload.type === 'roster') {
+        // Both cover the roster (or, with presence broadcast on, everyone
+        // online), so merge instead of replacing the directory's state.
         const userMap = {};
         (payload.users || []).forEach((user) => {
           if (user && user.email) {
             userMap[user.email] = Boolean(user.online);
           }
         });
-        setOnlineUsers(userMap);
+        setOnlineUsers((prev) => ({ ...prev, ...userMap }));
       }
 
       if (payload.type === 'user_status') {
@@ -121,6 +142,17 @@ function Chat() {
     };
   }, [appendMessage]);
 
+  useEffect(() => {
+    // The server only routes presence of roster contacts; opening a
+    // conversation adds the peer to the roster.
+    const ws = wsRef.current;
+    if (selectedUser && ws?.readyState === WebSocket.OPEN) {
+      ws.send(
+        JSON.stringify({ type: 'roster_add', emails: [selectedUser.email] }),
+      );
+    }
+  }, [selectedUser]);
+
   const handleSend = () => {
     if (!selectedUser || !draft.trim()) {
       return;